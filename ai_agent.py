@@ -6,8 +6,10 @@ Good morning, Banda!
 
 import os
 from datetime import datetime, timedelta, time as dt_time
-from anthropic import Anthropic
 from dotenv import load_dotenv
+import asyncio
+from contextlib import closing
+import hashlib
 import json
 from win10toast import ToastNotifier
 import schedule
@@ -16,10 +18,48 @@ import threading
 
 from calendar_reader import CalendarReader
 from study_planner import StudyPlanner
+from plan_store import SESSION_PENDING, SESSION_DONE
+from day_scheduler import DayScheduler, CareerProgress, course_from_title
+from response_cache import ResponseCache, request_key
+from json_stream import JSONStreamParser
+from llm_gateway import get_gateway
+from prompt_builder import (PromptBuilder, INPUT_TOKEN_BUDGET, PREFIX_TOKEN_BUDGET, MIN_CACHEABLE_TOKENS,
+                            TOPIC_LIMITS, compact_json, estimate_tokens, curriculum_context, overlap_context,
+                            event_context)
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # Not on Linux or not installed: fall back to mtime polling
+    INotify = None
 
 # Load environment
 load_dotenv('.env')
 
+# How often to stat the calendar file(s) when inotify is unavailable
+CALENDAR_POLL_SECONDS = 60
+
+# Schedules for this many days ahead are prepared in the evening
+PREFETCH_DAYS = 3
+PREFETCH_TIME = "21:00"
+
+# At most this many schedule requests to Claude at once
+PREFETCH_CONCURRENCY = 2
+
+# Fixed part of the enrichment prompt (cached together with the curriculum)
+ENRICHMENT_INSTRUCTIONS = """
+You are Banda's study coach. Banda is doing an MSc in AI while preparing for Data Analyst roles.
+The user message lists one day's calendar events and planned study blocks; their times and topics are fixed.
+
+For every block give 3 specific study_guidance bullet points and a one-line why_now.
+
+CURRICULUM lists what is left per skill as [topic, hours left]; MSC_OVERLAP gives covered skills as
+[coverage %, MSc course, what still needs self-study] and the skills the MSc doesn't cover.
+CALENDAR_EVENTS are [title, start, end].
+
+Return JSON:
+{"summary": "Brief overview", "schedule": [{"start_time": "08:00", "study_guidance": ["Point 1", "Point 2", "Point 3"], "resources": "Resources to use", "why_now": "Reason for timing"}]}
+"""
+
 # Initialize Windows notification system
 toaster = ToastNotifier()
 
@@ -33,8 +73,15 @@ class AutomatedStudyAgent:
     - No interaction needed unless you want to chat
     """
 
-    def __init__(self, calendar_file='calendar.ics', study_plan_file='study_plan.json'):
-        self.claude = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+    def __init__(self, calendar_file='calendar.ics', study_plan_file='study_plan.db'):
+        self.llm = get_gateway()
+        self.response_cache = ResponseCache()
+        self.prompt_token_budget = INPUT_TOKEN_BUDGET
+        self.prefix_token_budget = PREFIX_TOKEN_BUDGET
+
+        # Event loop thread for the gateway's async client; started on first use
+        self._loop = None
+        self._loop_lock = threading.Lock()
         self.calendar = CalendarReader(calendar_file)
         self.planner = StudyPlanner()
         self.study_plan_file = study_plan_file
@@ -46,16 +93,31 @@ class AutomatedStudyAgent:
         self.daily_waste_hours = 2
         self.break_minutes_per_hour = 10
 
+        # Schedules are built locally; Claude only rewrites the guidance text
+        self.enrich_schedules = True
+
         # Load data
         self.calendar.load_calendar()
         self.planner.load_plan(study_plan_file)
 
         # Load or create overlap analysis (ONE TIME)
         self.overlap_analysis = self.load_overlap_analysis()
+        if self.overlap_analysis:
+            self.planner.msc_coverage = self._coverage_from_overlap(self.overlap_analysis)
+
+        # Local scheduler for the study blocks
+        self.day_scheduler = DayScheduler(self.planner, msc_courses=self._msc_course_titles())
 
         # Track today's schedule
         self.todays_schedule = None
+        self.prefetched = {}  # date -> (calendar fingerprint, schedule)
+        self._prefetch_generation = 0  # bumped by every prefetch; stale background results are dropped
         self.notified_events = set()  # Track what we've already notified
+        self.logged_sessions = set()  # Sessions already written to the progress log
+
+        # Calendar hot-reload: set by the watcher, handled by the daemon loop
+        self.calendar_changed = threading.Event()
+        self.calendar_signature = self._read_calendar_signature()
 
     def load_overlap_analysis(self):
         """Load saved MSc overlap analysis if it exists"""
@@ -94,14 +156,7 @@ class AutomatedStudyAgent:
 
     def analyze_msc_curriculum_overlap(self):
         """Analyze MSc courses from calendar"""
-        all_events = self.calendar.all_events
-        course_titles = set()
-
-        for event in all_events:
-            title = event['title'].lower()
-            if any(keyword in title for keyword in ['lecture', 'lab', 'tutorial', 'seminar', 'workshop']):
-                course_name = title.split(';')[0].strip() if ';' in title else title
-                course_titles.add(course_name)
+        course_titles = self._msc_course_titles()
 
         print(f"\n   Detected {len(course_titles)} MSc courses:")
         for course in sorted(course_titles):
@@ -115,8 +170,8 @@ class AutomatedStudyAgent:
         context = f"""
 Analyze MSc AI curriculum overlap with Data Analyst skills.
 
-MSc COURSES: {json.dumps(list(course_titles), indent=2)}
-DATA ANALYST CURRICULUM: {json.dumps(curriculum_simple, indent=2)}
+MSc COURSES: {compact_json(sorted(course_titles))}
+DATA ANALYST CURRICULUM: {compact_json(curriculum_simple)}
 
 Return JSON:
 {{
@@ -129,13 +184,12 @@ Return JSON:
 """
 
         try:
-            message = self.claude.messages.create(
-                model="claude-sonnet-4-5-20250929",
+            response_text = self.response_cache.create(
+                self.llm,
+                model=self.llm.model,
                 max_tokens=2000,
                 messages=[{"role": "user", "content": context}]
             )
-
-            response_text = message.content[0].text
             start_idx = response_text.find('{')
             end_idx = response_text.rfind('}') + 1
 
@@ -147,139 +201,394 @@ Return JSON:
 
         return None
 
+    def _msc_course_titles(self):
+        """MSc course names detected from class events in the calendar"""
+        course_titles = set()
+        for event in self.calendar.all_events:
+            if event.all_day:
+                continue
+            course_name = course_from_title(event.title)
+            if course_name:
+                course_titles.add(course_name)
+        return course_titles
+
     def adjust_curriculum_for_overlap(self, overlap_analysis):
         """Adjust curriculum based on MSc overlap"""
         if not overlap_analysis:
             return
 
-        covered = overlap_analysis.get('covered_by_msc', {})
         pure_gaps = overlap_analysis.get('pure_gaps', [])
 
-        for skill_id, coverage_info in covered.items():
-            if skill_id in self.planner.curriculum:
-                coverage_pct = coverage_info.get('coverage_percentage', 0)
-                original_hours = self.planner.curriculum[skill_id]['total_hours']
-                reduction_factor = (100 - coverage_pct) / 100
-                new_hours = int(original_hours * reduction_factor)
-                self.planner.curriculum[skill_id]['total_hours'] = new_hours
+        # Covered hours become per-topic caps in the allocation solver
+        self.planner.msc_coverage = self._coverage_from_overlap(overlap_analysis)
+        self.refresh_allocation()
 
         print(f"\n   🎯 Focus areas (gaps in MSc): {', '.join(pure_gaps)}")
 
+    def _coverage_from_overlap(self, overlap_analysis):
+        """MSc coverage percentage per curriculum skill id"""
+        return self.planner.coverage_from_overlap(overlap_analysis)
+
+    def refresh_allocation(self, verbose=False):
+        """Re-solve the hour allocation for the study time the calendar currently leaves"""
+        time_available = self.planner.calculate_available_time(self.calendar)
+
+        # Past the target date there is nothing to allocate; keep the current plan
+        if time_available['days_remaining'] > 0:
+            self.planner.allocate_hours_to_curriculum(time_available['available_study_hours'], verbose=verbose)
+
+        return time_available
+
     def calculate_daily_available_time(self, date):
         """Calculate available study time"""
         events = self.calendar.get_events_for_date(date)
 
-        calendar_hours = sum(
-            (e['end'] - e['start']).total_seconds() / 3600
-            for e in events if e.get('end')
+        # Overlapping events only block the waking window once
+        day_start = datetime(date.year, date.month, date.day)
+        free_slots = self.calendar.get_free_slots(
+            day_start, day_start + timedelta(days=1), self.wake_time, self.sleep_time
         )
+        free_hours = sum((end - start).total_seconds() for start, end in free_slots) / 3600
 
         total_awake_hours = 17
+        calendar_hours = total_awake_hours - free_hours
         available_hours = total_awake_hours - self.daily_waste_hours - calendar_hours
         effective_study_hours = available_hours * 0.83
 
         return {
             'calendar_blocked': calendar_hours,
             'effective_study_hours': effective_study_hours,
-            'calendar_events': events
+            'calendar_events': events,
+            'free_slots': free_slots
         }
 
-    def generate_daily_schedule(self, date=None):
-        """Generate balanced daily schedule"""
+    def generate_daily_schedule(self, date=None, prefetched=None):
+        """
+        Generate balanced daily schedule
+        The blocks are placed locally by DayScheduler, so this works offline and
+        takes milliseconds; Claude then optionally rewrites study_guidance and why_now
+        in the background, updating the returned schedule in place. A prefetched
+        (fingerprint, schedule) is served instead when the day's calendar and the
+        freshly planned blocks both still match it.
+        """
         if date is None:
             date = datetime.now()
 
         time_info = self.calculate_daily_available_time(date)
-        curriculum_status = json.dumps(self.planner.curriculum, indent=2)
+        schedule = self.day_scheduler.build(
+            date, time_info['free_slots'], time_info['effective_study_hours'], time_info['calendar_events']
+        )
+        print(f"   ✓ Planned {len(schedule['schedule'])} study blocks locally")
+
+        # Sessions logged since the prefetch change the blocks, so the old text no longer fits
+        if (prefetched and prefetched[0] == self._calendar_day_fingerprint(date)
+                and self._planned_blocks(prefetched[1]) == self._planned_blocks(schedule)):
+            print("   ⚡ Using the schedule prepared in advance")
+            return prefetched[1]
+
+        # Save schedule
+        self.planner.store.save_schedule(schedule['date'], schedule)
+        print(f"   ✓ Saved to {self.planner.store.db_file}")
+
+        if self.enrich_schedules and schedule['schedule']:
+            self.enrich_schedule(schedule, date, time_info)
+
+        return schedule
+
+    def enrich_schedule(self, schedule, date, time_info):
+        """
+        Ask Claude for better study_guidance and why_now text for each block
+        Runs on the agent's event loop without blocking the caller: blocks are
+        updated in place as their text arrives and the schedule is saved again
+        when the reply is complete. Times, subjects and topics are kept as
+        planned; if the call fails the local text stays, so the schedule is
+        always usable. Returns the concurrent Future of the request.
+        """
+        def save(enriched):
+            if enriched:
+                self.planner.store.save_schedule(schedule['date'], schedule)
+
+        return self._submit(self.enrich_schedule_async(schedule, date, time_info), save)
+
+    async def enrich_schedule_async(self, schedule, date, time_info):
+        """
+        enrich_schedule on the agent's event loop, using the async client
+        The response is streamed through JSONStreamParser, so each block's guidance
+        is merged as soon as its JSON object is complete. If the stream breaks off,
+        the blocks that already arrived keep their new text.
+        """
+        params = self._enrichment_request(schedule, date, time_info)
+        key = request_key(params)
+        parser = JSONStreamParser('schedule')
+        by_start = {session['start_time']: session for session in schedule['schedule']}
+        enriched = 0
 
-        msc_context = ""
-        if self.overlap_analysis:
-            msc_context = f"""
-MSc Coverage: {json.dumps(self.overlap_analysis.get('covered_by_msc', {}), indent=2)}
-Pure Gaps: {json.dumps(self.overlap_analysis.get('pure_gaps', []), indent=2)}
-"""
+        try:
+            cached = self.response_cache.get(key)
+            if cached is not None:
+                enriched += sum(self._merge_guidance(by_start, item) for item in parser.feed(cached))
+                enriched += sum(self._merge_guidance(by_start, item) for item in parser.close())
+            else:
+                print(f"   Sending request to Claude ({schedule['date']})...")
+                async for text in self.llm.astream_text(**params):
+                    enriched += sum(self._merge_guidance(by_start, item) for item in parser.feed(text))
+                enriched += sum(self._merge_guidance(by_start, item) for item in parser.close())
 
-        context = f"""
-Generate Banda's balanced daily schedule for {date.strftime('%A, %B %d, %Y')}.
+                # Only complete responses are worth replaying
+                if parser.document is not None:
+                    self.response_cache.put(key, parser.text)
 
-TIME AVAILABLE:
-- Effective study hours: {time_info['effective_study_hours']:.1f}h
-- Calendar events: {json.dumps([{{'title': e['title'], 'start': e['start'].strftime('%H:%M'), 'end': e['end'].strftime('%H:%M') if e.get('end') else 'N/A'}} for e in time_info['calendar_events']], indent=2)}
+        except Exception as e:
+            print(f"   ⚠️  Enrichment stopped early ({e})")
 
-CURRICULUM: {curriculum_status}
-{msc_context}
+        if parser.document and parser.document.get('summary'):
+            schedule['summary'] = str(parser.document['summary'])
 
-REQUIREMENTS:
-1. 50/50 split: {time_info['effective_study_hours'] / 2:.1f}h MSc + {time_info['effective_study_hours'] / 2:.1f}h Data Analyst gaps
-2. Work around calendar events
-3. Start after 7am, end before 11:30pm
-4. Specific topics with 3 bullet points each
-5. 1.5-2.5 hour blocks with breaks
+        if enriched:
+            print(f"   ✓ Guidance enriched by Claude ({schedule['date']}: {enriched}/{len(by_start)} blocks)")
+        else:
+            print(f"   ⚠️  No guidance from Claude ({schedule['date']}), keeping the local text")
+        return enriched > 0
+
+    def _enrichment_request(self, schedule, date, time_info):
+        """
+        messages.create parameters for the enrichment prompt
+        The instructions, curriculum and MSc overlap go in the system prompt,
+        which is the same for every day and is cached by the API; the message
+        only carries the day's events and planned blocks. Both are compact JSON.
+        The prefix is trimmed to prefix_token_budget on its own, so no day's
+        events can change it, and the message gets what is left of
+        prompt_token_budget. A prefix shorter than MIN_CACHEABLE_TOKENS can't be
+        cached, so it is sent without a cache breakpoint.
+        """
+        planned = [[s['start_time'], s['end_time'], s['subject'], s['specific_topic']] for s in schedule['schedule']]
+        events = time_info['calendar_events']
+
+        day = PromptBuilder(self.prompt_token_budget)
+        day.add('', f"Write study guidance for Banda's planned study blocks on {date.strftime('%A, %B %d, %Y')}.")
+        day.add('CALENDAR_EVENTS', event_context(events), event_context(events, with_times=False), None, value=1)
+        day.add('PLANNED_BLOCKS [start, end, subject, topic] (fixed)', planned)
+
+        prefix = self._study_context()
+        system = prefix.build(self.prefix_token_budget)
+        prefix_tokens = estimate_tokens(system)
+        context = day.build(self.prompt_token_budget - prefix_tokens)
+
+        trimmed = list(dict.fromkeys(day.trimmed + prefix.trimmed))
+        if trimmed:
+            print(f"   ✂️  Prompt trimmed to ~{self.prompt_token_budget} tokens ({', '.join(trimmed)})")
+
+        system_block = {'type': 'text', 'text': system}
+        if prefix_tokens >= MIN_CACHEABLE_TOKENS:
+            system_block['cache_control'] = {'type': 'ephemeral'}
+        else:
+            print(f"   ℹ️  Prompt prefix ~{prefix_tokens} tokens, under the {MIN_CACHEABLE_TOKENS} the API caches; "
+                  f"sending it uncached")
 
-Return JSON:
-{{
-  "date": "{date.strftime('%Y-%m-%d')}",
-  "summary": "Brief overview",
-  "total_study_hours": 0.0,
-  "schedule": [
-    {{
-      "start_time": "08:00",
-      "end_time": "10:00",
-      "subject": "SQL",
-      "specific_topic": "Window Functions",
-      "study_guidance": ["Point 1", "Point 2", "Point 3"],
-      "resources": "Resources to use",
-      "why_now": "Reason for timing"
-    }}
-  ]
-}}
-"""
+        return {
+            'model': self.llm.model,
+            'max_tokens': 2000,
+            'system': [system_block],
+            'messages': [{"role": "user", "content": context}]
+        }
 
-        try:
-            print("   Sending request to Claude...")
-            message = self.claude.messages.create(
-                model="claude-sonnet-4-5-20250929",
-                max_tokens=4000,
-                messages=[{"role": "user", "content": context}]
+    def _study_context(self):
+        """
+        PromptBuilder for the system prompt shared by every day's enrichment request
+        When over budget the overlap details go first, then curriculum topics
+        beyond the next few per skill, then the MSc overlap altogether
+        """
+        builder = PromptBuilder(self.prompt_token_budget)
+        builder.add('', ENRICHMENT_INSTRUCTIONS.strip())
+        builder.add('CURRICULUM', curriculum_context(self.planner),
+                    *(curriculum_context(self.planner, limit) for limit in TOPIC_LIMITS), value=3)
+        if self.overlap_analysis:
+            builder.add('MSC_OVERLAP', overlap_context(self.overlap_analysis),
+                        overlap_context(self.overlap_analysis, details=False), None, value=[2, 4])
+        return builder
+
+    def _merge_guidance(self, by_start, item):
+        """Copy one streamed schedule item's text onto the planned block with the same start time"""
+        session = by_start.get(item.get('start_time')) if isinstance(item, dict) else None
+        if session is None:
+            return False
+
+        guidance = item.get('study_guidance')
+        if isinstance(guidance, list) and guidance:
+            session['study_guidance'] = [str(point) for point in guidance]
+        for key in ('resources', 'why_now'):
+            if item.get(key):
+                session[key] = str(item[key])
+        return True
+
+    def _submit(self, coroutine, on_done=None):
+        """
+        Start a coroutine on the agent's event loop thread without waiting for it
+        on_done(result) is called on the loop thread when it finishes; an error is
+        printed instead. Returns the concurrent Future, for callers that must wait.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+
+        def finished(future):
+            if future.cancelled():
+                return
+            if future.exception() is not None:
+                print(f"⚠️  Background Claude request failed ({future.exception()})")
+            elif on_done is not None:
+                on_done(future.result())
+
+        future.add_done_callback(finished)
+        return future
+
+    def _calendar_day_fingerprint(self, date):
+        """Hash of a day's calendar events and the day settings; changes when the day's plan would"""
+        events = sorted(
+            (event.title, event.start.isoformat(), event.end.isoformat() if event.end else '', event.all_day)
+            for event in self.calendar.get_events_for_date(date)
+        )
+        settings = (self.wake_time, self.sleep_time, self.daily_waste_hours)
+        return hashlib.blake2b(repr((events, settings)).encode('utf-8'), digest_size=16).hexdigest()
+
+    def _planned_blocks(self, schedule):
+        """The parts of a schedule DayScheduler decides: each block's times, subject and topic"""
+        return [(s['start_time'], s['end_time'], s['subject'], s['specific_topic']) for s in schedule['schedule']]
+
+    def prefetch_schedules(self, days=PREFETCH_DAYS):
+        """
+        Prepare the next `days` days' schedules ahead of time
+        Blocks are placed locally, one day after another, so each day's career
+        topics continue where the previous day's stopped; then the Claude
+        enrichment for every day runs concurrently (at most PREFETCH_CONCURRENCY
+        requests at once) on the event loop, and the days are stored when it is
+        done, so the daemon loop keeps running meanwhile. A newer prefetch
+        supersedes one still in flight. Days whose calendar and planned blocks
+        haven't changed since they were prefetched are skipped.
+        """
+        self._prefetch_generation += 1
+        generation = self._prefetch_generation
+        today = datetime.now()
+        progress = CareerProgress(self.planner)
+        jobs = []
+
+        for offset in range(1, days + 1):
+            date = today + timedelta(days=offset)
+            key = date.strftime('%Y-%m-%d')
+            fingerprint = self._calendar_day_fingerprint(date)
+
+            time_info = self.calculate_daily_available_time(date)
+            schedule = self.day_scheduler.build(
+                date, time_info['free_slots'], time_info['effective_study_hours'], time_info['calendar_events'],
+                progress=progress
             )
 
-            response_text = message.content[0].text
-            print("   ✓ Got response from Claude")
+            previous = self.prefetched.get(key)
+            if (previous and previous[0] == fingerprint
+                    and self._planned_blocks(previous[1]) == self._planned_blocks(schedule)):
+                continue
+            jobs.append((fingerprint, date, time_info, schedule))
 
-            # Debug: Show part of response
-            print(f"   Response preview: {response_text[:200]}...")
+        if not jobs:
+            return []
 
-            start_idx = response_text.find('{')
-            end_idx = response_text.rfind('}') + 1
+        prefetched_dates = [schedule['date'] for _, _, _, schedule in jobs]
 
-            if start_idx != -1:
-                schedule_json = response_text[start_idx:end_idx]
-                print("   ✓ Found JSON in response")
-                schedule = json.loads(schedule_json)
-                print("   ✓ Parsed JSON successfully")
-
-                # Save schedule
-                filename = f"schedule_{date.strftime('%Y-%m-%d')}.json"
-                with open(filename, 'w') as f:
-                    json.dump(schedule, f, indent=2)
-                print(f"   ✓ Saved to {filename}")
-
-                return schedule
-            else:
-                print("   ❌ No JSON found in Claude's response")
-                print(f"   Full response:\n{response_text}")
-                return None
+        def store(_):
+            if generation != self._prefetch_generation:
+                return  # the calendar changed and a newer prefetch replaces this one
+            for fingerprint, _, _, schedule in jobs:
+                self.prefetched[schedule['date']] = (fingerprint, schedule)
+                self.planner.store.save_schedule(schedule['date'], schedule)
+            print(f"🔮 Prefetched schedules for {', '.join(prefetched_dates)}")
 
-        except json.JSONDecodeError as e:
-            print(f"   ❌ JSON parsing error: {e}")
-            print(f"   Attempted to parse: {response_text[start_idx:start_idx + 200]}...")
-            return None
-        except Exception as e:
-            print(f"   ❌ Error generating schedule: {e}")
-            import traceback
-            traceback.print_exc()
+        if self.enrich_schedules:
+            self._submit(self._enrich_concurrently(jobs), store)
+        else:
+            store(None)
+        return prefetched_dates
+
+    async def _enrich_concurrently(self, jobs):
+        """
+        Enrich several schedules at once, bounded by PREFETCH_CONCURRENCY
+        The first day goes alone so it writes the shared prompt prefix to the
+        API's cache; the remaining days then read it concurrently
+        """
+        semaphore = asyncio.Semaphore(PREFETCH_CONCURRENCY)
+
+        async def enrich(schedule, date, time_info):
+            async with semaphore:
+                return await self.enrich_schedule_async(schedule, date, time_info)
+
+        pending = [(schedule, date, time_info) for _, date, time_info, schedule in jobs if schedule['schedule']]
+        if not pending:
+            return []
+        first = await enrich(*pending[0])
+        return [first] + await asyncio.gather(*(enrich(*job) for job in pending[1:]))
+
+    def invalidate_prefetched(self, diff):
+        """
+        Drop prefetched days whose calendar changed, using the reload diff
+        Only days touched by an added/removed/changed event are re-checked,
+        unless a recurring event changed, which can touch any day
+        """
+        if not self.prefetched:
+            return []
+
+        days = self._touched_days(diff)
+        candidates = [key for key in self.prefetched if days is None or key in days]
+
+        stale = [key for key in candidates
+                 if self._calendar_day_fingerprint(datetime.strptime(key, '%Y-%m-%d')) != self.prefetched[key][0]]
+        for key in stale:
+            del self.prefetched[key]
+        return stale
+
+    def _touched_days(self, diff):
+        """YYYY-MM-DD days covered by the reload diff's events, or None when a recurring event changed"""
+        touched = diff['added'] + diff['removed'] + [event for pair in diff['changed'] for event in pair]
+        if any(event.rrule for event in touched):
             return None
 
+        days = set()
+        for event in touched:
+            day = event.start.date()
+            last = (event.end or event.start).date()
+            while day <= last:
+                days.add(day.strftime('%Y-%m-%d'))
+                day += timedelta(days=1)
+        return days
+
+    def replan_today(self):
+        """
+        Rebuild the rest of today's schedule around the current calendar
+        Sessions that already ended stay; reminders for the replaced blocks are
+        cleared so the new blocks get their own
+        """
+        now = datetime.now()
+        date = self.todays_schedule['date']
+        time_info = self.calculate_daily_available_time(now)
+        counted = {session['start_time'] for session in self.planner.store.get_sessions(date, status=SESSION_DONE)}
+
+        old_sessions = self.todays_schedule['schedule']
+        schedule = self.day_scheduler.replan(
+            self.todays_schedule, now, time_info['free_slots'], time_info['effective_study_hours'],
+            time_info['calendar_events'], counted=counted
+        )
+        for session in old_sessions:
+            if session not in schedule['schedule']:
+                self.notified_events.discard(f"{session['start_time']}-{session['subject']}")
+
+        self.todays_schedule = schedule
+        self.planner.store.save_schedule(date, schedule)
+        print(f"   Today's schedule replanned: {len(schedule['schedule'])} study blocks")
+
+        if self.enrich_schedules and schedule['schedule']:
+            self.enrich_schedule(schedule, now, time_info)
+        return schedule
+
     def send_notification(self, title, message, duration=10):
         """Send Windows system notification with sound"""
         try:
@@ -297,19 +606,23 @@ Return JSON:
             print(f"⚠️  Notification error: {e}")
             print(f"   {title}: {message}")
 
+    def _calendar_event_id(self, event):
+        """Key used in notified_events for a calendar event"""
+        return f"{event.start.strftime('%H:%M')}-{event.title}"
+
     def notify_calendar_event(self, event, minutes_before=10):
         """Send notification for upcoming calendar event"""
-        event_id = f"{event['start'].strftime('%H:%M')}-{event['title']}"
+        event_id = self._calendar_event_id(event)
 
         if event_id not in self.notified_events:
-            title = f"📅 Upcoming: {event['title']}"
-            start = event['start'].strftime('%H:%M')
-            end = event['end'].strftime('%H:%M') if event.get('end') else '?'
+            title = f"📅 Upcoming: {event.title}"
+            start = event.start.strftime('%H:%M')
+            end = event.end.strftime('%H:%M') if event.end else '?'
             message = f"In {minutes_before} minutes\n{start} - {end}"
 
             self.send_notification(title, message)
             self.notified_events.add(event_id)
-            print(f"🔔 Notified: {event['title']} at {start}")
+            print(f"🔔 Notified: {event.title} at {start}")
 
     def notify_study_session(self, session):
         """Send notification for study session"""
@@ -343,7 +656,7 @@ Return JSON:
         # Check calendar events (notify 10 min before)
         time_info = self.calculate_daily_available_time(now)
         for event in time_info['calendar_events']:
-            event_time = event['start']
+            event_time = event.start
             time_until = (event_time - now).total_seconds() / 60
 
             # Notify 10 minutes before
@@ -363,6 +676,76 @@ Return JSON:
             if -2 <= time_diff <= 2:
                 self.notify_study_session(session)
 
+        self.log_finished_sessions(now)
+
+    def log_finished_sessions(self, now):
+        """
+        Append today's sessions whose end time has passed to the log as pending
+        They only count as progress once confirmed with 'done' in chat, so a
+        skipped block never moves the plan forward on its own
+        """
+        date = self.todays_schedule.get('date', now.strftime('%Y-%m-%d'))
+        newly_logged = []
+
+        for session in self.todays_schedule.get('schedule', []):
+            session_id = f"{date}-{session['start_time']}-{session['subject']}"
+            if session_id in self.logged_sessions:
+                continue
+
+            start = datetime.strptime(session['start_time'], '%H:%M')
+            end = datetime.strptime(session['end_time'], '%H:%M')
+            if end.replace(year=now.year, month=now.month, day=now.day) > now:
+                continue
+
+            hours = (end - start).total_seconds() / 3600
+            if self.planner.store.log_session(date, session['start_time'], session['end_time'],
+                                              session['subject'], hours, skill_id=session.get('skill_id'),
+                                              topic=session.get('specific_topic'), status=SESSION_PENDING):
+                newly_logged.append(session)
+            self.logged_sessions.add(session_id)
+
+        for session in newly_logged:
+            self.send_notification(
+                f"✅ Finished: {session['subject']}?",
+                f"{session['specific_topic']}\n\nIn chat, type 'done {session['start_time']}' "
+                f"(or 'skipped {session['start_time']}')"
+            )
+        if newly_logged:
+            print(f"📝 {len(newly_logged)} finished session(s) waiting for confirmation")
+
+    def confirm_sessions(self, start_time=None, done=True, date=None):
+        """
+        Confirm today's pending sessions (or the one starting at start_time) as done or skipped
+        Done sessions become progress straight away; returns how many changed
+        """
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        changed = self.planner.store.confirm_sessions(date, start_time, done=done)
+        if changed and done:
+            self.planner.refresh_progress()
+        return changed
+
+    def _session_command(self, user_input):
+        """
+        Handle 'done' / 'skipped' (optionally followed by HH:MM) typed in chat
+        Returns the reply to print, or None when the input isn't such a command
+        """
+        words = user_input.lower().split()
+        if not words or words[0] not in ('done', 'skipped') or len(words) > 2:
+            return None
+
+        start_time = None
+        if len(words) == 2:
+            try:
+                start_time = datetime.strptime(words[1], '%H:%M').strftime('%H:%M')
+            except ValueError:
+                return None
+
+        done = words[0] == 'done'
+        changed = self.confirm_sessions(start_time, done=done)
+        if not changed:
+            return "There's no finished session waiting for confirmation" + (f" at {start_time}" if start_time else "")
+        return f"Marked {changed} session(s) as {'done - progress updated' if done else 'skipped'}"
+
     def morning_routine(self):
         """Morning routine: Generate schedule and send summary"""
         today = datetime.now()
@@ -371,7 +754,9 @@ Return JSON:
         print(f"\n🌅 Good morning, Banda! {today.strftime('%A, %B %d, %Y')}")
         print("📋 Generating your balanced schedule...")
 
-        self.todays_schedule = self.generate_daily_schedule(today)
+        # Serve the schedule prepared last night if neither the calendar nor progress changed since
+        prefetched = self.prefetched.pop(today.strftime('%Y-%m-%d'), None)
+        self.todays_schedule = self.generate_daily_schedule(today, prefetched=prefetched)
 
         if self.todays_schedule:
             # Send morning summary
@@ -385,6 +770,13 @@ Return JSON:
 
             print(f"✅ Schedule generated")
             print(f"   {num_sessions} study sessions, {total_hours:.1f} hours")
+
+            cache_stats = self.response_cache.stats()
+            print(f"   💾 LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+            llm_stats = self.llm.stats()
+            print(f"   🌐 Claude API: {llm_stats['requests']} requests, {llm_stats['retries']} retries")
+            print(f"   🧠 Prompt cache: {llm_stats['cache_read_input_tokens']} input tokens read from cache, "
+                  f"{llm_stats['cache_creation_input_tokens']} written, {llm_stats['input_tokens']} uncached")
             print(f"   Windows notifications will be sent throughout the day")
         else:
             print("❌ Failed to generate schedule")
@@ -392,6 +784,88 @@ Return JSON:
         # Reset notification tracking for new day
         self.notified_events.clear()
 
+    def _read_calendar_signature(self):
+        """Size and mtime of every calendar file, used to detect edits when polling"""
+        signature = []
+        for path in self.calendar.calendar_files:
+            try:
+                file_stat = os.stat(path)
+                signature.append((file_stat.st_size, file_stat.st_mtime_ns))
+            except OSError:
+                signature.append(None)
+        return signature
+
+    def poll_calendar(self):
+        """mtime fallback for the watcher: flag a reload when a calendar file changes"""
+        signature = self._read_calendar_signature()
+        if signature != self.calendar_signature:
+            self.calendar_signature = signature
+            self.calendar_changed.set()
+
+    def start_calendar_watch(self):
+        """Watch the calendar file(s) with inotify, or poll their mtime if it's unavailable"""
+        if INotify is not None:
+            try:
+                inotify = INotify()
+                watched = {}
+                watch_flags = inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO | inotify_flags.CREATE
+
+                for path in self.calendar.calendar_files:
+                    directory = os.path.dirname(os.path.abspath(path))
+                    descriptor = inotify.add_watch(directory, watch_flags)
+                    watched.setdefault(descriptor, set()).add(os.path.basename(path))
+
+                threading.Thread(target=self._watch_with_inotify, args=(inotify, watched),
+                                 daemon=True).start()
+                print("👀 Watching calendar for changes (inotify)")
+                return
+            except OSError as e:
+                print(f"⚠️  inotify unavailable ({e}), polling instead")
+
+        schedule.every(CALENDAR_POLL_SECONDS).seconds.do(self.poll_calendar)
+        print(f"👀 Checking calendar for changes every {CALENDAR_POLL_SECONDS}s")
+
+    def _watch_with_inotify(self, inotify, watched):
+        """Background thread: wake the daemon loop when a watched calendar file is written"""
+        while True:
+            for event in inotify.read():
+                if event.name in watched.get(event.wd, ()):
+                    self.calendar_changed.set()
+
+    def apply_calendar_changes(self):
+        """Re-parse the calendar and apply only the added/removed/changed events"""
+        diff = self.calendar.reload_calendar()
+        if diff is None:
+            return None
+
+        self.calendar_signature = self._read_calendar_signature()
+
+        # Moved or cancelled events must not keep (or block) their reminders
+        for event in diff['removed'] + [old for old, _ in diff['changed']]:
+            self.notified_events.discard(self._calendar_event_id(event))
+
+        if diff['added'] or diff['removed'] or diff['changed']:
+            print(f"🔄 Calendar updated: {len(diff['added'])} added, "
+                  f"{len(diff['changed'])} changed, {len(diff['removed'])} removed")
+
+            # Available hours changed, so re-balance the curriculum
+            self.refresh_allocation()
+
+            # An event added or moved today must not overlap today's remaining blocks
+            days = self._touched_days(diff)
+            today = datetime.now().strftime('%Y-%m-%d')
+            if (self.todays_schedule and self.todays_schedule.get('date') == today
+                    and (days is None or today in days)):
+                self.replan_today()
+
+            # Prefetched days whose calendar changed are prepared again
+            stale = self.invalidate_prefetched(diff)
+            if stale:
+                print(f"   Prefetched schedules out of date: {', '.join(stale)}")
+                self.prefetch_schedules()
+
+        return diff
+
     def run_daemon(self):
         """Run as background daemon - sends notifications all day"""
         print("\n" + "=" * 70)
@@ -405,18 +879,26 @@ Return JSON:
         # Schedule morning routine at 7:00 AM
         schedule.every().day.at("07:00").do(self.morning_routine)
 
+        # Prepare the next days' schedules in the evening
+        schedule.every().day.at(PREFETCH_TIME).do(self.prefetch_schedules)
+
         # Check for notifications every minute
         schedule.every(1).minutes.do(self.check_and_notify)
 
+        # Pick up calendar edits without restarting
+        self.start_calendar_watch()
+
         # Run morning routine now if after 7 AM and no schedule yet
         now = datetime.now()
         if now.time() >= dt_time(7, 0) and not self.todays_schedule:
             self.morning_routine()
 
-        # Keep running
+        # Keep running - check every 30 seconds, or straight away when the calendar changes
         while True:
             schedule.run_pending()
-            time.sleep(30)  # Check every 30 seconds
+            if self.calendar_changed.wait(timeout=30):
+                self.calendar_changed.clear()
+                self.apply_calendar_changes()
 
     def chat_mode(self):
         """Interactive chat mode"""
@@ -433,6 +915,12 @@ Return JSON:
                 print("\nAgent: Good luck, Banda! 🚀")
                 break
 
+            # Confirming finished sessions is handled locally, without Claude
+            reply = self._session_command(user_input)
+            if reply:
+                print(f"\nAgent: {reply}\n")
+                continue
+
             # Generate response using Claude
             context = f"""
 You are Banda's AI study coach. Help with questions about the schedule, study tips, motivation.
@@ -442,15 +930,39 @@ USER: {user_input}
 Respond conversationally, briefly (2-3 sentences), and supportively.
 """
 
-            try:
-                message = self.claude.messages.create(
-                    model="claude-sonnet-4-5-20250929",
-                    max_tokens=500,
-                    messages=[{"role": "user", "content": context}]
-                )
-                print(f"\nAgent: {message.content[0].text}\n")
-            except Exception as e:
-                print(f"\nAgent: Sorry, I had trouble with that: {e}\n")
+            print("\nAgent: ", end="", flush=True)
+            self.stream_reply(
+                model=self.llm.model,
+                max_tokens=500,
+                messages=[{"role": "user", "content": context}]
+            )
+            print("\n")
+
+    def stream_reply(self, **params):
+        """
+        Print a Claude reply token by token and report the time to first token
+        Ctrl+C cancels the reply only: the stream is closed and the chat (and any
+        daemon thread) carries on. Returns the text received.
+        """
+        started = time.perf_counter()
+        first_token = None
+        parts = []
+
+        try:
+            with closing(self.llm.stream_text(**params)) as stream:
+                for text in stream:
+                    if first_token is None:
+                        first_token = time.perf_counter() - started
+                    print(text, end="", flush=True)
+                    parts.append(text)
+        except KeyboardInterrupt:
+            print(" [stopped]", end="")
+        except Exception as e:
+            print(f"Sorry, I had trouble with that: {e}", end="")
+
+        if first_token is not None:
+            print(f"\n   ⏱️  first token {first_token:.2f}s, total {time.perf_counter() - started:.2f}s", end="")
+        return ''.join(parts)
 
 
 # Main entry point
@@ -464,7 +976,7 @@ if __name__ == "__main__":
 
     agent = AutomatedStudyAgent(
         calendar_file='calendar.ics',
-        study_plan_file='study_plan.json'
+        study_plan_file='study_plan.db'
     )
 
     # First-time setup if needed
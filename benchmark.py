@@ -0,0 +1,320 @@
+"""
+Benchmark Suite: CalendarReader and StudyPlanner
+Generates seeded synthetic ICS calendars and measures how the hot operations scale
+
+Usage:
+    python benchmark.py                          # 100, 1k, 10k and 100k events
+    python benchmark.py --sizes 1000 1000000     # pick your own sizes
+    python benchmark.py --save-baseline          # store results in benchmark_baseline.json
+    python benchmark.py --compare                # exit 1 if anything regressed vs the baseline
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is reported as n/a
+    resource = None
+
+from calendar_reader import CalendarReader
+from study_planner import StudyPlanner
+
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+BASELINE_FILE = 'benchmark_baseline.json'
+
+# A result is a regression when it is this much slower than the baseline
+DEFAULT_TOLERANCE = 0.25
+
+# Synthetic calendar shape
+HORIZON_DAYS_BEFORE = 60
+HORIZON_DAYS_AFTER = 300
+RECURRING_SHARE = 0.05
+OVERLAP_SHARE = 0.10
+QUERY_DATES = 200
+
+TITLES = [
+    'Programming for Data Analysis; Lecture', 'Research Methods; Lecture', 'Graph and AI; Lab',
+    'Machine Learning; Tutorial', 'Statistics; Seminar', 'Work shift', 'Gym', 'Team meeting',
+    'Dentist', 'Study group'
+]
+
+VTIMEZONE = [
+    'BEGIN:VTIMEZONE', 'TZID:Campus Time', 'X-LIC-LOCATION:Europe/Dublin',
+    'BEGIN:STANDARD', 'DTSTART:16010101T020000', 'TZOFFSETFROM:+0100', 'TZOFFSETTO:+0000',
+    'END:STANDARD', 'END:VTIMEZONE'
+]
+
+# '' = floating time, 'Z' = UTC, anything else is a TZID
+ZONES = ['', '', 'Z', 'GMT Standard Time', 'America/New_York', 'Campus Time']
+
+
+def _fold(line):
+    """Fold a content line at 75 octets like real exporters do"""
+    parts = [line[:75]]
+    for i in range(75, len(line), 74):
+        parts.append(' ' + line[i:i + 74])
+    return '\r\n'.join(parts)
+
+
+def _format_time(name, moment, zone):
+    """DTSTART/DTEND-style property in the given zone"""
+    if zone == 'Z':
+        return f"{name}:{moment.strftime('%Y%m%dT%H%M%S')}Z"
+    if zone:
+        return f"{name};TZID={zone}:{moment.strftime('%Y%m%dT%H%M%S')}"
+    return f"{name}:{moment.strftime('%Y%m%dT%H%M%S')}"
+
+
+def generate_synthetic_ics(path, n_events, seed=42, anchor=None):
+    """
+    Write a reproducible synthetic calendar with n_events VEVENTs
+    Mixes recurring series (with EXDATEs), overlapping events, folded lines,
+    all-day events and several time zones. Written line by line so 1M events
+    doesn't need the whole file in memory.
+    """
+    rng = random.Random(seed)
+    if anchor is None:
+        anchor = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    first_day = anchor - timedelta(days=HORIZON_DAYS_BEFORE)
+    span_days = HORIZON_DAYS_BEFORE + HORIZON_DAYS_AFTER
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('\r\n'.join(['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//benchmark//EN'] + VTIMEZONE))
+        f.write('\r\n')
+
+        previous_start = None
+        for i in range(n_events):
+            if previous_start and rng.random() < OVERLAP_SHARE:
+                start = previous_start + timedelta(minutes=rng.choice([0, 15, 30]))
+            else:
+                start = first_day + timedelta(days=rng.randrange(span_days),
+                                              hours=rng.randint(7, 21),
+                                              minutes=rng.choice([0, 15, 30, 45]))
+            end = start + timedelta(minutes=rng.choice([30, 60, 90, 120, 180]))
+            previous_start = start
+            zone = rng.choice(ZONES)
+
+            lines = ['BEGIN:VEVENT', f"UID:bench-{seed}-{i}@example.com", f"SUMMARY:{rng.choice(TITLES)}"]
+
+            if rng.random() < 0.01:
+                lines += [f"DTSTART;VALUE=DATE:{start.strftime('%Y%m%d')}"]
+            else:
+                lines += [_format_time('DTSTART', start, zone), _format_time('DTEND', end, zone)]
+
+                if rng.random() < RECURRING_SHARE:
+                    skipped = start + timedelta(weeks=rng.randint(1, 4))
+                    lines += [f"RRULE:FREQ=WEEKLY;COUNT={rng.randint(5, 15)}",
+                              _format_time('EXDATE', skipped, zone)]
+
+            lines += [
+                f"LOCATION:Building {rng.randint(1, 40)}, Room {rng.randint(1, 300)}",
+                _fold('DESCRIPTION:' + 'Synthetic event used for benchmarking the calendar reader. ' * 2),
+                'BEGIN:VALARM', 'TRIGGER:-PT10M', 'ACTION:DISPLAY', 'END:VALARM',
+                'END:VEVENT'
+            ]
+            f.write('\r\n'.join(lines))
+            f.write('\r\n')
+
+        f.write('END:VCALENDAR\r\n')
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process so far, in MB (None if unknown)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def _measure(operation, repeats, items_per_call=1):
+    """Run an operation several times and summarise latency, throughput and RSS growth"""
+    rss_before = _peak_rss_mb()
+    latencies = []
+
+    with redirect_stdout(io.StringIO()):
+        for _ in range(repeats):
+            started = time.perf_counter()
+            operation()
+            latencies.append(time.perf_counter() - started)
+
+    latencies.sort()
+    total = sum(latencies)
+    rss_after = _peak_rss_mb()
+
+    return {
+        'calls': repeats,
+        'throughput': (repeats * items_per_call) / total if total else float('inf'),
+        'p50_ms': _percentile(latencies, 0.50) * 1000,
+        'p95_ms': _percentile(latencies, 0.95) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': rss_after,
+        'rss_growth_mb': (rss_after - rss_before) if rss_after is not None else None
+    }
+
+
+def run_size(n_events, seed=42):
+    """Benchmark every operation against one synthetic calendar (runs in its own process)"""
+    results = {}
+    anchor = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'calendar.ics')
+        generate_synthetic_ics(path, n_events, seed=seed, anchor=anchor)
+        parse_repeats = max(1, min(20, 20000 // n_events))
+
+        results['load_calendar'] = _measure(
+            lambda: CalendarReader(path, use_cache=False).load_calendar(),
+            parse_repeats, items_per_call=n_events
+        )
+
+        # Prime the on-disk cache, then time cache hits
+        with redirect_stdout(io.StringIO()):
+            CalendarReader(path).load_calendar()
+        results['load_calendar_cached'] = _measure(
+            lambda: CalendarReader(path).load_calendar(),
+            parse_repeats, items_per_call=n_events
+        )
+
+        reader = CalendarReader(path, use_cache=False)
+        with redirect_stdout(io.StringIO()):
+            reader.load_calendar()
+
+        rng = random.Random(seed)
+        query_dates = iter([
+            anchor + timedelta(days=rng.randint(-HORIZON_DAYS_BEFORE, HORIZON_DAYS_AFTER))
+            for _ in range(QUERY_DATES)
+        ])
+        results['get_events_for_date'] = _measure(
+            lambda: reader.get_events_for_date(next(query_dates)), QUERY_DATES
+        )
+
+        results['get_week_summary'] = _measure(reader.get_week_summary, 50)
+
+        semester_end = anchor + timedelta(days=120)
+        results['get_free_slots_semester'] = _measure(
+            lambda: reader.get_free_slots(anchor, semester_end), 5
+        )
+
+        planner = StudyPlanner(target_date=semester_end.strftime('%Y-%m-%d'))
+        results['calculate_available_time'] = _measure(
+            lambda: planner.calculate_available_time(reader), 5
+        )
+
+    return results
+
+
+def run_benchmarks(sizes, seed=42):
+    """Run each size in a fresh process so peak RSS isn't inherited from smaller runs"""
+    all_results = {}
+    for n_events in sizes:
+        print(f"⏱️  Benchmarking {n_events:,} events...", flush=True)
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            all_results[str(n_events)] = pool.submit(run_size, n_events, seed).result()
+    return all_results
+
+
+def display_results(all_results):
+    """Print one table per calendar size"""
+    for size, results in all_results.items():
+        print("\n" + "=" * 88)
+        print(f"{int(size):,} EVENTS")
+        print("=" * 88)
+        print(f"{'operation':<26}{'throughput/s':>14}{'p50 ms':>10}{'p95 ms':>10}"
+              f"{'p99 ms':>10}{'peak RSS MB':>13}")
+        print("-" * 88)
+
+        for name, stats in results.items():
+            rss = f"{stats['peak_rss_mb']:.1f}" if stats['peak_rss_mb'] is not None else 'n/a'
+            print(f"{name:<26}{stats['throughput']:>14,.0f}{stats['p50_ms']:>10.3f}"
+                  f"{stats['p95_ms']:>10.3f}{stats['p99_ms']:>10.3f}{rss:>13}")
+
+    print("=" * 88)
+
+
+def save_baseline(all_results, filename=BASELINE_FILE):
+    """Store results so later runs can be compared against them"""
+    baseline = {
+        'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'python': sys.version.split()[0],
+        'results': all_results
+    }
+    with open(filename, 'w') as f:
+        json.dump(baseline, f, indent=2)
+    print(f"\n💾 Baseline saved to {filename}")
+
+
+def compare_to_baseline(all_results, filename=BASELINE_FILE, tolerance=DEFAULT_TOLERANCE):
+    """Report operations whose p50 latency grew beyond the tolerance; returns the regressions"""
+    if not os.path.exists(filename):
+        print(f"\n⚠️  No baseline at {filename} - run with --save-baseline first")
+        return []
+
+    with open(filename, 'r') as f:
+        baseline = json.load(f)['results']
+
+    regressions = []
+    for size, results in all_results.items():
+        for name, stats in results.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous or previous['p50_ms'] <= 0:
+                continue
+
+            ratio = stats['p50_ms'] / previous['p50_ms']
+            if ratio > 1 + tolerance:
+                regressions.append((size, name, previous['p50_ms'], stats['p50_ms'], ratio))
+
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) vs baseline (tolerance {tolerance:.0%}):")
+        for size, name, before, after, ratio in regressions:
+            print(f"   {int(size):>9,} events  {name:<26} {before:.3f}ms → {after:.3f}ms  ({ratio:.2f}x)")
+    else:
+        print(f"\n✅ No regressions vs baseline (tolerance {tolerance:.0%})")
+
+    return regressions
+
+
+# Standalone usage
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark CalendarReader and StudyPlanner")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES,
+                        help="number of synthetic events per run")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for the generator")
+    parser.add_argument('--save-baseline', action='store_true', help=f"write results to {BASELINE_FILE}")
+    parser.add_argument('--compare', action='store_true', help="compare against the saved baseline")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed p50 slowdown before a result counts as a regression")
+    args = parser.parse_args()
+
+    print("""
+╔════════════════════════════════════════════╗
+║   Calendar & Planner Benchmarks            ║
+╚════════════════════════════════════════════╝
+    """)
+
+    benchmark_results = run_benchmarks(args.sizes, seed=args.seed)
+    display_results(benchmark_results)
+
+    if args.save_baseline:
+        save_baseline(benchmark_results)
+
+    if args.compare and compare_to_baseline(benchmark_results, tolerance=args.tolerance):
+        sys.exit(1)
@@ -3,100 +3,1133 @@ Module 1: Calendar Reader
 Reads calendar events from ICS file and provides them to other modules
 """
 
-from datetime import datetime, timedelta
-from collections import defaultdict
-import re
+from datetime import datetime, timedelta, timezone
+from collections import defaultdict, OrderedDict
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+import calendar as cal
+import hashlib
+import heapq
+import mmap
+import os
+import pickle
+import sys
+import time
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+try:
+    import numpy as np
+except ImportError:  # Columnar views fall back to plain Python lists
+    np = None
+
+# Bump whenever the shape of the cached events changes
+CACHE_VERSION = 6
+
+# Properties that may appear more than once in a VEVENT and must be combined
+MULTI_VALUE_PROPERTIES = {'EXDATE'}
+
+WEEKDAY_CODES = {'MO': 0, 'TU': 1, 'WE': 2, 'TH': 3, 'FR': 4, 'SA': 5, 'SU': 6}
+
+# Max number of (rule, window) expansions kept in memory
+OCCURRENCE_CACHE_SIZE = 2048
+
+# Outlook exports use Windows zone names in TZID
+WINDOWS_ZONES = {
+    'GMT Standard Time': 'Europe/London',
+    'Greenwich Standard Time': 'Atlantic/Reykjavik',
+    'W. Europe Standard Time': 'Europe/Berlin',
+    'Romance Standard Time': 'Europe/Paris',
+    'Central Europe Standard Time': 'Europe/Budapest',
+    'Central European Standard Time': 'Europe/Warsaw',
+    'E. Europe Standard Time': 'Europe/Chisinau',
+    'FLE Standard Time': 'Europe/Kiev',
+    'South Africa Standard Time': 'Africa/Johannesburg',
+    'E. Africa Standard Time': 'Africa/Nairobi',
+    'W. Central Africa Standard Time': 'Africa/Lagos',
+    'India Standard Time': 'Asia/Kolkata',
+    'China Standard Time': 'Asia/Shanghai',
+    'Singapore Standard Time': 'Asia/Singapore',
+    'Tokyo Standard Time': 'Asia/Tokyo',
+    'AUS Eastern Standard Time': 'Australia/Sydney',
+    'Eastern Standard Time': 'America/New_York',
+    'Central Standard Time': 'America/Chicago',
+    'Mountain Standard Time': 'America/Denver',
+    'Pacific Standard Time': 'America/Los_Angeles',
+    'UTC': 'UTC',
+}
+
+# Max threads used to load several calendar files at once
+MAX_LOADER_THREADS = 8
+
+# Files smaller than this are parsed on one core even in parallel mode
+PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+# Chunks per worker process, so uneven chunks still balance out
+CHUNKS_PER_WORKER = 4
+
+# Give up on a rule that produces nothing in this many periods (e.g. malformed BYDAY)
+MAX_EMPTY_PERIODS = 10000
+
+# TZIDs already reported as unresolvable, so each is only warned about once
+_unresolved_zones = set()
+
+
+@lru_cache(maxsize=None)
+def lookup_zone(name):
+    """Resolve an IANA or Windows zone name to a tzinfo (None if unknown)"""
+    candidates = [name, WINDOWS_ZONES.get(name)]
+
+    # Some exporters prefix the zone with a path, e.g. /mozilla.org/20050126_1/Europe/London
+    parts = name.strip('/').split('/')
+    candidates += ['/'.join(parts[i:]) for i in range(1, len(parts))]
+
+    for candidate in candidates:
+        if not candidate:
+            continue
+        try:
+            return ZoneInfo(candidate)
+        except (ZoneInfoNotFoundError, ValueError, OSError):
+            continue
+    return None
+
+
+def _warn_unresolved_zone(tzid, fallback):
+    """Print once per TZID that its events won't follow the zone's real rules"""
+    if tzid in _unresolved_zones:
+        return
+    _unresolved_zones.add(tzid)
+    print(f"⚠️  Unknown time zone '{tzid}': {fallback}. "
+          f"Install the tzdata package (pip install tzdata) if this is a real zone.")
+
+
+@lru_cache(maxsize=8192)
+def _local_shift(zone, year, month, day, hour):
+    """Offset that turns a wall-clock time in zone into local wall-clock time"""
+    moment = datetime(year, month, day, hour, tzinfo=zone)
+    return moment.astimezone().replace(tzinfo=None) - moment.replace(tzinfo=None)
+
+
+def _to_local(value, zone):
+    """Turn a wall-clock time in zone into local wall-clock time (None zone = already local)"""
+    if value is None or zone is None:
+        return value
+    return value + _local_shift(zone, value.year, value.month, value.day, value.hour)
+
+
+def _parse_utc_offset(value):
+    """Parse a TZOFFSETTO value like +0100 or -053000 into a timedelta"""
+    sign = -1 if value.startswith('-') else 1
+    digits = value.lstrip('+-')
+    seconds = int(digits[0:2]) * 3600 + int(digits[2:4]) * 60 + int(digits[4:6] or 0)
+    return timedelta(seconds=sign * seconds)
+
+
+def _decode_lines(data):
+    """Split raw ICS bytes into lines the same way text-mode file iteration does"""
+    text = data.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n')
+    return text.split('\n')
+
+
+def _parse_ics_chunk(calendar_file, start, end, vtimezones):
+    """
+    Process-pool worker: parse the VEVENTs in one byte range of a calendar file
+    vtimezones holds the VTIMEZONE definitions that appear before the range
+    """
+    reader = CalendarReader(calendar_file, use_cache=False)
+    reader._vtimezones = dict(vtimezones)
+
+    with open(calendar_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        lines = _decode_lines(mapped[start:end])
+
+    events = list(reader._iter_events(lines))
+    events.sort(key=lambda x: x.start)
+    return events
+
+
+class Event:
+    """
+    Compact calendar event
+    Slotted to keep large calendars small; dict-style access (event['title'],
+    event.get('end')) still works for older callers
+    """
+
+    __slots__ = ('title', 'start', 'end', 'location', 'uid', 'rrule', 'exdates', 'recurrence_id',
+                 'all_day', 'sequence', 'zone', 'zone_start')
+
+    def __init__(self, title, start, end=None, location='', uid='',
+                 rrule=None, exdates=None, recurrence_id=None, all_day=False, sequence=0,
+                 zone=None, zone_start=None):
+        self.title = title
+        self.start = start
+        self.end = end
+        self.location = location
+        self.uid = uid
+        self.rrule = rrule
+        self.exdates = exdates
+        self.recurrence_id = recurrence_id
+        self.all_day = all_day
+        self.sequence = sequence
+
+        # Recurring masters with a TZID/UTC DTSTART: the zone the rule repeats in
+        # and DTSTART as written in it (start itself is local time)
+        self.zone = zone
+        self.zone_start = zone_start
+
+    def __getitem__(self, key):
+        value = getattr(self, key) if key in Event.__slots__ else None
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = getattr(self, key) if key in Event.__slots__ else None
+        return default if value is None else value
+
+    def __contains__(self, key):
+        return key in Event.__slots__ and getattr(self, key) is not None
+
+    def _fields(self):
+        return tuple(getattr(self, name) for name in Event.__slots__)
+
+    def __eq__(self, other):
+        if not isinstance(other, Event):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def __repr__(self):
+        return f"Event({self.title!r}, {self.start!r}, {self.end!r})"
+
+    def occurrence_at(self, start):
+        """Single occurrence of this (recurring) event starting at the given time"""
+        end = start + (self.end - self.start) if self.end else None
+        return Event(self.title, start, end, self.location, self.uid,
+                     all_day=self.all_day, sequence=self.sequence)
+
+    def key(self):
+        """Identity used to match an event across reloads (UID + RECURRENCE-ID when present)"""
+        if self.uid:
+            return (self.uid, self.recurrence_id)
+        return ('', self.title, self.start, self.end, self.location)
+
+
+class EventColumns:
+    """
+    Columnar view over a list of events for vectorized aggregates
+    Starts/ends are NumPy datetime64 arrays when NumPy is installed, plain lists otherwise.
+    All-day events count as zero hours, like events without an end.
+    """
+
+    def __init__(self, events):
+        self.titles = [event.title for event in events]
+        self.locations = [event.location for event in events]
+        ends = [event.start if event.all_day or not event.end else event.end for event in events]
+
+        if np is not None:
+            self.starts = np.array([event.start for event in events], dtype='datetime64[s]')
+            self.ends = np.array(ends, dtype='datetime64[s]')
+        else:
+            self.starts = [event.start for event in events]
+            self.ends = ends
+
+    def __len__(self):
+        return len(self.titles)
+
+    def durations_hours(self):
+        """Duration of each event in hours (0 for events without an end)"""
+        if np is not None:
+            return (self.ends - self.starts).astype('int64') / 3600
+        return [(end - start).total_seconds() / 3600 for start, end in zip(self.starts, self.ends)]
+
+    def total_hours(self):
+        """Sum of all event durations in hours"""
+        if np is not None:
+            return float(self.durations_hours().sum())
+        return sum(self.durations_hours())
+
+    def count_titles(self, classify):
+        """
+        Count events per category
+        classify runs once per distinct (interned) title, not once per event
+        """
+        categories = {title: classify(title) for title in set(self.titles)}
+        counts = defaultdict(int)
+
+        if np is not None and self.titles:
+            labels = sorted(set(categories.values()))
+            codes = {label: i for i, label in enumerate(labels)}
+            title_codes = np.fromiter((codes[categories[t]] for t in self.titles),
+                                      dtype=np.int64, count=len(self.titles))
+            for label, count in zip(labels, np.bincount(title_codes, minlength=len(labels))):
+                counts[label] = int(count)
+            return counts
+
+        for title in self.titles:
+            counts[categories[title]] += 1
+        return counts
 
 
 class CalendarReader:
     """Handles reading and parsing calendar events from ICS files"""
 
-    def __init__(self, calendar_file='calendar.ics'):
-        self.calendar_file = calendar_file
+    def __init__(self, calendar_file='calendar.ics', use_cache=True, parallel=False, workers=None):
+        # One path or a list of paths (lectures, labs, work shifts, ...)
+        if isinstance(calendar_file, (str, os.PathLike)):
+            self.calendar_files = [calendar_file]
+        else:
+            self.calendar_files = list(calendar_file)
+        self.calendar_file = self.calendar_files[0]
+        self.use_cache = use_cache
+
+        # Memory-map large exports and parse them on a process pool
+        self.parallel = parallel
+        self.workers = workers or os.cpu_count() or 1
         self.all_events = []
+        self._single_events = []
+        self._start_index = []
+        self._recurring_events = []
+        self._recurring_ends = []
+        self._overridden_starts = defaultdict(set)
+        self._indexed_count = 0
+        self._max_duration = timedelta(0)
+        self._rrule_cache = {}
+        self._series_ends = {}
+        self._occurrence_cache = OrderedDict()
+        self._vtimezones = {}
+        self._zone_cache = {}
 
     def load_calendar(self):
-        """Load and parse the ICS calendar file"""
-        try:
-            with open(self.calendar_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+        """Load and parse the ICS calendar file(s) into one unified index"""
+        loaded = self._load_all_sources()
+        if not loaded:
+            return False
+
+        self.all_events = self._merge_sources(loaded)
+        self._build_index()
+
+        if len(self.calendar_files) > 1:
+            print(f"✅ Merged {len(self.all_events)} events from {len(loaded)} calendars")
+        return True
+
+    def reload_calendar(self):
+        """
+        Re-read the calendar file(s) and apply only what changed to the index
+        Events are matched by UID/RECURRENCE-ID and compared by SEQUENCE and content.
+        Returns {'added': [...], 'removed': [...], 'changed': [(old, new), ...]},
+        or None if nothing could be read (the current index is kept).
+        """
+        loaded = self._load_all_sources()
+        if not loaded:
+            return None
+
+        if self._indexed_count != len(self.all_events):
+            self._build_index()
+
+        old_events = {event.key(): event for event in self.all_events}
+        new_events = {event.key(): event for event in self._merge_sources(loaded)}
+
+        diff = {'added': [], 'removed': [], 'changed': []}
+        for key, event in new_events.items():
+            old = old_events.get(key)
+            if old is None:
+                diff['added'].append(event)
+            elif event.sequence != old.sequence or event != old:
+                diff['changed'].append((old, event))
+
+        diff['removed'] = [event for key, event in old_events.items() if key not in new_events]
+
+        for event in diff['removed'] + [old for old, _ in diff['changed']]:
+            self._remove_indexed_event(event)
+        for event in diff['added'] + [new for _, new in diff['changed']]:
+            self._insert_indexed_event(event)
+
+        # Drop memoized expansions of any series that was touched
+        touched_uids = {event.uid for event in diff['added'] + diff['removed']}
+        touched_uids.update(new.uid for _, new in diff['changed'])
+        for cache_key in [k for k in self._occurrence_cache if k[0] in touched_uids]:
+            del self._occurrence_cache[cache_key]
+
+        self._indexed_count = len(self.all_events)
+        return diff
 
-            self.all_events = self._parse_ics_content(content)
-            print(f"✅ Loaded {len(self.all_events)} events from {self.calendar_file}")
-            return True
+    def _load_all_sources(self):
+        """Load every source (concurrently when there are several); returns the lists that loaded"""
+        if len(self.calendar_files) == 1:
+            results = [self._load_source_safely(self.calendar_file)]
+        else:
+            workers = min(len(self.calendar_files), MAX_LOADER_THREADS)
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(self._load_source_safely, self.calendar_files))
+
+        return [events for events in results if events is not None]
+
+    def _load_source_safely(self, calendar_file):
+        """Load one source, reporting errors instead of raising (None on failure)"""
+        try:
+            events, from_cache = self._load_source(calendar_file)
+            cached_note = " (cached)" if from_cache else ""
+            print(f"✅ Loaded {len(events)} events from {calendar_file}{cached_note}")
+            return events
 
         except FileNotFoundError:
-            print(f"❌ File '{self.calendar_file}' not found!")
-            return False
+            print(f"❌ File '{calendar_file}' not found!")
+            return None
 
         except Exception as e:
             print(f"❌ Error reading calendar: {e}")
-            return False
+            return None
+
+    def _load_source(self, calendar_file):
+        """Parse one ICS file (or reuse its cache); returns (events sorted by start, from_cache)"""
+        file_stat = os.stat(calendar_file)
+
+        cached_events = self._load_cache(calendar_file, file_stat) if self.use_cache else None
+        if cached_events is not None:
+            return cached_events, True
+
+        if self.parallel and self.workers > 1 and file_stat.st_size >= PARALLEL_MIN_BYTES:
+            events = self._parse_parallel(calendar_file)
+        else:
+            # A parser of its own, so one file's VTIMEZONEs never resolve another file's TZIDs
+            parser = CalendarReader(calendar_file, use_cache=False)
+            with open(calendar_file, 'r', encoding='utf-8') as f:
+                events = list(parser._iter_events(f))
+            events.sort(key=lambda x: x.start)
+
+        if self.use_cache:
+            self._save_cache(calendar_file, file_stat, events)
+
+        return events, False
+
+    def _parse_parallel(self, calendar_file):
+        """
+        Parse a large file on a process pool
+        The memory-mapped file is cut at BEGIN:VEVENT boundaries, each worker parses
+        its byte range, and the sorted chunks are merged back in file order, so the
+        result is identical to the single-process parser
+        """
+        with open(calendar_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            ranges = self._chunk_ranges(mapped, self.workers * CHUNKS_PER_WORKER)
+            timezone_snapshots = self._scan_vtimezones(mapped)
+
+        jobs = []
+        for start, end in ranges:
+            known_zones = {}
+            for position, snapshot in timezone_snapshots:
+                if position >= start:
+                    break
+                known_zones = snapshot
+            jobs.append((start, end, known_zones))
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            futures = [pool.submit(_parse_ics_chunk, calendar_file, start, end, zones)
+                       for start, end, zones in jobs]
+            chunks = [future.result() for future in futures]
+
+        return list(heapq.merge(*chunks, key=lambda x: x.start))
+
+    def _chunk_ranges(self, mapped, chunk_count):
+        """Split a mapped file into byte ranges that each start on a BEGIN:VEVENT line"""
+        size = len(mapped)
+        boundaries = [0]
+
+        for i in range(1, chunk_count):
+            position = mapped.find(b'\nBEGIN:VEVENT', max(size * i // chunk_count, boundaries[-1]))
+            if position == -1:
+                break
+            if position + 1 > boundaries[-1]:
+                boundaries.append(position + 1)
+
+        boundaries.append(size)
+        return list(zip(boundaries, boundaries[1:]))
+
+    def _scan_vtimezones(self, mapped):
+        """
+        Find every VTIMEZONE block in a mapped file
+        Returns (position, definitions known up to that block) pairs so each chunk
+        sees exactly the zones a sequential parse would have seen
+        """
+        snapshots = []
+        probe = CalendarReader(self.calendar_file, use_cache=False)
+        position = mapped.find(b'\nBEGIN:VTIMEZONE')
+
+        while position != -1:
+            end = mapped.find(b'\nEND:VTIMEZONE', position)
+            if end == -1:
+                break
+
+            block_lines = list(probe._unfold_lines(_decode_lines(mapped[position + 1:end])))
+            probe._register_vtimezone(block_lines[1:])
+            snapshots.append((position + 1, dict(probe._vtimezones)))
+            position = mapped.find(b'\nBEGIN:VTIMEZONE', end)
+
+        return snapshots
+
+    def _merge_sources(self, sources):
+        """
+        k-way merge of already-sorted event lists
+        Events sharing a UID and RECURRENCE-ID are the same event exported twice;
+        the first one wins, whether the copies come from one file or several
+        """
+        merged = []
+        seen = set()
+        for event in heapq.merge(*sources, key=lambda x: x.start):
+            if event.uid:
+                key = (event.uid, event.recurrence_id)
+                if key in seen:
+                    continue
+                seen.add(key)
+            merged.append(event)
+
+        return merged
+
+    def _hash_file(self, calendar_file):
+        """Hash the calendar file contents in chunks"""
+        digest = hashlib.blake2b(digest_size=16)
+        with open(calendar_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _cache_path(self, calendar_file):
+        """Cache file that sits next to a calendar file"""
+        return f"{calendar_file}.cache"
+
+    def _load_cache(self, calendar_file, file_stat):
+        """
+        Return cached events if the cache still matches the calendar file
+        Size must match; an unchanged mtime is trusted, otherwise the content
+        hash decides (so a touched-but-identical file stays cached)
+        """
+        try:
+            with open(self._cache_path(calendar_file), 'rb') as f:
+                cache = pickle.load(f)
+        except Exception:
+            return None
+
+        if cache.get('version') != CACHE_VERSION or cache.get('size') != file_stat.st_size:
+            return None
+
+        # Times are stored converted to local time, so a zone change invalidates them
+        if cache.get('local_zone') != time.tzname:
+            return None
+
+        if cache.get('mtime_ns') != file_stat.st_mtime_ns:
+            if cache.get('hash') != self._hash_file(calendar_file):
+                return None
+            cache['mtime_ns'] = file_stat.st_mtime_ns
+            self._write_cache(calendar_file, cache)
+
+        return cache['events']
+
+    def _save_cache(self, calendar_file, file_stat, events):
+        """Save parsed events so an unchanged calendar skips parsing next time"""
+        self._write_cache(calendar_file, {
+            'version': CACHE_VERSION,
+            'size': file_stat.st_size,
+            'mtime_ns': file_stat.st_mtime_ns,
+            'hash': self._hash_file(calendar_file),
+            'local_zone': time.tzname,
+            'events': events
+        })
+
+    def _write_cache(self, calendar_file, cache):
+        """Atomically write the cache file, ignoring failures"""
+        cache_file = self._cache_path(calendar_file)
+        temp_file = f"{cache_file}.tmp"
+        try:
+            with open(temp_file, 'wb') as f:
+                pickle.dump(cache, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            print(f"⚠️  Could not write calendar cache: {e}")
 
     def _parse_ics_content(self, content):
         """Parse ICS content and extract events"""
-        events = []
-        event_blocks = content.split('BEGIN:VEVENT')
+        return list(self._iter_events(content.splitlines()))
+
+    def _unfold_lines(self, lines):
+        """
+        Yield logical ICS lines from raw lines
+        RFC 5545 folds long lines with CRLF + a single space or tab, so a line
+        starting with whitespace continues the previous one
+        """
+        current = None
+
+        for raw_line in lines:
+            line = raw_line.rstrip('\r\n')
+            if not line:
+                continue
 
-        for block in event_blocks[1:]:
-            if 'END:VEVENT' not in block:
+            if line[0] in ' \t':
+                if current is not None:
+                    current += line[1:]
                 continue
 
-            event = self._extract_event_data(block)
-            if event and 'title' in event and 'start' in event:
-                events.append(event)
+            if current is not None:
+                yield current
+            current = line
+
+        if current is not None:
+            yield current
 
-        return events
+    def _iter_events(self, lines):
+        """Stream events one at a time from an iterable of raw ICS lines"""
+        properties = None
+        nested_depth = 0
+        timezone_lines = None
+
+        for line in self._unfold_lines(lines):
+            if line == 'BEGIN:VEVENT':
+                properties = {}
+                nested_depth = 0
+                continue
+
+            if properties is None:
+                # Remember VTIMEZONE blocks so TZIDs resolve once per zone, not per event
+                if line == 'BEGIN:VTIMEZONE':
+                    timezone_lines = []
+                elif line == 'END:VTIMEZONE' and timezone_lines is not None:
+                    self._register_vtimezone(timezone_lines)
+                    timezone_lines = None
+                elif timezone_lines is not None:
+                    timezone_lines.append(line)
+                continue
+
+            if line == 'END:VEVENT':
+                event = self._build_event(properties)
+                if event:
+                    yield event
+                properties = None
+                continue
+
+            # Skip properties of nested components such as VALARM
+            if line.startswith('BEGIN:'):
+                nested_depth += 1
+                continue
+            if line.startswith('END:'):
+                nested_depth -= 1
+                continue
+            if nested_depth:
+                continue
+
+            self._add_property(properties, line)
+
+    def _add_property(self, properties, line):
+        """Split a content line into name, parameters and value and store it"""
+        head, sep, value = line.partition(':')
+        if not sep:
+            return
+
+        name, _, params = head.partition(';')
+        name = name.upper()
+
+        if name in MULTI_VALUE_PROPERTIES and name in properties:
+            previous_params, previous_value = properties[name]
+            properties[name] = (previous_params, f"{previous_value},{value}")
+        else:
+            properties.setdefault(name, (params, value))
+
+    def _register_vtimezone(self, lines):
+        """Store the parts of a VTIMEZONE definition needed to resolve its TZID"""
+        definition = {'location': None, 'standard_offset': None}
+        tzid = None
+        section = None
+
+        for line in lines:
+            name, _, value = line.partition(':')
+            name = name.split(';')[0].upper()
+
+            if name == 'BEGIN':
+                section = value
+            elif name == 'END':
+                section = None
+            elif name == 'TZID' and section is None:
+                tzid = value.strip()
+            elif name == 'X-LIC-LOCATION':
+                definition['location'] = value.strip()
+            elif name == 'TZOFFSETTO' and section == 'STANDARD':
+                try:
+                    definition['standard_offset'] = _parse_utc_offset(value.strip())
+                except ValueError:
+                    pass
+
+        if tzid:
+            self._vtimezones[tzid] = definition
+            self._zone_cache.pop(tzid, None)
+
+    def _resolve_zone(self, tzid):
+        """
+        Resolve a TZID once and remember it
+        Tries the name itself (IANA or Windows), then the VTIMEZONE's X-LIC-LOCATION,
+        then falls back to the VTIMEZONE's fixed standard offset; the fallbacks
+        print a warning once per TZID (usually tzdata missing on Windows)
+        """
+        if tzid in self._zone_cache:
+            return self._zone_cache[tzid]
+
+        zone = lookup_zone(tzid)
+        definition = self._vtimezones.get(tzid)
+
+        if zone is None and definition:
+            if definition['location']:
+                zone = lookup_zone(definition['location'])
+            if zone is None and definition['standard_offset'] is not None:
+                zone = timezone(definition['standard_offset'])
+                _warn_unresolved_zone(tzid, f"using its fixed offset {zone}, without daylight saving")
+
+        if zone is None:
+            _warn_unresolved_zone(tzid, "its events are read as local time")
+
+        self._zone_cache[tzid] = zone
+        return zone
 
     def _extract_event_data(self, block):
         """Extract event data from VEVENT block"""
-        event = {}
+        properties = {}
+        for line in self._unfold_lines(block.splitlines()):
+            if line.startswith('END:VEVENT'):
+                break
+            self._add_property(properties, line)
 
-        # Extract SUMMARY (title)
-        summary_match = re.search(r'SUMMARY:(.+?)(?:\n[A-Z]|\nEND:VEVENT)', block, re.DOTALL)
-        if summary_match:
-            event['title'] = summary_match.group(1).strip().replace('\n ', '')
+        return self._build_event(properties)
 
-        # Extract DTSTART (start time)
-        dtstart_match = re.search(r'DTSTART[^:]*:(\d{8}T\d{6})', block)
-        if dtstart_match:
-            event['start'] = self._parse_datetime(dtstart_match.group(1))
+    def _build_event(self, properties):
+        """Build an Event from the parsed properties of one VEVENT (None without a title or start)"""
+        # Extract SUMMARY (title) and DTSTART (start time)
+        if 'SUMMARY' not in properties or 'DTSTART' not in properties:
+            return None
+
+        start_params, start_value = properties['DTSTART']
+        zone_start, zone = self._parse_wall_clock(start_value, start_params)
+        start = _to_local(zone_start, zone)
+        if not start:
+            return None
+
+        event = Event(sys.intern(properties['SUMMARY'][1].strip()), start)
+        event.all_day = 'T' not in start_value
 
-        # Extract DTEND (end time)
-        dtend_match = re.search(r'DTEND[^:]*:(\d{8}T\d{6})', block)
-        if dtend_match:
-            event['end'] = self._parse_datetime(dtend_match.group(1))
+        # Extract DTEND (end time); all-day events without one last a single day
+        if 'DTEND' in properties:
+            event.end = self._parse_datetime(properties['DTEND'][1], properties['DTEND'][0])
+        elif event.all_day:
+            event.end = start + timedelta(days=1)
 
         # Extract LOCATION
-        location_match = re.search(r'LOCATION:(.+?)(?:\n[A-Z]|\nEND:VEVENT)', block, re.DOTALL)
-        if location_match:
-            event['location'] = location_match.group(1).strip().replace('\n ', '')
-        else:
-            event['location'] = ''
+        if 'LOCATION' in properties:
+            event.location = sys.intern(properties['LOCATION'][1].strip())
+
+        if 'UID' in properties:
+            event.uid = properties['UID'][1].strip()
+
+        if 'SEQUENCE' in properties:
+            try:
+                event.sequence = int(properties['SEQUENCE'][1])
+            except ValueError:
+                pass
+
+        # Recurrence: the master keeps its rule, overrides keep the start they replace
+        if 'RRULE' in properties:
+            event.rrule = properties['RRULE'][1].strip()
+            if zone is not None:
+                event.zone = zone
+                event.zone_start = zone_start
+            exdates = set()
+            if 'EXDATE' in properties:
+                exdate_params, exdate_values = properties['EXDATE']
+                for value in exdate_values.split(','):
+                    exdate = self._parse_datetime(value.strip(), exdate_params)
+                    if exdate:
+                        exdates.add(exdate)
+            event.exdates = exdates
+
+        if 'RECURRENCE-ID' in properties:
+            event.recurrence_id = self._parse_datetime(properties['RECURRENCE-ID'][1],
+                                                       properties['RECURRENCE-ID'][0])
 
         return event
 
-    def _parse_datetime(self, dt_string):
-        """Parse ICS datetime format: 20250922T110000 -> datetime object"""
+    def _parse_datetime(self, dt_string, params=''):
+        """
+        Parse ICS date/datetime values into naive local datetimes
+        20250922T110000 (floating), 20250922T100000Z (UTC),
+        TZID=Europe/London:20250922T110000 and VALUE=DATE 20250922 are supported.
+        """
+        return _to_local(*self._parse_wall_clock(dt_string, params))
+
+    def _parse_wall_clock(self, dt_string, params=''):
+        """
+        Parse an ICS date/datetime as written: (naive datetime, its zone or None)
+        Digits are sliced directly instead of going through strptime.
+        """
         try:
-            return datetime.strptime(dt_string, '%Y%m%dT%H%M%S')
-        except:
-            return None
+            year, month, day = int(dt_string[0:4]), int(dt_string[4:6]), int(dt_string[6:8])
+            if len(dt_string) < 15 or dt_string[8] != 'T':
+                return datetime(year, month, day), None
+
+            value = datetime(year, month, day, int(dt_string[9:11]), int(dt_string[11:13]), int(dt_string[13:15]))
+        except (ValueError, IndexError):
+            return None, None
+
+        if dt_string.endswith('Z'):
+            return value, timezone.utc
+        if 'TZID=' in params:
+            return value, self._resolve_zone(self._tzid_from_params(params))
+        return value, None
+
+    def _tzid_from_params(self, params):
+        """Extract the TZID parameter from a property's parameter string"""
+        for param in params.split(';'):
+            if param.upper().startswith('TZID='):
+                return param[5:].strip('"')
+        return ''
+
+    def _build_index(self):
+        """
+        Sort events by start time and keep a parallel list of starts for bisect lookups
+        Recurring masters are kept aside and expanded lazily per query window
+        """
+        self.all_events.sort(key=lambda x: x.start)
+        self._single_events = [e for e in self.all_events if e.rrule is None]
+        self._start_index = [event.start for event in self._single_events]
 
-    def get_events_for_date(self, date):
-        """Get all events for a specific date"""
-        date_str = date.strftime('%Y-%m-%d')
-        events = []
+        # Masters are sorted by the start of their last occurrence, so series that
+        # ended before a query window are skipped with one bisect
+        masters = sorted((e for e in self.all_events if e.rrule is not None), key=self._series_end)
+        self._recurring_events = masters
+        self._recurring_ends = [self._series_end(event) for event in masters]
+
+        # Occurrences replaced by a RECURRENCE-ID override must not be generated twice
+        self._overridden_starts = defaultdict(set)
+        for event in self._single_events:
+            if event.recurrence_id is not None:
+                self._overridden_starts[event.uid].add(event.recurrence_id)
+
+        # Longest event, so interval queries know how far back an overlapping event can start
+        self._max_duration = max((e.end - e.start for e in self.all_events if e.end and not e.all_day),
+                                 default=timedelta(0))
+
+        self._indexed_count = len(self.all_events)
+        self._occurrence_cache.clear()
+
+    def _sorted_position(self, events, start, after_equal=False):
+        """Binary search a start-sorted event list (bisect_left, or bisect_right with after_equal)"""
+        lo, hi = 0, len(events)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if events[mid].start < start or (after_equal and events[mid].start == start):
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _remove_sorted(self, events, event):
+        """Remove one event from a start-sorted list; returns its former position"""
+        i = self._sorted_position(events, event.start)
+        while i < len(events) and events[i] is not event:
+            i += 1
+        if i < len(events):
+            del events[i]
+            return i
+        return None
+
+    def _remove_indexed_event(self, event):
+        """Take one event out of the index without rebuilding it"""
+        self._remove_sorted(self.all_events, event)
+
+        if event.rrule is not None:
+            i = bisect_left(self._recurring_ends, self._series_end(event))
+            while i < len(self._recurring_events) and self._recurring_events[i] is not event:
+                i += 1
+            if i < len(self._recurring_events):
+                del self._recurring_events[i]
+                del self._recurring_ends[i]
+            return
+
+        position = self._remove_sorted(self._single_events, event)
+        if position is not None:
+            del self._start_index[position]
+        if event.recurrence_id is not None:
+            self._overridden_starts[event.uid].discard(event.recurrence_id)
+
+    def _insert_indexed_event(self, event):
+        """Add one event to the index without rebuilding it"""
+        self.all_events.insert(self._sorted_position(self.all_events, event.start, True), event)
+
+        if event.end and not event.all_day:
+            self._max_duration = max(self._max_duration, event.end - event.start)
+
+        if event.rrule is not None:
+            series_end = self._series_end(event)
+            position = bisect_right(self._recurring_ends, series_end)
+            self._recurring_events.insert(position, event)
+            self._recurring_ends.insert(position, series_end)
+            return
+
+        position = bisect_right(self._start_index, event.start)
+        self._single_events.insert(position, event)
+        self._start_index.insert(position, event.start)
+        if event.recurrence_id is not None:
+            self._overridden_starts[event.uid].add(event.recurrence_id)
+
+    def get_events_in_range(self, range_start, range_end):
+        """Get events starting in [range_start, range_end), already sorted by start"""
+        if self._indexed_count != len(self.all_events):
+            self._build_index()
+
+        lo = bisect_left(self._start_index, range_start)
+        hi = bisect_left(self._start_index, range_end, lo)
+        events = self._single_events[lo:hi]
+
+        if not self._recurring_events:
+            return events
+
+        streams = [events]
+        first = bisect_left(self._recurring_ends, range_start)
+        for event in self._recurring_events[first:]:
+            if event.start < range_end:
+                occurrences = self._get_occurrences(event, range_start, range_end)
+                if occurrences:
+                    streams.append(occurrences)
+
+        if len(streams) == 1:
+            return events
+
+        return list(heapq.merge(*streams, key=lambda x: x.start))
+
+    def _get_occurrences(self, event, range_start, range_end):
+        """Memoized expansion of one recurring event inside a query window"""
+        cache_key = (event.uid, event.start, event.rrule, range_start, range_end)
+
+        occurrences = self._occurrence_cache.get(cache_key)
+        if occurrences is not None:
+            self._occurrence_cache.move_to_end(cache_key)
+            return occurrences
+
+        occurrences = self._expand_recurrence(event, range_start, range_end)
+        self._occurrence_cache[cache_key] = occurrences
+        if len(self._occurrence_cache) > OCCURRENCE_CACHE_SIZE:
+            self._occurrence_cache.popitem(last=False)
+
+        return occurrences
+
+    def _parse_rrule(self, rule):
+        """Parse an RRULE value like FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20251212T000000Z"""
+        parsed = self._rrule_cache.get(rule)
+        if parsed is not None:
+            return parsed
+
+        parts = dict(part.split('=', 1) for part in rule.split(';') if '=' in part)
+
+        until = None
+        if 'UNTIL' in parts:
+            until_value = parts['UNTIL']
+            if len(until_value) == 8:
+                until_value += 'T235959'
+            until = self._parse_datetime(until_value)
+
+        by_day = []
+        for code in parts.get('BYDAY', '').split(','):
+            if code and code[-2:] in WEEKDAY_CODES:
+                ordinal = int(code[:-2]) if code[:-2] else 0
+                by_day.append((ordinal, WEEKDAY_CODES[code[-2:]]))
+
+        parsed = {
+            'freq': parts.get('FREQ', 'DAILY'),
+            'interval': max(int(parts.get('INTERVAL', 1)), 1),
+            'count': int(parts['COUNT']) if 'COUNT' in parts else None,
+            'until': until,
+            'until_utc': parts.get('UNTIL', '').endswith('Z'),
+            'by_day': by_day,
+            'by_month_day': [int(day) for day in parts.get('BYMONTHDAY', '').split(',') if day]
+        }
+        self._rrule_cache[rule] = parsed
+        return parsed
 
-        for event in self.all_events:
-            event_date_str = event['start'].strftime('%Y-%m-%d')
-            if event_date_str == date_str:
-                events.append(event)
+    def _series_end(self, event):
+        """
+        Start of the last occurrence a recurring event can have (datetime.max if unbounded)
+        UNTIL is used as is; a COUNT rule is walked from DTSTART once and remembered
+        """
+        cache_key = (event.start, event.rrule, event.zone)
+        series_end = self._series_ends.get(cache_key)
+        if series_end is not None:
+            return series_end
 
-        return sorted(events, key=lambda x: x['start'])
+        rule = self._parse_rrule(event.rrule)
+        series_end = rule['until'] or datetime.max
 
-    def get_events_for_week(self, start_date=None):
-        """Get all events for the current week (Sunday to Saturday)"""
+        # A floating UNTIL is in the same zone as DTSTART
+        if rule['until'] and not rule['until_utc']:
+            series_end = _to_local(rule['until'], event.zone)
+
+        if rule['count'] is not None:
+            starts = self._walk_count(rule, event, series_end)
+            series_end = starts[-1] if starts else event.start
+
+        self._series_ends[cache_key] = series_end
+        return series_end
+
+    def _walk_count(self, rule, event, until):
+        """The first COUNT occurrence starts (local time) of a series, stopping early at until"""
+        dtstart = event.zone_start if event.zone is not None else event.start
+        starts = []
+        period = 0
+        empty_periods = 0
+
+        while len(starts) < rule['count'] and empty_periods <= MAX_EMPTY_PERIODS:
+            candidates = self._period_candidates(rule, dtstart, period)
+            if candidates is None:
+                break
+
+            found = len(starts)
+            for wall_clock in candidates:
+                if wall_clock < dtstart:
+                    continue
+                start = _to_local(wall_clock, event.zone)
+                if start > until:
+                    return starts
+                starts.append(start)
+                if len(starts) == rule['count']:
+                    return starts
+
+            empty_periods = empty_periods + 1 if len(starts) == found else 0
+            period += 1
+
+        return starts
+
+    def _expand_recurrence(self, event, range_start, range_end):
+        """
+        Generate the occurrences of a recurring event that start inside a window
+        A zoned series repeats on its own zone's wall clock (so it follows that
+        zone's DST changes); each occurrence is turned into local time only then,
+        and compared with EXDATE/RECURRENCE-ID values converted the same way
+        """
+        rule = self._parse_rrule(event.rrule)
+        zone = event.zone
+        dtstart = event.zone_start if zone is not None else event.start
+        series_end = self._series_end(event)
+        excluded = event.exdates | self._overridden_starts.get(event.uid, set())
+
+        if series_end < range_start:
+            return []
+
+        # COUNT is folded into the series end, so every rule can jump straight to the window
+        window_start = range_start if zone is None else range_start.astimezone(zone).replace(tzinfo=None)
+        first_period = 0
+        if window_start > dtstart:
+            first_period = max(self._periods_between(rule, dtstart, window_start) - 1, 0)
+
+        occurrences = []
+        period = first_period
+
+        while True:
+            candidates = self._period_candidates(rule, dtstart, period)
+            if candidates is None:
+                break
+
+            for wall_clock in candidates:
+                if wall_clock < dtstart:
+                    continue
+                start = _to_local(wall_clock, zone)
+                if start > series_end or start >= range_end:
+                    return occurrences
+
+                if start >= range_start and start not in excluded:
+                    occurrences.append(event.occurrence_at(start))
+
+            period += 1
+            if period - first_period > MAX_EMPTY_PERIODS and not occurrences:
+                break
+
+        return occurrences
+
+    def _periods_between(self, rule, dtstart, moment):
+        """Number of whole recurrence periods between DTSTART and a later moment"""
+        freq = rule['freq']
+        if freq == 'DAILY':
+            elapsed = (moment - dtstart).days
+        elif freq == 'WEEKLY':
+            elapsed = (moment - dtstart).days // 7
+        elif freq == 'MONTHLY':
+            elapsed = (moment.year - dtstart.year) * 12 + moment.month - dtstart.month
+        else:
+            elapsed = moment.year - dtstart.year
+
+        return elapsed // rule['interval']
+
+    def _period_candidates(self, rule, dtstart, period):
+        """Sorted candidate starts for the n-th period of a rule (None = unsupported)"""
+        freq = rule['freq']
+        step = period * rule['interval']
+        start_time = dtstart.time()
+
+        if freq == 'DAILY':
+            return [dtstart + timedelta(days=step)]
+
+        if freq == 'WEEKLY':
+            week_start = dtstart - timedelta(days=dtstart.weekday()) + timedelta(weeks=step)
+            weekdays = sorted({weekday for _, weekday in rule['by_day']}) or [dtstart.weekday()]
+            return [week_start + timedelta(days=weekday) for weekday in weekdays]
+
+        if freq == 'MONTHLY':
+            month_index = dtstart.month - 1 + step
+            year, month = dtstart.year + month_index // 12, month_index % 12 + 1
+            days_in_month = cal.monthrange(year, month)[1]
+
+            if rule['by_day']:
+                days = []
+                for ordinal, weekday in rule['by_day']:
+                    if ordinal:
+                        days.append(self._nth_weekday(year, month, ordinal, weekday, days_in_month))
+                    else:
+                        first = self._nth_weekday(year, month, 1, weekday, days_in_month)
+                        days.extend(range(first, days_in_month + 1, 7))
+            else:
+                month_days = rule['by_month_day'] or [dtstart.day]
+                days = [day if day > 0 else days_in_month + day + 1 for day in month_days]
+
+            return [datetime.combine(datetime(year, month, day).date(), start_time)
+                    for day in sorted(set(days)) if day and 1 <= day <= days_in_month]
+
+        if freq == 'YEARLY':
+            year = dtstart.year + step
+            if dtstart.month == 2 and dtstart.day == 29 and not cal.isleap(year):
+                return []
+            return [dtstart.replace(year=year)]
+
+        return None
+
+    def _nth_weekday(self, year, month, ordinal, weekday, days_in_month):
+        """Day of month of the n-th weekday (negative ordinals count from the end)"""
+        first_weekday = datetime(year, month, 1).weekday()
+        first = 1 + (weekday - first_weekday) % 7
+
+        if ordinal > 0:
+            day = first + 7 * (ordinal - 1)
+        else:
+            last = first + 7 * ((days_in_month - first) // 7)
+            day = last + 7 * (ordinal + 1)
+
+        return day if 1 <= day <= days_in_month else None
+
+    def get_events_for_date(self, date, include_all_day=False):
+        """
+        Get all events for a specific date
+        All-day entries (holidays, deadlines) are left out unless include_all_day is set
+        """
+        day_start = datetime(date.year, date.month, date.day)
+        events = self.get_events_in_range(day_start, day_start + timedelta(days=1))
+        return events if include_all_day else [event for event in events if not event.all_day]
+
+    def get_events_for_week(self, start_date=None, include_all_day=False):
+        """
+        Get all events for the current week (Sunday to Saturday)
+        All-day entries are left out unless include_all_day is set
+        """
         if start_date is None:
             start_date = datetime.now()
 
@@ -108,12 +1141,92 @@ class CalendarReader:
         # Week ends on Saturday
         week_end = week_start + timedelta(days=7)
 
-        events = []
-        for event in self.all_events:
-            if week_start <= event['start'] < week_end:
-                events.append(event)
+        events = self.get_events_in_range(week_start, week_end)
+        return events if include_all_day else [event for event in events if not event.all_day]
+
+    def get_busy_intervals(self, range_start, range_end):
+        """
+        Merged busy intervals clipped to [range_start, range_end)
+        One sweep over the start-sorted events, so overlaps are only counted once.
+        All-day events are not treated as busy.
+        """
+        if self._indexed_count != len(self.all_events):
+            self._build_index()
+
+        busy = []
+        for event in self.get_events_in_range(range_start - self._max_duration, range_end):
+            # All-day entries (holidays, deadlines) don't block time
+            if not event.end or event.all_day or event.end <= range_start:
+                continue
+
+            start = max(event.start, range_start)
+            end = min(event.end, range_end)
+            if end <= start:
+                continue
+
+            if busy and start <= busy[-1][1]:
+                if end > busy[-1][1]:
+                    busy[-1][1] = end
+            else:
+                busy.append([start, end])
+
+        return [(start, end) for start, end in busy]
+
+    def get_free_slots(self, range_start, range_end, wake_time='07:00', sleep_time='00:00'):
+        """
+        Ordered free (start, end) slots inside the daily waking window
+        Works for any range in a single pass: busy intervals are merged once and
+        walked alongside the per-day windows. A sleep_time at or before wake_time
+        means the window runs past midnight.
+        """
+        wake = self._clock_offset(wake_time)
+        sleep = self._clock_offset(sleep_time)
+        if sleep <= wake:
+            sleep += timedelta(days=1)
+
+        busy = self.get_busy_intervals(range_start, range_end)
+        slots = []
+        i = 0
+
+        # Start a day early: yesterday's window may run past midnight into the range
+        day = datetime(range_start.year, range_start.month, range_start.day) - timedelta(days=1)
+
+        while day < range_end:
+            window_start = max(day + wake, range_start)
+            window_end = min(day + sleep, range_end)
+            day += timedelta(days=1)
 
-        return sorted(events, key=lambda x: x['start'])
+            if window_end <= window_start:
+                continue
+
+            while i < len(busy) and busy[i][1] <= window_start:
+                i += 1
+
+            cursor = window_start
+            j = i
+            while j < len(busy) and busy[j][0] < window_end:
+                if busy[j][0] > cursor:
+                    slots.append((cursor, busy[j][0]))
+                cursor = max(cursor, busy[j][1])
+                j += 1
+
+            if cursor < window_end:
+                slots.append((cursor, window_end))
+
+        return slots
+
+    def _clock_offset(self, clock):
+        """Convert an 'HH:MM' string to a timedelta since midnight"""
+        hours, minutes = clock.split(':')
+        return timedelta(hours=int(hours), minutes=int(minutes))
+
+    def get_columns_in_range(self, range_start, range_end):
+        """Columnar view of the events starting in [range_start, range_end)"""
+        return EventColumns(self.get_events_in_range(range_start, range_end))
+
+    def get_columns_for_date(self, date):
+        """Columnar view of all events for a specific date"""
+        return EventColumns(self.get_events_for_date(date))
 
     def get_events_by_date(self, days=7):
         """Get events grouped by date for the current week (Sunday-Saturday)"""
@@ -121,7 +1234,7 @@ class CalendarReader:
 
         events_by_date = defaultdict(list)
         for event in events:
-            date_key = event['start'].strftime('%Y-%m-%d')
+            date_key = event.start.strftime('%Y-%m-%d')
             events_by_date[date_key].append(event)
 
         return dict(events_by_date)
@@ -146,15 +1259,11 @@ class CalendarReader:
         # Assume working hours: 08:00 - 23:30 (15.5 hours available)
         total_available = 15.5
 
-        events = self.get_events_for_date(date)
+        day_start = datetime(date.year, date.month, date.day)
+        free_slots = self.get_free_slots(day_start, day_start + timedelta(days=1), '08:00', '23:30')
 
-        scheduled_hours = 0
-        for event in events:
-            if event.get('end'):
-                duration = (event['end'] - event['start']).total_seconds() / 3600
-                scheduled_hours += duration
-
-        free_hours = total_available - scheduled_hours
+        free_hours = sum((end - start).total_seconds() for start, end in free_slots) / 3600
+        scheduled_hours = total_available - free_hours
         return {
             'total_available': total_available,
             'scheduled': scheduled_hours,
@@ -164,36 +1273,28 @@ class CalendarReader:
     def get_week_summary(self):
         """Get summary statistics for the current week (Sunday-Saturday)"""
         week_range = self.get_current_week_range()
-        events = self.get_events_for_week()
-
-        total_hours = 0
-        lectures = 0
-        labs = 0
-        other = 0
-
-        for event in events:
-            if event.get('end'):
-                duration = (event['end'] - event['start']).total_seconds() / 3600
-                total_hours += duration
-
-            title_lower = event['title'].lower()
-            if 'lecture' in title_lower:
-                lectures += 1
-            elif 'lab' in title_lower:
-                labs += 1
-            else:
-                other += 1
+        columns = EventColumns(self.get_events_for_week())
+        counts = columns.count_titles(self._classify_title)
 
         return {
             'week_start': week_range['start_str'],
             'week_end': week_range['end_str'],
-            'total_events': len(events),
-            'total_hours': total_hours,
-            'lectures': lectures,
-            'labs': labs,
-            'other': other
+            'total_events': len(columns),
+            'total_hours': columns.total_hours(),
+            'lectures': counts['lecture'],
+            'labs': counts['lab'],
+            'other': counts['other']
         }
 
+    def _classify_title(self, title):
+        """Classify an event title as lecture, lab or other"""
+        title_lower = title.lower()
+        if 'lecture' in title_lower:
+            return 'lecture'
+        if 'lab' in title_lower:
+            return 'lab'
+        return 'other'
+
     def display_events(self, events=None, title="CALENDAR EVENTS"):
         """Display events in a formatted way"""
         if events is None:
@@ -208,7 +1309,7 @@ class CalendarReader:
         # Group by date
         events_by_date = defaultdict(list)
         for event in events:
-            date_key = event['start'].strftime('%Y-%m-%d')
+            date_key = event.start.strftime('%Y-%m-%d')
             events_by_date[date_key].append(event)
 
         print("=" * 70)
@@ -231,19 +1332,19 @@ class CalendarReader:
             print("-" * 70)
 
             for event in events_by_date[date]:
-                start_time = event['start'].strftime('%H:%M')
+                start_time = event.start.strftime('%H:%M')
 
-                if event.get('end'):
-                    end_time = event['end'].strftime('%H:%M')
-                    duration = (event['end'] - event['start']).total_seconds() / 3600
+                if event.end:
+                    end_time = event.end.strftime('%H:%M')
+                    duration = (event.end - event.start).total_seconds() / 3600
                     print(f"   {start_time} - {end_time}  ({duration:.1f}h)")
                 else:
                     print(f"   {start_time}")
 
-                print(f"   📌 {event['title']}")
+                print(f"   📌 {event.title}")
 
-                if event['location']:
-                    print(f"   📍 {event['location']}")
+                if event.location:
+                    print(f"   📍 {event.location}")
 
                 print()
 
@@ -0,0 +1,273 @@
+"""
+Module 5: Day Scheduler
+Builds the daily study schedule locally: study blocks are placed in the day's
+free calendar slots in a few milliseconds, with no API call
+"""
+
+from datetime import datetime, timedelta
+
+from study_planner import CAREER_SHARE
+
+# Study blocks are 1.5-2.5h long, 2h when the slot allows
+MIN_BLOCK_HOURS = 1.5
+MAX_BLOCK_HOURS = 2.5
+PREFERRED_BLOCK_HOURS = 2.0
+
+# Break between back-to-back blocks and after a calendar event
+BREAK_MINUTES = 20
+
+# Study happens between these times (start after 7am, end before 11:30pm)
+DAY_START = '08:00'
+DAY_END = '23:30'
+
+# Block starts and lengths are placed on a quarter-hour grid
+GRID_MINUTES = 15
+
+# How many prerequisite-ready topics a day can draw from
+CAREER_TOPIC_LOOKAHEAD = 6
+
+# Calendar titles containing these are MSc classes
+CLASS_KEYWORDS = ['lecture', 'lab', 'tutorial', 'seminar', 'workshop']
+
+# Default resources per curriculum skill
+SKILL_RESOURCES = {
+    'sql': "SQLBolt, Mode SQL Tutorial, LeetCode SQL 50",
+    'python': "Pandas documentation, Kaggle Learn (Pandas, Data Visualization)",
+    'powerbi': "Microsoft Learn Power BI learning path, Guy in a Cube",
+    'statistics': "Khan Academy Statistics, StatQuest videos",
+    'excel': "ExcelJet, Microsoft Excel training",
+    'projects': "Kaggle datasets, GitHub, your portfolio notes",
+    'interview_prep': "DataLemur, StrataScratch, Glassdoor interview questions",
+}
+
+
+def course_from_title(title):
+    """MSc course name from a class title like 'Research Methods; Lecture', or None"""
+    if not any(keyword in title.lower() for keyword in CLASS_KEYWORDS):
+        return None
+    return title.split(';')[0].strip() if ';' in title else title.strip()
+
+
+class CareerProgress:
+    """
+    Hours left per career topic, with a private copy of the planner's topic graph
+    Passing the same instance to DayScheduler.build for consecutive days makes
+    each day continue the topic queue where the previous day stopped
+    """
+
+    def __init__(self, planner):
+        self.graph = planner.topic_graph().copy()
+        self.hours_left = {}
+        self.started = set()
+        for skill_id in planner.curriculum:
+            for name, hours, started in planner._remaining_topics(skill_id):
+                self.hours_left[name] = hours
+                if started:
+                    self.started.add(name)
+
+    def next_topics(self, count=CAREER_TOPIC_LOOKAHEAD):
+        """[skill_id, topic, hours left, already started] for the next prerequisite-ready topics"""
+        return [[skill_id, name, self.hours_left.get(name, 0), name in self.started]
+                for skill_id, name in self.graph.next_eligible(count)]
+
+    def spend(self, name, hours):
+        """Count hours scheduled on a topic; a topic with none left is completed in the graph"""
+        self.hours_left[name] = self.hours_left.get(name, 0) - hours
+        self.started.add(name)
+        if self.hours_left[name] <= 1e-9:
+            self.graph.mark_completed(name)
+
+
+class DayScheduler:
+    """
+    Deterministic day scheduler
+    Fills the free slots with 1.5-2.5h blocks separated by breaks, keeps the
+    MSc/career split as close to 50/50 as the blocks allow, and takes career
+    topics from the planner's prerequisite graph. The result uses the same JSON
+    schema the LLM used to return, so an LLM can still enrich the text fields;
+    each block also carries the curriculum skill_id it counts towards (None for MSc).
+    """
+
+    def __init__(self, planner, msc_courses=None, day_start=DAY_START, day_end=DAY_END):
+        self.planner = planner
+        self.msc_courses = sorted(msc_courses or [])
+        self.day_start = day_start
+        self.day_end = day_end
+
+    def build(self, date, free_slots, study_hours, calendar_events=(), progress=None):
+        """
+        Schedule dict for a date from its free (start, end) slots and study-hour budget
+        progress (a CareerProgress) carries the topic queue over from an earlier
+        day planned ahead of this one; without it the planner's current progress is used
+        """
+        day = datetime(date.year, date.month, date.day)
+        window_start = day + self._clock(self.day_start)
+        window_end = day + self._clock(self.day_end)
+
+        grid = timedelta(minutes=GRID_MINUTES)
+        gap = timedelta(minutes=BREAK_MINUTES)
+        budget = int(max(study_hours, 0) * 60 // GRID_MINUTES) * GRID_MINUTES / 60
+        targets = {'msc': budget * (1 - CAREER_SHARE), 'career': budget * CAREER_SHARE}
+        placed = {'msc': 0.0, 'career': 0.0}
+
+        progress = progress or CareerProgress(self.planner)
+        career_topics = progress.next_topics()
+        msc_courses = self._msc_rotation(day, calendar_events)
+        sessions = []
+
+        for slot_start, slot_end in free_slots:
+            start = max(slot_start, window_start)
+            end = min(slot_end, window_end)
+
+            # Leave a break after whatever came before the slot
+            if start > window_start:
+                start += gap
+
+            while True:
+                start = self._round_up(start, day, grid)
+                remaining = budget - placed['msc'] - placed['career']
+                room = (end - start).total_seconds() / 3600
+                length = min(PREFERRED_BLOCK_HOURS, room, remaining)
+
+                # Stretch the block instead of leaving an unusable sliver of the slot
+                leftover = room - length - BREAK_MINUTES / 60
+                if 1e-9 < leftover < MIN_BLOCK_HOURS:
+                    length = min(MAX_BLOCK_HOURS, room, remaining)
+
+                # Whichever side is further behind its half gets the block
+                kind = 'msc' if targets['msc'] - placed['msc'] > targets['career'] - placed['career'] else 'career'
+                length = min(length, max(targets[kind] - placed[kind], MIN_BLOCK_HOURS))
+                length = int(length * 60 // GRID_MINUTES) * GRID_MINUTES / 60
+                if length < MIN_BLOCK_HOURS:
+                    break
+
+                block_end = start + timedelta(hours=length)
+                if kind == 'career':
+                    sessions.append(self._career_session(start, block_end, career_topics, progress))
+                else:
+                    msc_blocks = sum(1 for session in sessions if session['subject'].startswith('MSc'))
+                    sessions.append(self._msc_session(start, block_end, msc_courses, msc_blocks))
+                placed[kind] += length
+                start = block_end + gap
+
+        total = placed['msc'] + placed['career']
+        return {
+            'date': day.strftime('%Y-%m-%d'),
+            'summary': (f"{len(sessions)} study blocks around {len(calendar_events)} calendar events: "
+                        f"{placed['msc']:.1f}h MSc + {placed['career']:.1f}h Data Analyst prep"),
+            'total_study_hours': total,
+            'schedule': sessions
+        }
+
+    def replan(self, schedule, now, free_slots, study_hours, calendar_events=(), counted=()):
+        """
+        Rebuild the rest of a day's schedule from `now`, e.g. after a calendar change
+        Blocks that already ended are kept and their hours come off study_hours;
+        new blocks only go in the free time after now. Finished career blocks not
+        in `counted` (start times already in the planner's progress) are played
+        forward first, so the new blocks don't repeat their topics.
+        """
+        day = datetime(now.year, now.month, now.day)
+        finished = [session for session in schedule['schedule'] if day + self._clock(session['end_time']) <= now]
+        finished_hours = sum((self._clock(s['end_time']) - self._clock(s['start_time'])).total_seconds() / 3600
+                             for s in finished)
+
+        progress = CareerProgress(self.planner)
+        for session in finished:
+            if session.get('skill_id') and session['start_time'] not in counted:
+                hours = (self._clock(session['end_time']) - self._clock(session['start_time'])).total_seconds() / 3600
+                progress.spend(session['specific_topic'].removesuffix(" (continued)"), hours)
+
+        slots = [(max(start, now), end) for start, end in free_slots if end > now]
+        rest = self.build(day, slots, study_hours - finished_hours, calendar_events, progress=progress)
+        rest['summary'] = f"Replanned at {now.strftime('%H:%M')}: {rest['summary']}"
+        rest['total_study_hours'] += finished_hours
+        rest['schedule'] = finished + rest['schedule']
+        return rest
+
+    def _clock(self, hhmm):
+        """'HH:MM' -> offset from midnight"""
+        hours, minutes = hhmm.split(':')
+        return timedelta(hours=int(hours), minutes=int(minutes))
+
+    def _round_up(self, moment, day, grid):
+        """Round a time up to the next grid line"""
+        steps = -(-(moment - day) // grid)
+        return day + steps * grid
+
+    def _msc_rotation(self, day, calendar_events):
+        """
+        MSc courses in the order the day's MSc blocks should cover them
+        Today's classes come first (review while fresh), then the rest in a
+        rotation that shifts by one course per day
+        """
+        todays = []
+        for event in calendar_events:
+            course = course_from_title(event.title)
+            if course and course not in todays:
+                todays.append(course)
+
+        others = [course for course in self.msc_courses if course not in todays]
+        if others:
+            shift = day.toordinal() % len(others)
+            others = others[shift:] + others[:shift]
+        return [(course, True) for course in todays] + [(course, False) for course in others]
+
+    def _career_session(self, start, end, topics, progress):
+        """A career-prep block on the head of the topic queue"""
+        hours = (end - start).total_seconds() / 3600
+
+        if topics:
+            skill_id, name, _, continued = topics[0]
+            topic = f"{name} (continued)" if continued else name
+            progress.spend(name, hours)
+            topics[0][2] -= hours
+            topics[0][3] = True
+            if topics[0][2] <= 0:
+                topics.pop(0)
+            why_now = f"Next topic in your {self.planner.curriculum[skill_id]['name']} track - its prerequisites are done"
+        else:
+            skill_id = next(iter(self.planner.curriculum))
+            topic = "Review and practice problems"
+            why_now = "Everything scheduled so far is covered - consolidate with practice"
+
+        return {
+            'start_time': start.strftime('%H:%M'),
+            'end_time': end.strftime('%H:%M'),
+            'subject': self.planner.curriculum[skill_id]['name'],
+            'skill_id': skill_id,
+            'specific_topic': topic,
+            'study_guidance': [
+                f"Work through a tutorial or course section on {topic}",
+                "Practise on a real dataset or problem set, not just examples",
+                "Write down 3 takeaways and anything to revisit"
+            ],
+            'resources': SKILL_RESOURCES.get(skill_id, "Course notes and documentation"),
+            'why_now': why_now
+        }
+
+    def _msc_session(self, start, end, courses, index):
+        """An MSc block, rotating through the day's course order"""
+        if courses:
+            name, had_class = courses[index % len(courses)]
+            topic = f"Review today's {name} class" if had_class else f"{name} coursework and reading"
+            why_now = "Reviewing on the same day locks the class in" if had_class else "Keeps this module moving between classes"
+        else:
+            name = "Coursework"
+            topic = "MSc coursework and assignments"
+            why_now = "Protected time for your MSc"
+
+        return {
+            'start_time': start.strftime('%H:%M'),
+            'end_time': end.strftime('%H:%M'),
+            'subject': f"MSc: {name}",
+            'skill_id': None,
+            'specific_topic': topic,
+            'study_guidance': [
+                "Go through the lecture slides and fill gaps in your notes",
+                "Do the exercises or assignment work for this module",
+                "List questions to raise in the next class"
+            ],
+            'resources': "Lecture slides, module reading list",
+            'why_now': why_now
+        }
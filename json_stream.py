@@ -0,0 +1,157 @@
+"""
+Incremental JSON Parser
+Reads a JSON object as it streams in and hands back each element of one of its
+arrays (e.g. "schedule") the moment that element is complete
+"""
+
+import json
+import re
+
+# First non-space character after a position
+NEXT_CHAR = re.compile(r'\s*(\S)')
+
+
+class JSONStreamParser:
+    """
+    Incremental parser for an LLM response holding one JSON object
+    feed() takes text chunks and returns the elements of array_key that were
+    completed by that chunk. Anything before the first '{' (prose, code fences)
+    is skipped, and braces inside strings are handled, so a stray brace in the
+    text no longer breaks parsing: a '{' that can't open a JSON object is
+    ignored, and a candidate that closes but doesn't parse (or has no
+    array_key) is re-scanned from its next '{'. close() at the end of the
+    stream catches what is left, e.g. an unmatched '{"' in the prose. If the
+    stream stops early, every element that finished is still returned;
+    document is only set once the whole object closed.
+    """
+
+    def __init__(self, array_key='schedule'):
+        self.array_key = array_key
+        self.text = ''
+        self.document = None
+
+        self._emitted = set()       # text offsets of elements already handed out, so a re-scan doesn't repeat them
+        self._pos = 0
+        self._start = None          # index of the top-level '{'
+        self._stack = []            # open containers, '{' or '['
+        self._in_string = False
+        self._escaped = False
+        self._string_start = None
+        self._last_string = None    # most recent string at the top level, a candidate key
+        self._array_depth = None    # stack depth of the array being streamed
+        self._item_start = None
+
+    def feed(self, chunk):
+        """Consume more text; returns the array elements completed so far in this chunk"""
+        self.text += chunk
+        completed = []
+        text = self.text
+
+        while self._pos < len(text):
+            char = text[self._pos]
+            position = self._pos
+            self._pos += 1
+
+            if self._start is None:
+                if char == '{':
+                    following = NEXT_CHAR.match(text, self._pos)
+                    if following is None:
+                        # Can't tell yet whether this opens an object; wait for more text
+                        self._pos = position
+                        break
+                    if following.group(1) in '"}':
+                        self._start = position
+                        self._stack.append('{')
+                continue
+            if self.document is not None:
+                continue
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = text[self._string_start + 1:position]
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = position
+            elif char in '{[':
+                if (char == '[' and len(self._stack) == 1 and self._array_depth is None
+                        and self._last_string == self.array_key):
+                    self._array_depth = 2
+                elif char == '{' and self._array_depth is not None and len(self._stack) == self._array_depth:
+                    self._item_start = position
+                self._stack.append(char)
+            elif char in '}]':
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                depth = len(self._stack)
+
+                if char == '}' and self._item_start is not None and depth == self._array_depth:
+                    item = self._load(text[self._item_start:position + 1])
+                    if item is not None and self._item_start not in self._emitted:
+                        self._emitted.add(self._item_start)
+                        completed.append(item)
+                    self._item_start = None
+                elif char == ']' and self._array_depth is not None and depth == self._array_depth - 1:
+                    self._array_depth = -1  # finished; don't restart on a later array
+                elif depth == 0:
+                    document = self._load(text[self._start:position + 1])
+                    if isinstance(document, dict) and self.array_key in document:
+                        self.document = document
+                    else:
+                        # Braces in the prose before the JSON; look again from the next '{'
+                        self._restart(self._start + 1)
+
+        return completed
+
+    def close(self):
+        """
+        End of the stream; returns any elements not handed out yet
+        If no document closed (an unmatched '{' in the prose kept the real JSON
+        nested inside it), each later '{' is tried as the start of a document
+        that has array_key; elements already streamed from inside it are skipped
+        """
+        if self.document is not None or self._start is None:
+            return []
+
+        decoder = json.JSONDecoder()
+        position = self.text.find('{', self._start + 1)
+        while position != -1:
+            try:
+                document, end = decoder.raw_decode(self.text, position)
+            except ValueError:
+                document = None
+
+            if isinstance(document, dict) and self.array_key in document:
+                self.document = document
+                items = document[self.array_key] if isinstance(document[self.array_key], list) else []
+                streamed = sum(1 for offset in self._emitted if position <= offset < end)
+                return items[streamed:]
+            position = self.text.find('{', position + 1)
+
+        return []
+
+    def _restart(self, position):
+        """Drop the current candidate object and scan again from position"""
+        self._pos = position
+        self._start = None
+        self._stack = []
+        self._in_string = False
+        self._escaped = False
+        self._last_string = None
+        self._array_depth = None
+        self._item_start = None
+
+    def _load(self, fragment):
+        """json.loads that returns None instead of raising"""
+        try:
+            return json.loads(fragment)
+        except ValueError:
+            return None
@@ -0,0 +1,309 @@
+"""
+LLM Gateway
+The one place that talks to the Claude API: a single pooled client shared by
+every caller, with rate limiting, a concurrency cap, retries and deadlines
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+
+from anthropic import Anthropic, AsyncAnthropic, APIConnectionError, APIStatusError, APITimeoutError
+
+# Model used by every call site unless ANTHROPIC_MODEL overrides it
+DEFAULT_MODEL = "claude-sonnet-4-5-20250929"
+
+# Requests in flight at once, across the daemon, chat and prefetch
+MAX_CONCURRENT_REQUESTS = 4
+
+# Token bucket: sustained requests per minute, and how many can go at once after a quiet spell
+REQUESTS_PER_MINUTE = 50
+REQUEST_BURST = 5
+
+# Retries on 429/5xx and connection errors, with jittered exponential backoff
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# A call (including its retries and waits) gives up after this long
+DEFAULT_DEADLINE_SECONDS = 120
+
+# Usage fields summed over every response (cache_* come from prompt caching)
+USAGE_FIELDS = ['input_tokens', 'cache_creation_input_tokens', 'cache_read_input_tokens', 'output_tokens']
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call couldn't finish (or couldn't start) before its deadline"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket; reserve() takes a token and says how long to wait for it"""
+
+    def __init__(self, per_minute=REQUESTS_PER_MINUTE, burst=REQUEST_BURST):
+        self.rate = per_minute / 60.0
+        self.capacity = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token (possibly borrowing ahead) and return the seconds until it's valid"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self):
+        """Give back a token taken by reserve() for a request that was never sent"""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+
+class LLMGateway:
+    """
+    Shared access to Claude for the whole process
+    One Anthropic client and one AsyncAnthropic client (each an HTTP connection
+    pool) with the SDK's own retries turned off; instead every call here goes
+    through the token bucket, a concurrency cap shared by sync and async
+    callers, and jittered exponential backoff on 429/5xx until its deadline.
+    base_url (or ANTHROPIC_BASE_URL) can point at a local mock server, and
+    model (or ANTHROPIC_MODEL) is read here rather than at import, so a .env
+    loaded after the import still applies.
+    Token usage, including prompt-cache reads and writes, and latency are
+    totalled for stats().
+    """
+
+    def __init__(self, api_key=None, base_url=None, model=None, max_concurrency=MAX_CONCURRENT_REQUESTS,
+                 requests_per_minute=REQUESTS_PER_MINUTE, burst=REQUEST_BURST,
+                 max_retries=MAX_RETRIES, deadline=DEFAULT_DEADLINE_SECONDS):
+        api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
+        base_url = base_url or os.environ.get("ANTHROPIC_BASE_URL")
+        self.model = model or os.environ.get("ANTHROPIC_MODEL", DEFAULT_MODEL)
+
+        self.client = Anthropic(api_key=api_key, base_url=base_url, max_retries=0)
+        self.async_client = AsyncAnthropic(api_key=api_key, base_url=base_url, max_retries=0)
+        self.max_retries = max_retries
+        self.deadline = deadline
+
+        self._bucket = TokenBucket(requests_per_minute, burst)
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+        self.requests = 0
+        self.retries = 0
+        self.throttled_seconds = 0.0
+        self.usage = dict.fromkeys(USAGE_FIELDS, 0)
+        self.completed = 0
+        self.latency_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def create(self, deadline=None, **params):
+        """messages.create with rate limiting, the concurrency cap, retries and a deadline"""
+        expires = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+
+        while True:
+            self._acquire(expires)
+            try:
+                self._count(requests=1)
+                started = time.monotonic()
+                message = self.client.messages.create(timeout=self._remaining(expires), **params)
+                self._record(message.usage, started)
+                return message
+            except (APIStatusError, APIConnectionError) as e:
+                delay = self._retry_delay(e, attempt, expires)
+            finally:
+                self._slots.release()
+
+            time.sleep(delay)
+            attempt += 1
+
+    def stream_text(self, deadline=None, **params):
+        """
+        Generator over the text of a streamed reply
+        Retries only happen before the first token; once text has been yielded
+        an error is raised to the caller. Closing the generator (or Ctrl+C in
+        the consuming loop) closes the HTTP stream and frees the slot.
+        """
+        expires = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+
+        while True:
+            self._acquire(expires)
+            streaming = False
+            try:
+                self._count(requests=1)
+                started = time.monotonic()
+                with self.client.messages.stream(timeout=self._remaining(expires), **params) as stream:
+                    for text in stream.text_stream:
+                        streaming = True
+                        yield text
+                    self._record(stream.get_final_message().usage, started)
+                return
+            except (APIStatusError, APIConnectionError) as e:
+                if streaming:
+                    raise
+                delay = self._retry_delay(e, attempt, expires)
+            finally:
+                self._slots.release()
+
+            time.sleep(delay)
+            attempt += 1
+
+    async def astream_text(self, deadline=None, **params):
+        """stream_text() for asyncio callers, using the async client"""
+        expires = time.monotonic() + (deadline or self.deadline)
+        attempt = 0
+
+        while True:
+            await self._acquire_async(expires)
+            streaming = False
+            try:
+                self._count(requests=1)
+                started = time.monotonic()
+                async with self.async_client.messages.stream(timeout=self._remaining(expires), **params) as stream:
+                    async for text in stream.text_stream:
+                        streaming = True
+                        yield text
+                    self._record((await stream.get_final_message()).usage, started)
+                return
+            except (APIStatusError, APIConnectionError) as e:
+                if streaming:
+                    raise
+                delay = self._retry_delay(e, attempt, expires)
+            finally:
+                self._slots.release()
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _remaining(self, expires):
+        """Seconds left before the deadline; raises once it has passed"""
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded("LLM call ran out of time")
+        return remaining
+
+    def _acquire(self, expires):
+        """Wait for a rate-limit token and a concurrency slot; the token is returned if the deadline hits first"""
+        wait = self._bucket.reserve()
+        try:
+            if wait >= self._remaining(expires):
+                raise DeadlineExceeded("Rate limit wait would pass the deadline")
+            if wait:
+                self._count(throttled_seconds=wait)
+                time.sleep(wait)
+
+            if not self._slots.acquire(timeout=self._remaining(expires)):
+                raise DeadlineExceeded("No free request slot before the deadline")
+        except DeadlineExceeded:
+            self._bucket.refund()
+            raise
+
+    async def _acquire_async(self, expires):
+        """
+        _acquire() without blocking the event loop
+        The slot is taken on an executor thread; if the waiting task is
+        cancelled, a slot that thread still gets is released straight away
+        """
+        wait = self._bucket.reserve()
+        try:
+            if wait >= self._remaining(expires):
+                raise DeadlineExceeded("Rate limit wait would pass the deadline")
+            if wait:
+                self._count(throttled_seconds=wait)
+                await asyncio.sleep(wait)
+
+            timeout = self._remaining(expires)
+            acquiring = asyncio.get_running_loop().run_in_executor(None, self._slots.acquire, True, timeout)
+            try:
+                acquired = await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                acquiring.add_done_callback(self._release_unused_slot)
+                raise
+            if not acquired:
+                raise DeadlineExceeded("No free request slot before the deadline")
+        except (DeadlineExceeded, asyncio.CancelledError):
+            self._bucket.refund()
+            raise
+
+    def _release_unused_slot(self, acquiring):
+        """Done-callback for a slot acquired on behalf of a cancelled task"""
+        if not acquiring.cancelled() and acquiring.exception() is None and acquiring.result():
+            self._slots.release()
+
+    def _retry_delay(self, error, attempt, expires):
+        """
+        Seconds to back off before retrying, or re-raise when the error isn't
+        retryable, the retries are used up or the wait would pass the deadline
+        """
+        if isinstance(error, APITimeoutError) and expires <= time.monotonic():
+            raise DeadlineExceeded("LLM call ran out of time") from error
+
+        status = getattr(error, 'status_code', None)
+        if status is not None and status not in RETRYABLE_STATUS and status < 500:
+            raise error
+        if attempt >= self.max_retries:
+            raise error
+
+        # Full jitter, but never sooner than the server's Retry-After
+        delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+        response = getattr(error, 'response', None)
+        if response is not None:
+            try:
+                delay = max(delay, float(response.headers.get('retry-after', 0)))
+            except (TypeError, ValueError):
+                pass
+
+        if delay >= expires - time.monotonic():
+            raise error
+
+        self._count(retries=1)
+        return delay
+
+    def _count(self, requests=0, retries=0, throttled_seconds=0.0):
+        """Add to the request, retry and throttling counters"""
+        with self._stats_lock:
+            self.requests += requests
+            self.retries += retries
+            self.throttled_seconds += throttled_seconds
+
+    def _record(self, usage, started):
+        """Add a finished response's token usage and latency to the totals"""
+        with self._stats_lock:
+            for field in USAGE_FIELDS:
+                self.usage[field] += getattr(usage, field, None) or 0
+            self.completed += 1
+            self.latency_seconds += time.monotonic() - started
+
+    def stats(self):
+        """Request, retry, throttling, latency and token counters"""
+        with self._stats_lock:
+            usage = dict(self.usage)
+            prompt_tokens = usage['input_tokens'] + usage['cache_creation_input_tokens'] + \
+                usage['cache_read_input_tokens']
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'throttled_seconds': round(self.throttled_seconds, 2),
+                'average_latency_seconds': round(self.latency_seconds / self.completed, 2) if self.completed else 0.0,
+                **usage,
+                'prompt_cache_hit_rate': usage['cache_read_input_tokens'] / prompt_tokens if prompt_tokens else 0.0
+            }
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway(**options):
+    """The process-wide gateway, created with `options` on first use"""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway(**options)
+        return _gateway
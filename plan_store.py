@@ -0,0 +1,308 @@
+"""
+Module 4: Plan Store
+Keeps the curriculum, an append-only log of study sessions and the generated
+daily schedules in one local SQLite database
+"""
+
+from datetime import datetime
+import json
+import os
+import sqlite3
+import threading
+
+# Recorded in the meta table so later table changes can migrate older databases
+SCHEMA_VERSION = 2
+
+# Session statuses: a finished block stays pending until the user confirms or skips it;
+# only done sessions count as progress
+SESSION_PENDING = 'pending'
+SESSION_DONE = 'done'
+SESSION_SKIPPED = 'skipped'
+
+# Skill fields stored as columns; anything else on a skill is kept in its extra JSON
+SKILL_COLUMNS = ('name', 'priority', 'total_hours', 'why_important')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS skills (
+    skill_id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    total_hours REAL NOT NULL,
+    why_important TEXT,
+    extra TEXT
+);
+CREATE TABLE IF NOT EXISTS topics (
+    skill_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    hours REAL NOT NULL,
+    allocated_hours REAL,
+    PRIMARY KEY (skill_id, position)
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    skill_id TEXT,
+    topic TEXT,
+    hours REAL NOT NULL,
+    logged_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'done'
+);
+CREATE UNIQUE INDEX IF NOT EXISTS sessions_once ON sessions (date, start_time, subject);
+CREATE INDEX IF NOT EXISTS sessions_by_skill ON sessions (skill_id);
+CREATE TABLE IF NOT EXISTS schedules (
+    date TEXT PRIMARY KEY,
+    generated_at TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+
+class PlanStore:
+    """
+    SQLite (WAL mode) store for the study plan
+    Saves are row-level upserts and session completions are appended, so nothing
+    rewrites the whole plan. One connection is shared by the daemon and chat
+    threads behind a lock.
+    """
+
+    def __init__(self, db_file='study_plan.db'):
+        self.db_file = db_file
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_file, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_schema()
+
+    def _create_schema(self):
+        """Create the tables and indexes if they don't exist yet, and migrate older databases"""
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+            # Version 1 had no session status; its rows stay counted as done
+            columns = [row['name'] for row in self._conn.execute("PRAGMA table_info(sessions)")]
+            if 'status' not in columns:
+                self._conn.execute("ALTER TABLE sessions ADD COLUMN status TEXT NOT NULL DEFAULT 'done'")
+
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('schema_version', ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (str(SCHEMA_VERSION),)
+            )
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def is_empty(self):
+        """True when no curriculum has been saved yet"""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM skills LIMIT 1").fetchone() is None
+
+    def get_meta(self, key, default=None):
+        """Read a JSON value from the meta table"""
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row['value']) if row else default
+
+    def set_meta(self, key, value):
+        """Write a JSON value to the meta table"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, json.dumps(value))
+            )
+
+    def save_curriculum(self, curriculum):
+        """
+        Upsert every skill and topic
+        Rows for skills or topics no longer in the curriculum are removed;
+        hours_completed isn't stored here, it comes from the session log
+        """
+        skill_rows = []
+        topic_rows = []
+        for position, (skill_id, skill) in enumerate(curriculum.items()):
+            extra = {key: value for key, value in skill.items()
+                     if key not in SKILL_COLUMNS and key not in ('topics', 'hours_completed')}
+            skill_rows.append((skill_id, position, skill['name'], skill['priority'], skill['total_hours'],
+                               skill.get('why_important'), json.dumps(extra) if extra else None))
+            for index, topic in enumerate(skill['topics']):
+                topic_rows.append((skill_id, index, topic['name'], topic['hours'], topic.get('allocated_hours')))
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO skills (skill_id, position, name, priority, total_hours, why_important, extra) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(skill_id) DO UPDATE SET position = excluded.position, name = excluded.name, "
+                "priority = excluded.priority, total_hours = excluded.total_hours, "
+                "why_important = excluded.why_important, extra = excluded.extra",
+                skill_rows
+            )
+            self._conn.executemany(
+                "INSERT INTO topics (skill_id, position, name, hours, allocated_hours) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(skill_id, position) DO UPDATE SET name = excluded.name, hours = excluded.hours, "
+                "allocated_hours = excluded.allocated_hours",
+                topic_rows
+            )
+
+            skill_ids = [row[0] for row in skill_rows]
+            placeholders = ','.join('?' * len(skill_ids))
+            self._conn.execute(f"DELETE FROM skills WHERE skill_id NOT IN ({placeholders})", skill_ids)
+            self._conn.execute(f"DELETE FROM topics WHERE skill_id NOT IN ({placeholders})", skill_ids)
+            for skill_id in skill_ids:
+                self._conn.execute("DELETE FROM topics WHERE skill_id = ? AND position >= ?",
+                                   (skill_id, len(curriculum[skill_id]['topics'])))
+
+    def load_curriculum(self):
+        """Curriculum dict in the same shape StudyPlanner builds, with hours_completed from the log"""
+        with self._lock:
+            skills = self._conn.execute("SELECT * FROM skills ORDER BY position").fetchall()
+            topics = self._conn.execute("SELECT * FROM topics ORDER BY skill_id, position").fetchall()
+
+        progress = self.get_progress()
+        curriculum = {}
+        for row in skills:
+            skill = {
+                'name': row['name'],
+                'priority': row['priority'],
+                'total_hours': row['total_hours'],
+                'hours_completed': progress.get(row['skill_id'], 0),
+                'topics': []
+            }
+            if row['why_important'] is not None:
+                skill['why_important'] = row['why_important']
+            if row['extra']:
+                skill.update(json.loads(row['extra']))
+            curriculum[row['skill_id']] = skill
+
+        for row in topics:
+            if row['skill_id'] not in curriculum:
+                continue
+            topic = {'name': row['name'], 'hours': row['hours']}
+            if row['allocated_hours'] is not None:
+                topic['allocated_hours'] = row['allocated_hours']
+            curriculum[row['skill_id']]['topics'].append(topic)
+
+        return curriculum
+
+    def log_session(self, date, start_time, end_time, subject, hours, skill_id=None, topic=None,
+                    status=SESSION_DONE):
+        """
+        Append a study session, done unless status says otherwise
+        Logging the same session (date, start time, subject) twice is a no-op,
+        so a restarted daemon can't double-count. Returns True if it was new.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO sessions "
+                "(date, start_time, end_time, subject, skill_id, topic, hours, logged_at, status) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (date, start_time, end_time, subject, skill_id, topic, hours,
+                 datetime.now().strftime('%Y-%m-%d %H:%M:%S'), status)
+            )
+        return cursor.rowcount == 1
+
+    def confirm_sessions(self, date, start_time=None, done=True):
+        """
+        Mark a day's pending sessions (or the one starting at start_time) done or skipped
+        Only pending rows change, so a confirmed session can't be counted twice.
+        Returns how many sessions were updated.
+        """
+        query = "UPDATE sessions SET status = ? WHERE date = ? AND status = ?"
+        params = [SESSION_DONE if done else SESSION_SKIPPED, date, SESSION_PENDING]
+        if start_time is not None:
+            query += " AND start_time = ?"
+            params.append(start_time)
+
+        with self._lock, self._conn:
+            return self._conn.execute(query, params).rowcount
+
+    def get_progress(self, skill_id=None):
+        """Hours completed per skill id, or for one skill, summed from the done sessions in the log"""
+        with self._lock:
+            if skill_id is not None:
+                row = self._conn.execute(
+                    "SELECT COALESCE(SUM(hours), 0) AS hours FROM sessions WHERE skill_id = ? AND status = ?",
+                    (skill_id, SESSION_DONE)
+                ).fetchone()
+                return row['hours']
+
+            rows = self._conn.execute(
+                "SELECT skill_id, SUM(hours) AS hours FROM sessions "
+                "WHERE skill_id IS NOT NULL AND status = ? GROUP BY skill_id",
+                (SESSION_DONE,)
+            ).fetchall()
+        return {row['skill_id']: row['hours'] for row in rows}
+
+    def get_sessions(self, start_date, end_date=None, status=None):
+        """Logged sessions between two YYYY-MM-DD dates (inclusive), optionally only one status"""
+        query = ("SELECT date, start_time, end_time, subject, skill_id, topic, hours, status FROM sessions "
+                 "WHERE date BETWEEN ? AND ?")
+        params = [start_date, end_date or start_date]
+        if status is not None:
+            query += " AND status = ?"
+            params.append(status)
+
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY date, start_time", params).fetchall()
+        return [dict(row) for row in rows]
+
+    def save_schedule(self, date, schedule):
+        """Store (or replace) the generated schedule for a YYYY-MM-DD date"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO schedules (date, generated_at, data) VALUES (?, ?, ?) "
+                "ON CONFLICT(date) DO UPDATE SET generated_at = excluded.generated_at, data = excluded.data",
+                (date, datetime.now().strftime('%Y-%m-%d %H:%M:%S'), json.dumps(schedule))
+            )
+
+    def load_schedule(self, date):
+        """Stored schedule for a YYYY-MM-DD date, or None"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM schedules WHERE date = ?", (date,)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def import_legacy_json(self, filename):
+        """
+        One-off import of an old study_plan.json
+        Its hours_completed values become one 'Imported progress' session per skill
+        so the session log stays the only source of progress
+        """
+        with open(filename, 'r') as f:
+            plan_data = json.load(f)
+
+        curriculum = plan_data['curriculum']
+        self.save_curriculum(curriculum)
+        self.set_meta('weekly_plans', plan_data.get('weekly_plans', {}))
+        if 'target_date' in plan_data:
+            self.set_meta('target_date', plan_data['target_date'])
+
+        created = plan_data.get('created_at', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+        for skill_id, skill in curriculum.items():
+            if skill.get('hours_completed', 0) > 0:
+                self.log_session(created[:10], '00:00', '00:00', f"Imported progress: {skill['name']}",
+                                 skill['hours_completed'], skill_id=skill_id)
+
+        # Schedules the agent wrote before the store existed
+        folder = os.path.dirname(os.path.abspath(filename))
+        for name in sorted(os.listdir(folder)):
+            if name.startswith('schedule_') and name.endswith('.json'):
+                date = name[len('schedule_'):-len('.json')]
+                try:
+                    datetime.strptime(date, '%Y-%m-%d')
+                    with open(os.path.join(folder, name), 'r') as f:
+                        schedule = json.load(f)
+                    self.save_schedule(date, schedule)
+                except (OSError, ValueError):
+                    continue
@@ -0,0 +1,136 @@
+"""
+Prompt Builder
+Compact serialization of the curriculum, calendar events and MSc overlap for
+Claude prompts, trimmed to an input-token budget estimated locally
+"""
+
+import json
+import math
+import re
+
+# Input tokens a whole request may use (system prompt and message together)
+INPUT_TOKEN_BUDGET = 3000
+
+# Share of that budget for the cached system prefix; the per-day message gets the rest
+PREFIX_TOKEN_BUDGET = 2000
+
+# Shortest prefix the API will cache for Sonnet/Opus (Haiku needs 2048); shorter ones aren't marked
+MIN_CACHEABLE_TOKENS = 1024
+
+# Local estimate: a word costs about one token per 4 characters, punctuation one each
+CHARS_PER_TOKEN = 4
+TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+
+# Topics per skill kept at each curriculum trim step
+TOPIC_LIMITS = [3, 1]
+
+
+def compact_json(value):
+    """Minified JSON with sorted keys, so equal data always gives equal text"""
+    return json.dumps(value, separators=(',', ':'), sort_keys=True, ensure_ascii=False)
+
+
+def estimate_tokens(text):
+    """Rough token count of a prompt, without calling the API"""
+    return sum(max(1, math.ceil(len(piece) / CHARS_PER_TOKEN)) for piece in TOKEN_PIECES.findall(text))
+
+
+def _hours(value):
+    """Hours as an int when whole, else rounded to one decimal"""
+    value = round(value, 1)
+    return int(value) if value == int(value) else value
+
+
+def curriculum_context(planner, topics_per_skill=None):
+    """
+    The curriculum as the model needs it: what is left to study
+    Finished topics and skills are left out, as are why_important and the
+    planning fields; each skill lists its remaining topics as [name, hours left],
+    optionally only the next topics_per_skill of them
+    """
+    context = {}
+    for skill_id, skill in planner.curriculum.items():
+        remaining = planner._remaining_topics(skill_id)
+        if not remaining:
+            continue
+
+        topics = remaining if topics_per_skill is None else remaining[:topics_per_skill]
+        context[skill_id] = {
+            'name': skill['name'],
+            'priority': skill['priority'],
+            'hours_left': _hours(sum(hours for _, hours, _ in remaining)),
+        }
+        if topics_per_skill != 0:
+            context[skill_id]['topics'] = [[name, _hours(hours)] for name, hours, _ in topics]
+    return context
+
+
+def overlap_context(overlap_analysis, details=True):
+    """MSc coverage per skill as {skill: [percent, course(, self-study gaps)]} plus the pure gaps"""
+    covered = {}
+    for skill_id, info in overlap_analysis.get('covered_by_msc', {}).items():
+        if not isinstance(info, dict):
+            continue
+        entry = [info.get('coverage_percentage', 0), info.get('msc_course', '')]
+        if details and info.get('what_needs_self_study'):
+            entry.append(info['what_needs_self_study'])
+        covered[skill_id] = entry
+    return {'covered': covered, 'gaps': overlap_analysis.get('pure_gaps', [])}
+
+
+def event_context(events, with_times=True):
+    """Calendar events as [title, start, end] (or just titles)"""
+    if not with_times:
+        return [event.title for event in events]
+    return [[event.title, event.start.strftime('%H:%M'), event.end.strftime('%H:%M') if event.end else None]
+            for event in events]
+
+
+class PromptBuilder:
+    """
+    Assembles labelled prompt sections within a token budget
+    Each section is added with its full content, smaller fallbacks (None drops
+    the section) and a value. While the estimate is over budget, the section
+    with the lowest value that can still shrink moves to its next fallback, so
+    the least useful context goes first. value can also be a list with one
+    value per fallback, so a section can give up its details early and still
+    be dropped after others have shrunk. Sections without fallbacks are kept.
+    """
+
+    def __init__(self, budget=INPUT_TOKEN_BUDGET):
+        self.budget = budget
+        self.trimmed = []
+        self._sections = []     # [label, variants, current variant, value of each step]
+
+    def add(self, label, content, *fallbacks, value=0):
+        """Add a section; str content is used as is, anything else as compact JSON"""
+        values = list(value) if isinstance(value, (list, tuple)) else [value] * len(fallbacks)
+        if len(values) != len(fallbacks):
+            raise ValueError(f"{label or 'section'}: {len(values)} values for {len(fallbacks)} fallbacks")
+        self._sections.append([label, [content] + list(fallbacks), 0, values])
+        return self
+
+    def build(self, budget=None):
+        """The prompt text, trimmed lowest-value first until it fits the budget (or can't shrink further)"""
+        budget = self.budget if budget is None else budget
+        text = self._render()
+        while estimate_tokens(text) > budget:
+            shrinkable = [section for section in self._sections if section[2] < len(section[1]) - 1]
+            if not shrinkable:
+                break
+            section = min(shrinkable, key=lambda s: s[3][s[2]])
+            section[2] += 1
+            self.trimmed.append(section[0])
+            text = self._render()
+        return text
+
+    def _render(self):
+        """Join the current variant of every section"""
+        lines = []
+        for label, variants, current, _ in self._sections:
+            content = variants[current]
+            if content is None:
+                continue
+            content = content if isinstance(content, str) else compact_json(content)
+            lines.append(f"{label}: {content}" if label else content)
+        return '\n'.join(lines)
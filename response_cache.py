@@ -0,0 +1,172 @@
+"""
+LLM Response Cache
+Content-addressed cache for Claude responses: identical requests (same model,
+parameters and prompt) are answered from memory or disk without an API call
+"""
+
+from collections import OrderedDict
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+CACHE_FILE = 'llm_cache.db'
+
+# Entries kept in memory, most recently used last
+MEMORY_ENTRIES = 128
+
+# Disk entries expire after this long and the file is trimmed to this size
+CACHE_TTL_SECONDS = 7 * 24 * 3600
+CACHE_MAX_BYTES = 50 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    size INTEGER NOT NULL,
+    response TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_by_use ON responses (last_used);
+"""
+
+
+def _normalize(value):
+    """Prompt text with trailing whitespace and surrounding blank lines removed, recursively"""
+    if isinstance(value, str):
+        return '\n'.join(line.rstrip() for line in value.strip().splitlines())
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+
+def request_key(params):
+    """Hash of the model, parameters and normalized prompt"""
+    canonical = json.dumps(_normalize(params), sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(canonical.encode('utf-8'), digest_size=20).hexdigest()
+
+
+class ResponseCache:
+    """
+    Two-level cache of response text keyed by request_key
+    An in-memory LRU sits in front of a SQLite file; disk entries expire after
+    ttl seconds and the least recently used are evicted once the file holds
+    more than max_bytes of responses. hits/misses count every lookup.
+    """
+
+    def __init__(self, cache_file=CACHE_FILE, ttl=CACHE_TTL_SECONDS, max_bytes=CACHE_MAX_BYTES,
+                 memory_entries=MEMORY_ENTRIES):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = None
+        try:
+            self._conn = sqlite3.connect(cache_file, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(SCHEMA)
+            self._evict()
+        except sqlite3.Error as e:
+            print(f"⚠️  LLM cache on disk unavailable ({e}), caching in memory only")
+            self._conn = None
+
+    def create(self, gateway, **params):
+        """
+        gateway.create through the cache; returns the response text
+        Only successful responses are stored, so errors are always retried
+        """
+        key = request_key(params)
+        text = self.get(key)
+        if text is not None:
+            return text
+
+        message = gateway.create(**params)
+        text = message.content[0].text
+        self.put(key, text)
+        return text
+
+    def get(self, key):
+        """Cached response text for a key, or None"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[0] <= self.ttl:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+            row = None
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT created_at, response FROM responses WHERE key = ? AND created_at >= ?",
+                    (key, now - self.ttl)
+                ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            with self._conn:
+                self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._remember(key, row[0], row[1])
+            self.hits += 1
+            self.disk_hits += 1
+            return row[1]
+
+    def put(self, key, text):
+        """Store response text in memory and on disk"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, text)
+            if self._conn is None:
+                return
+
+            with self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO responses (key, created_at, last_used, size, response) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, now, now, len(text.encode('utf-8')), text)
+                )
+            self._evict()
+
+    def _remember(self, key, created_at, text):
+        """Add to the in-memory LRU, dropping the least recently used entry when full"""
+        self._memory[key] = (created_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self):
+        """Drop expired disk entries, then the least recently used until under max_bytes"""
+        with self._conn:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - self.ttl,))
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+
+            for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                total -= size
+
+    def stats(self):
+        """Hit/miss counters and hit rate"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'memory_entries': len(self._memory)
+        }
@@ -0,0 +1,232 @@
+"""
+What-If Planner: compare many deadlines and assumptions in one batch
+Evaluates every combination of target date, daily waste hours and priority
+weighting against the real calendar and reports the earliest date each skill fits by
+
+Usage:
+    python scenarios.py                                  # the next 12 months, waste 1-3h, preset weightings
+    python scenarios.py --from 2026-11-01 --to 2027-06-30 --step 7
+    python scenarios.py --waste 0 2 4 --weights 3,2,1 5,2,1
+    python scenarios.py --json scenarios.json            # also write the full results
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from itertools import accumulate
+import argparse
+import json
+import os
+
+try:
+    import numpy as np
+except ImportError:  # Availability falls back to plain Python lists
+    np = None
+
+from calendar_reader import CalendarReader
+from study_planner import (StudyPlanner, HourAllocator, PRIORITY_WEIGHTS, PLAN_STORE_FILE, LEGACY_PLAN_FILE,
+                           WEEKDAY_STUDY_HOURS, WEEKEND_STUDY_HOURS, HOUR_GRANULARITY)
+
+# Waste hours already taken out of WEEKDAY_STUDY_HOURS / WEEKEND_STUDY_HOURS
+BASE_WASTE_HOURS = 2
+
+DEFAULT_WASTE_HOURS = [1, 2, 3]
+DEFAULT_HORIZON_DAYS = 365
+OVERLAP_FILE = 'msc_overlap_analysis.json'
+
+# Weightings compared when none are given on the command line
+PRESET_WEIGHTINGS = {
+    'default': PRIORITY_WEIGHTS,
+    'flat': {'critical': 1.0, 'high': 1.0, 'medium': 1.0},
+    'critical-first': {'critical': 10.0, 'high': 2.0, 'medium': 1.0},
+}
+
+
+def parse_weighting(text):
+    """'3,2,1' or 'critical=3,high=2,medium=1' -> priority weights dict"""
+    parts = [part.strip() for part in text.split(',') if part.strip()]
+    if all('=' in part for part in parts):
+        return {key.strip(): float(value) for key, value in (part.split('=', 1) for part in parts)}
+
+    if len(parts) != len(PRIORITY_WEIGHTS):
+        raise ValueError(f"Expected {len(PRIORITY_WEIGHTS)} weights (critical,high,medium), got '{text}'")
+    return dict(zip(PRIORITY_WEIGHTS, (float(part) for part in parts)))
+
+
+def availability_table(busy_hours, is_weekday, waste_values, day_offsets):
+    """
+    Study hours available before each target date, for each waste assumption
+    One cumulative sum per waste value over the whole horizon, then every
+    target date is a single lookup. Returns a waste x target-date table.
+    """
+    if np is not None:
+        busy = np.asarray(busy_hours, dtype=float)
+        capacity = np.where(np.asarray(is_weekday), WEEKDAY_STUDY_HOURS, WEEKEND_STUDY_HOURS)
+        extra = BASE_WASTE_HOURS - np.asarray(waste_values, dtype=float)
+        daily = np.clip(capacity[None, :] + extra[:, None] - busy[None, :], 0, None)
+        cumulative = np.concatenate((np.zeros((len(waste_values), 1)), daily.cumsum(axis=1)), axis=1)
+        return cumulative[:, np.asarray(day_offsets, dtype=int)]
+
+    table = []
+    for waste in waste_values:
+        daily = [max((WEEKDAY_STUDY_HOURS if weekday else WEEKEND_STUDY_HOURS) + BASE_WASTE_HOURS - waste - busy, 0)
+                 for weekday, busy in zip(is_weekday, busy_hours)]
+        cumulative = [0.0] + list(accumulate(daily))
+        table.append([cumulative[offset] for offset in day_offsets])
+    return table
+
+
+def _solve_weighting(name, weights, curriculum, msc_coverage, availability):
+    """
+    Earliest target-date index at which each skill gets its full hours, per waste row
+    Runs in a worker process; the allocator is built once and memoizes its solves
+    """
+    allocator = HourAllocator(curriculum, msc_coverage, priority_weights=weights)
+
+    # Allocations are whole half hours, so a topic is full at its maximum rounded down
+    skill_rows = {}
+    for position, (skill_id, _, _, _, maximum) in enumerate(allocator.topics):
+        reachable = int(maximum / HOUR_GRANULARITY + 1e-9) * HOUR_GRANULARITY
+        skill_rows.setdefault(skill_id, []).append((position, reachable))
+
+    rows = []
+    for hours_by_date in availability:
+        earliest = dict.fromkeys(skill_rows)
+        everything = None
+
+        for date_index, hours in enumerate(hours_by_date):
+            allocation = allocator.solve(float(hours))
+            all_fit = True
+            for skill_id, topics in skill_rows.items():
+                fits = all(allocation[position] >= maximum - 1e-9 for position, maximum in topics)
+                if fits and earliest[skill_id] is None:
+                    earliest[skill_id] = date_index
+                all_fit = all_fit and fits
+            if all_fit:
+                everything = date_index
+                break
+
+        rows.append((earliest, everything))
+
+    return name, rows
+
+
+def evaluate_scenarios(planner, calendar_reader, target_dates, waste_values, weightings, workers=None):
+    """
+    Evaluate every (weighting, waste hours, target date) combination
+    Availability for all dates and waste values comes from one pass over the
+    calendar; the weightings are solved in parallel in a process pool.
+    Returns one row per (weighting, waste) with the earliest feasible date per skill.
+    """
+    target_dates = sorted(target_dates)
+    today = datetime.now()
+    first_day = datetime(today.year, today.month, today.day)
+    day_offsets = [max((target - first_day).days, 0) for target in target_dates]
+    horizon_days = max(day_offsets + [0])
+
+    busy_hours = planner._busy_hours_per_day(calendar_reader, first_day, horizon_days)
+    is_weekday = [(first_day + timedelta(days=i)).weekday() < 5 for i in range(horizon_days)]
+    availability = availability_table(busy_hours, is_weekday, waste_values, day_offsets)
+    if np is not None:
+        availability = availability.tolist()
+
+    jobs = [(name, weights, planner.curriculum, planner.msc_coverage, availability)
+            for name, weights in weightings.items()]
+    if workers == 1 or len(jobs) == 1:
+        solved = [_solve_weighting(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            solved = list(pool.map(_solve_weighting, *zip(*jobs)))
+
+    def to_date(index):
+        return target_dates[index].strftime('%Y-%m-%d') if index is not None else None
+
+    results = []
+    for name, rows in solved:
+        for waste, (earliest, everything) in zip(waste_values, rows):
+            results.append({
+                'weighting': name,
+                'waste_hours': waste,
+                'earliest': {skill_id: to_date(index) for skill_id, index in earliest.items()},
+                'all_skills': to_date(everything)
+            })
+    return results
+
+
+def display_feasibility(results, curriculum, target_dates):
+    """Print the feasibility table: earliest target date each skill fits by"""
+    skill_ids = list(curriculum)
+    headers = ['Weighting', 'Waste'] + [skill_id[:10] for skill_id in skill_ids] + ['ALL']
+    widths = [max(len(headers[0]), *(len(row['weighting']) for row in results)), 5] + [10] * (len(skill_ids) + 1)
+
+    print("\n" + "=" * 70)
+    print("🔮 WHAT-IF FEASIBILITY")
+    print("=" * 70)
+    print(f"Target dates: {min(target_dates):%Y-%m-%d} → {max(target_dates):%Y-%m-%d} ({len(target_dates)} dates)")
+    print("Each cell is the earliest target date by which the skill gets its full hours ('-' = never)\n")
+    print('  '.join(header.ljust(width) for header, width in zip(headers, widths)))
+
+    for row in results:
+        cells = [row['weighting'], f"{row['waste_hours']:g}h"]
+        cells += [row['earliest'].get(skill_id) or '-' for skill_id in skill_ids]
+        cells.append(row['all_skills'] or '-')
+        print('  '.join(cell.ljust(width) for cell, width in zip(cells, widths)))
+
+    print("=" * 70)
+
+
+def _load_msc_coverage(planner, filename=OVERLAP_FILE):
+    """MSc coverage from the saved overlap analysis, if there is one"""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename, 'r') as f:
+        return planner.coverage_from_overlap(json.load(f))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare target dates, waste hours and weightings")
+    parser.add_argument('--calendar', default='calendar.ics', help="calendar file to plan around")
+    parser.add_argument('--from', dest='first', help="first target date (YYYY-MM-DD, default: next week)")
+    parser.add_argument('--to', dest='last', help=f"last target date (default: {DEFAULT_HORIZON_DAYS} days out)")
+    parser.add_argument('--step', type=int, default=1, help="days between target dates")
+    parser.add_argument('--waste', type=float, nargs='+', default=DEFAULT_WASTE_HOURS,
+                        help="daily waste hours to compare")
+    parser.add_argument('--weights', nargs='+',
+                        help="priority weightings, e.g. 3,2,1 or critical=5,high=2,medium=1")
+    parser.add_argument('--workers', type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument('--json', help="write the full results to this file")
+    args = parser.parse_args()
+
+    today = datetime.now()
+    first = datetime.strptime(args.first, '%Y-%m-%d') if args.first else today + timedelta(days=7)
+    last = datetime.strptime(args.last, '%Y-%m-%d') if args.last else today + timedelta(days=DEFAULT_HORIZON_DAYS)
+    first = datetime(first.year, first.month, first.day)
+    target_dates = [first + timedelta(days=i) for i in range(0, (last - first).days + 1, max(args.step, 1))]
+    if not target_dates:
+        parser.error("--to must not be before --from")
+
+    if args.weights:
+        weightings = {weights: parse_weighting(weights) for weights in args.weights}
+    else:
+        weightings = PRESET_WEIGHTINGS
+
+    calendar = CalendarReader(args.calendar)
+    if not calendar.load_calendar():
+        print("⚠️  Continuing without calendar data...")
+
+    planner = StudyPlanner()
+    if os.path.exists(PLAN_STORE_FILE) or os.path.exists(LEGACY_PLAN_FILE):
+        planner.load_plan()
+    planner.msc_coverage = _load_msc_coverage(planner)
+
+    print(f"\n🔄 Evaluating {len(target_dates) * len(args.waste) * len(weightings)} scenarios...")
+    results = evaluate_scenarios(planner, calendar, target_dates, args.waste, weightings, workers=args.workers)
+    display_feasibility(results, planner.curriculum, target_dates)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"\n💾 Results saved to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
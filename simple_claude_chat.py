@@ -3,31 +3,50 @@ Simple Chat Interface with Claude
 Type messages and see Claude's responses
 """
 
-import os
-from anthropic import Anthropic
+import time
+from contextlib import closing
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Initialize Claude
-client = Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+from llm_gateway import get_gateway
+
+# Shared Claude client (rate limit, retries, deadlines)
+gateway = get_gateway()
 
 
 def chat(message):
-    """Send a message to Claude and get response"""
+    """
+    Send a message to Claude and print the response as it streams in
+    Returns the full text. Ctrl+C stops the reply but keeps the chat open
+    """
+    started = time.perf_counter()
+    first_token = None
+    parts = []
+
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
+        with closing(gateway.stream_text(
+            model=gateway.model,
             max_tokens=2048,
             messages=[{
                 "role": "user",
                 "content": message
             }]
-        )
-        return response.content[0].text
+        )) as stream:
+            for text in stream:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                print(text, end="", flush=True)
+                parts.append(text)
+    except KeyboardInterrupt:
+        print(" [stopped]", end="")
     except Exception as e:
-        return f"Error: {e}"
+        print(f"Error: {e}", end="")
+
+    if first_token is not None:
+        print(f"\n⏱️  First token after {first_token:.2f}s, done after {time.perf_counter() - started:.2f}s", end="")
+    return ''.join(parts)
 
 
 def main():
@@ -50,10 +69,10 @@ def main():
         if not user_message:
             continue
 
-        # Get Claude's response
+        # Stream Claude's response
         print("\nClaude: ", end="", flush=True)
-        response = chat(user_message)
-        print(response + "\n")
+        chat(user_message)
+        print("\n")
 
 
 if __name__ == "__main__":
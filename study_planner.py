@@ -4,9 +4,313 @@ Generates intelligent study plans for Data Analyst/Scientist roles
 """
 
 from datetime import datetime, timedelta
-import json
+import copy
+import heapq
 import os
 
+from plan_store import PlanStore
+
+try:
+    import numpy as np
+except ImportError:  # Horizon math falls back to plain Python lists
+    np = None
+
+# Daily study capacity before calendar commitments
+# Weekdays: 8am-11:30pm = 15.5h available - 2h waste = 13.5h
+# Weekends: Minimum 12h study
+WEEKDAY_STUDY_HOURS = 13.5
+WEEKEND_STUDY_HOURS = 12
+
+# Value of an hour spent on each priority level when time is tight
+PRIORITY_WEIGHTS = {'critical': 3.0, 'high': 2.0, 'medium': 1.0}
+
+# A topic that gets any time gets at least this share of its recommended hours
+TOPIC_MINIMUM_SHARE = 0.25
+
+# Where the plan lives, and the old JSON file it's imported from on first load
+PLAN_STORE_FILE = 'study_plan.db'
+LEGACY_PLAN_FILE = 'study_plan.json'
+
+# Allocations are rounded to half hours
+HOUR_GRANULARITY = 0.5
+
+# Order skills are worked through in the weekly plan, and the phase each belongs to
+SKILL_PHASES = [
+    ('sql', 'Foundation Building'),
+    ('python', 'Foundation Building'),
+    ('powerbi', 'Foundation Building'),
+    ('statistics', 'Skill Development & Projects'),
+    ('excel', 'Skill Development & Projects'),
+    ('projects', 'Skill Development & Projects'),
+    ('interview_prep', 'Project Sprint & Interview Prep'),
+]
+
+# Share of free time that goes to career prep (the rest is MSc work)
+CAREER_SHARE = 0.5
+
+# Keep each week focused: at most this many hours of one skill
+MAX_SKILL_HOURS_PER_WEEK = 10
+
+# Cross-topic prerequisites by topic name, on top of each skill's own topic order.
+# Names that aren't in the curriculum (e.g. an older saved plan) are ignored
+TOPIC_PREREQUISITES = {
+    "Window Functions (ROW_NUMBER, RANK, PARTITION BY)": ["Aggregations (GROUP BY, HAVING, COUNT, SUM, AVG)"],
+    "Data Modeling and Relationships": ["JOINs (INNER, LEFT, RIGHT, FULL)"],
+    "Pivot Tables and Pivot Charts": ["Aggregations (GROUP BY, HAVING, COUNT, SUM, AVG)"],
+    "Correlation and Regression": ["NumPy for Numerical Operations"],
+    "A/B Testing Fundamentals": ["Hypothesis Testing (t-tests, chi-square)"],
+    "Project 1: Sales Analytics Dashboard (SQL + Power BI)": [
+        "Subqueries and CTEs",
+        "Building Interactive Dashboards"
+    ],
+    "Project 2: Customer Segmentation Analysis (Python)": [
+        "Data Transformation (merge, groupby, pivot)",
+        "Matplotlib & Seaborn Visualization"
+    ],
+    "Project 3: A/B Test Analysis (Python + Statistics)": [
+        "Hypothesis Testing (t-tests, chi-square)",
+        "A/B Testing Fundamentals"
+    ],
+    "SQL Interview Questions Practice": ["Practice Problems (LeetCode/HackerRank)"],
+    "Case Study Practice": ["Project 1: Sales Analytics Dashboard (SQL + Power BI)"],
+}
+
+
+class HourAllocator:
+    """
+    Splits available hours across curriculum topics
+    Maximises priority-weighted study hours subject to per-topic minimums,
+    per-topic maximums (recommended hours minus MSc coverage) and the total
+    available hours. With a linear objective and box constraints the optimum is
+    a greedy water-fill by weight, so after the one-off setup each re-solve is
+    O(topics) and cheap enough to run on every calendar update.
+    """
+
+    def __init__(self, curriculum, msc_coverage=None, priority_weights=None,
+                 minimum_share=TOPIC_MINIMUM_SHARE):
+        weights = priority_weights or PRIORITY_WEIGHTS
+        msc_coverage = msc_coverage or {}
+
+        # One row per topic: (skill_id, topic_index, weight, minimum, maximum)
+        self.topics = []
+        for skill_id, skill in curriculum.items():
+            weight = weights.get(skill['priority'], 1.0)
+            coverage = min(max(msc_coverage.get(skill_id, 0), 0), 100) / 100
+
+            for index, topic in enumerate(skill['topics']):
+                maximum = topic['hours'] * (1 - coverage)
+                minimum = min(topic['hours'] * minimum_share, maximum)
+                self.topics.append((skill_id, index, weight, minimum, maximum))
+
+        # Tiers of equal weight, most valuable first, in curriculum order within a tier
+        tier_weights = sorted({row[2] for row in self.topics}, reverse=True)
+        self.tiers = [[i for i, row in enumerate(self.topics) if row[2] == weight]
+                      for weight in tier_weights]
+
+        self.total_minimum = sum(row[3] for row in self.topics)
+        self.total_maximum = sum(row[4] for row in self.topics)
+        self._solutions = {}
+
+    def solve(self, available_hours):
+        """Hours per topic (same order as self.topics) for the given budget; memoized per half hour"""
+        key = int(max(available_hours, 0) / HOUR_GRANULARITY)
+        if key in self._solutions:
+            return self._solutions[key]
+
+        budget = min(key * HOUR_GRANULARITY, self.total_maximum)
+        hours = [0.0] * len(self.topics)
+        remaining = budget
+
+        # Pass 1: minimums, most important tier first (earlier topics first if it runs out)
+        for tier in self.tiers:
+            for i in tier:
+                grant = min(self.topics[i][3], remaining)
+                hours[i] = grant
+                remaining -= grant
+
+        # Pass 2: top up towards each maximum, sharing a tier's budget proportionally
+        for tier in self.tiers:
+            if remaining <= 1e-9:
+                break
+
+            capacity = sum(self.topics[i][4] - hours[i] for i in tier)
+            if capacity <= 0:
+                continue
+
+            share = min(1.0, remaining / capacity)
+            for i in tier:
+                hours[i] += (self.topics[i][4] - hours[i]) * share
+            remaining -= min(capacity, remaining)
+
+        solution = self._round(hours, budget)
+        self._solutions[key] = solution
+        return solution
+
+    def _round(self, hours, budget):
+        """Round to half hours with the largest-remainder method so the total isn't lost"""
+        units = [int(h / HOUR_GRANULARITY + 1e-9) for h in hours]
+        leftover = int(budget / HOUR_GRANULARITY + 1e-9) - sum(units)
+
+        by_remainder = sorted(range(len(hours)),
+                              key=lambda i: hours[i] / HOUR_GRANULARITY - units[i], reverse=True)
+        for i in by_remainder:
+            if leftover <= 0:
+                break
+            if (units[i] + 1) * HOUR_GRANULARITY <= self.topics[i][4] + 1e-9:
+                units[i] += 1
+                leftover -= 1
+
+        # Maximums that aren't whole half hours can leave units over; give them to whoever has room
+        for tier in self.tiers:
+            for i in tier:
+                while leftover > 0 and (units[i] + 1) * HOUR_GRANULARITY <= self.topics[i][4] + 1e-9:
+                    units[i] += 1
+                    leftover -= 1
+
+        return [unit * HOUR_GRANULARITY for unit in units]
+
+
+class TopicGraph:
+    """
+    Prerequisite graph over curriculum topics
+    Each topic depends on the previous topic of its skill plus anything listed in
+    TOPIC_PREREQUISITES. The topological order and each topic's earliest start
+    (hours of the longest prerequisite chain in front of it) are computed once;
+    after that the set of eligible topics is kept up to date as topics are
+    completed, so asking for the next eligible topic doesn't re-derive any ordering.
+    """
+
+    def __init__(self, curriculum, completed=None, prerequisites=None):
+        prerequisites = TOPIC_PREREQUISITES if prerequisites is None else prerequisites
+        completed = completed or set()
+
+        # Node ids follow curriculum order, which is also the tie-break everywhere
+        self.topics = []
+        self.index = {}
+        self.hours = []
+        edges = []
+        for skill_id, skill in curriculum.items():
+            previous = None
+            for topic in skill['topics']:
+                node = len(self.topics)
+                self.topics.append((skill_id, topic['name']))
+                self.index[topic['name']] = node
+                self.hours.append(topic.get('allocated_hours', topic['hours']))
+                if previous is not None:
+                    edges.append((previous, node))
+                previous = node
+
+        for name, required in prerequisites.items():
+            if name not in self.index:
+                continue
+            for requirement in required:
+                if requirement in self.index and requirement != name:
+                    edges.append((self.index[requirement], self.index[name]))
+
+        self.prerequisites = [set() for _ in self.topics]
+        self.dependents = [set() for _ in self.topics]
+        for before, after in edges:
+            self.prerequisites[after].add(before)
+            self.dependents[before].add(after)
+
+        self.order = self._topological_order()
+        self.rank = [0] * len(self.topics)
+        for position, node in enumerate(self.order):
+            self.rank[node] = position
+
+        self.completed = set()
+        self.earliest_start = self._chain_starts(self.hours)
+
+        self._waiting = [len(required) for required in self.prerequisites]
+        self._ready = [(self.rank[node], node) for node in range(len(self.topics)) if not self._waiting[node]]
+        heapq.heapify(self._ready)
+        for name in sorted(completed, key=lambda n: self.rank[self.index[n]] if n in self.index else -1):
+            self.mark_completed(name)
+
+    def _topological_order(self):
+        """Kahn's algorithm, taking topics in curriculum order when there's a choice"""
+        waiting = [len(required) for required in self.prerequisites]
+        ready = [node for node in range(len(self.topics)) if not waiting[node]]
+        heapq.heapify(ready)
+        order = []
+
+        while ready:
+            node = heapq.heappop(ready)
+            order.append(node)
+            for dependent in self.dependents[node]:
+                waiting[dependent] -= 1
+                if not waiting[dependent]:
+                    heapq.heappush(ready, dependent)
+
+        if len(order) != len(self.topics):
+            stuck = [self.topics[node][1] for node in range(len(self.topics)) if waiting[node]]
+            raise ValueError(f"Topic prerequisites contain a cycle: {', '.join(stuck)}")
+        return order
+
+    def _chain_starts(self, hours):
+        """Longest chain of prerequisite hours in front of each node, in one pass over the order"""
+        start = [0.0] * len(self.topics)
+        for node in self.order:
+            finish = start[node] + hours[node]
+            for dependent in self.dependents[node]:
+                start[dependent] = max(start[dependent], finish)
+        return start
+
+    def earliest_finish(self, hours_left):
+        """
+        Study hours before each topic can be finished: its own hours left plus its
+        longest chain of unfinished prerequisites (a lower bound, as if all study
+        went to that chain). hours_left maps topic names to hours still to study;
+        completed and unlisted topics count as done.
+        """
+        hours = [0.0 if node in self.completed else hours_left.get(name, 0)
+                 for node, (_, name) in enumerate(self.topics)]
+        start = self._chain_starts(hours)
+        return {name: start[node] + hours[node] for node, (_, name) in enumerate(self.topics)}
+
+    def copy(self):
+        """A graph sharing this one's structure, with its own completion state to play forward"""
+        clone = copy.copy(self)
+        clone.completed = set(self.completed)
+        clone._waiting = list(self._waiting)
+        clone._ready = list(self._ready)
+        return clone
+
+    def completed_names(self):
+        """Names of the topics marked completed"""
+        return {self.topics[node][1] for node in self.completed}
+
+    def is_ready(self, name):
+        """True when every prerequisite of the topic has been completed"""
+        node = self.index.get(name)
+        return node is None or not self._waiting[node]
+
+    def mark_completed(self, name):
+        """Record a finished topic and release the topics waiting on it"""
+        node = self.index.get(name)
+        if node is None or node in self.completed:
+            return
+
+        self.completed.add(node)
+        for dependent in self.dependents[node]:
+            self._waiting[dependent] -= 1
+            if not self._waiting[dependent]:
+                heapq.heappush(self._ready, (self.rank[dependent], dependent))
+
+    def next_eligible(self, count=1):
+        """
+        The first `count` topics in topological order whose prerequisites are done
+        Returns (skill_id, topic name) pairs; finished topics are dropped lazily
+        """
+        while self._ready and self._ready[0][1] in self.completed:
+            heapq.heappop(self._ready)
+
+        if count == 1:
+            return [self.topics[self._ready[0][1]]] if self._ready else []
+
+        eligible = heapq.nsmallest(count + len(self.completed), self._ready)
+        return [self.topics[node] for _, node in eligible if node not in self.completed][:count]
+
 
 class StudyPlanner:
     """Creates and manages study curriculum and schedules"""
@@ -15,6 +319,16 @@ class StudyPlanner:
         self.target_date = datetime.strptime(target_date, "%Y-%m-%d")
         self.curriculum = self._create_data_analyst_curriculum()
         self.weekly_plans = {}
+        self.unreachable_topics = []  # topics the last weekly breakdown couldn't fit before target_date
+        self.store = None
+
+        # MSc coverage percentage per skill id, from the overlap analysis
+        self.msc_coverage = {}
+        self._allocator = None
+        self._allocator_key = None
+
+        # Prerequisite graph, built on first use and kept in step with progress
+        self._topic_graph = None
 
     def _create_data_analyst_curriculum(self):
         """
@@ -128,44 +442,36 @@ class StudyPlanner:
     def calculate_available_time(self, calendar_reader):
         """
         Calculate how much study time is available from now until target date
-        Accounts for calendar commitments
+        Accounts for calendar commitments in one pass over the whole horizon:
+        merged busy time is binned per day and weekdays are counted with busday math.
+        The per-day availability is returned too, so callers don't recompute it.
         """
         now = datetime.now()
         days_remaining = (self.target_date - now).days
         weeks_remaining = days_remaining / 7
 
-        # Get calendar commitments for remaining time
-        total_calendar_hours = 0
-        current_date = now
-
-        while current_date <= self.target_date:
-            events = calendar_reader.get_events_for_date(current_date)
-            for event in events:
-                if event.get('end'):
-                    duration = (event['end'] - event['start']).total_seconds() / 3600
-                    total_calendar_hours += duration
-            current_date += timedelta(days=1)
-
-        # Calculate available study hours
-        # Weekdays: 8am-11:30pm = 15.5h available - 2h waste = 13.5h
-        # Weekends: Minimum 12h study
-
-        weekdays_remaining = 0
-        weekends_remaining = 0
-
-        current_date = now
-        while current_date <= self.target_date:
-            if current_date.weekday() in [5, 6]:  # Saturday, Sunday
-                weekends_remaining += 1
-            else:
-                weekdays_remaining += 1
-            current_date += timedelta(days=1)
-
-        max_weekday_hours = weekdays_remaining * 13.5
-        max_weekend_hours = weekends_remaining * 12
-        total_max_hours = max_weekday_hours + max_weekend_hours
+        first_day = datetime(now.year, now.month, now.day)
+        horizon_days = max((self.target_date.date() - first_day.date()).days, 0)
+        busy_hours = self._busy_hours_per_day(calendar_reader, first_day, horizon_days)
+
+        if np is not None:
+            dates = np.datetime64(first_day.date()) + np.arange(horizon_days)
+            is_weekday = np.is_busday(dates)
+            weekdays_remaining = int(np.busday_count(dates[0], dates[-1] + 1)) if horizon_days else 0
+            capacity = np.where(is_weekday, WEEKDAY_STUDY_HOURS, WEEKEND_STUDY_HOURS)
+            daily_available = np.clip(capacity - busy_hours, 0, None)
+            total_calendar_hours = float(busy_hours.sum())
+            available_study_hours = float(daily_available.sum())
+        else:
+            dates = [first_day.date() + timedelta(days=i) for i in range(horizon_days)]
+            capacity = [WEEKEND_STUDY_HOURS if d.weekday() in [5, 6] else WEEKDAY_STUDY_HOURS for d in dates]
+            weekdays_remaining = sum(1 for d in dates if d.weekday() not in [5, 6])
+            daily_available = [max(cap - busy, 0) for cap, busy in zip(capacity, busy_hours)]
+            total_calendar_hours = sum(busy_hours)
+            available_study_hours = sum(daily_available)
 
-        available_study_hours = total_max_hours - total_calendar_hours
+        weekends_remaining = horizon_days - weekdays_remaining
+        total_max_hours = weekdays_remaining * WEEKDAY_STUDY_HOURS + weekends_remaining * WEEKEND_STUDY_HOURS
 
         return {
             'days_remaining': days_remaining,
@@ -175,118 +481,289 @@ class StudyPlanner:
             'calendar_committed_hours': total_calendar_hours,
             'max_possible_hours': total_max_hours,
             'available_study_hours': available_study_hours,
-            'avg_hours_per_day': available_study_hours / days_remaining if days_remaining > 0 else 0
+            'avg_hours_per_day': available_study_hours / days_remaining if days_remaining > 0 else 0,
+            'daily_dates': dates,
+            'daily_available_hours': daily_available
         }
 
-    def allocate_hours_to_curriculum(self, available_hours):
+    def _busy_hours_per_day(self, calendar_reader, first_day, horizon_days):
+        """
+        Calendar hours per day over the horizon
+        Uses the merged busy intervals, so overlaps count once and events that cross
+        midnight are split between the two days
+        """
+        horizon_end = first_day + timedelta(days=horizon_days)
+        busy = calendar_reader.get_busy_intervals(first_day, horizon_end)
+
+        if np is None:
+            hours = [0.0] * horizon_days
+            for start, end in busy:
+                while start < end:
+                    day_index = (start - first_day).days
+                    next_midnight = first_day + timedelta(days=day_index + 1)
+                    piece_end = min(end, next_midnight)
+                    hours[day_index] += (piece_end - start).total_seconds() / 3600
+                    start = piece_end
+            return hours
+
+        if not busy:
+            return np.zeros(horizon_days)
+
+        # Busy seconds elapsed by each midnight, via a prefix sum over the sorted intervals
+        origin = np.datetime64(first_day, 's')
+        starts = (np.array([start for start, _ in busy], dtype='datetime64[s]') - origin).astype(np.int64)
+        ends = (np.array([end for _, end in busy], dtype='datetime64[s]') - origin).astype(np.int64)
+        lengths = ends - starts
+        before = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+        midnights = np.arange(horizon_days + 1, dtype=np.int64) * 86400
+        last = np.searchsorted(starts, midnights, side='right') - 1
+        inside = np.clip(midnights - starts[np.maximum(last, 0)], 0, lengths[np.maximum(last, 0)])
+        elapsed = np.where(last >= 0, before[np.maximum(last, 0)] + inside, 0)
+
+        return np.diff(elapsed) / 3600
+
+    def allocate_hours_to_curriculum(self, available_hours, verbose=True):
         """
         Intelligently allocate available hours to curriculum based on priority
+        Solved as a weighted optimization over every topic (see HourAllocator);
+        each topic gets 'allocated_hours' and each skill's total_hours becomes the
+        sum of its topics. The solver is reused until the curriculum or MSc
+        coverage changes, so re-solving for new available hours is cheap.
         """
-        # Calculate total needed hours
-        total_needed = sum(skill['total_hours'] for skill in self.curriculum.values())
-
-        # If we have enough time, use recommended hours
-        if available_hours >= total_needed:
-            print(f"✅ Good news! You have {available_hours:.0f}h available and need {total_needed}h")
-            print(f"   Buffer time: {available_hours - total_needed:.0f}h for review/overflow")
-            return self.curriculum
+        allocator = self._get_allocator()
+        total_needed = allocator.total_maximum
 
-        # If time is tight, prioritize critical skills
-        else:
-            print(f"⚠️  Time is tight! You have {available_hours:.0f}h but curriculum needs {total_needed}h")
-            print(f"   Prioritizing critical skills...")
-
-            # Allocate hours based on priority
-            critical_skills = {k: v for k, v in self.curriculum.items() if v['priority'] == 'critical'}
-            high_skills = {k: v for k, v in self.curriculum.items() if v['priority'] == 'high'}
-
-            critical_hours = sum(s['total_hours'] for s in critical_skills.values())
-            high_hours = sum(s['total_hours'] for s in high_skills.values())
-
-            # Allocate 70% to critical, 25% to high, 5% buffer
-            allocated = available_hours * 0.95  # 5% buffer
-            critical_allocation = allocated * 0.7
-            high_allocation = allocated * 0.25
-
-            # Scale down hours proportionally
-            for skill_id, skill in self.curriculum.items():
-                if skill['priority'] == 'critical':
-                    scale_factor = critical_allocation / critical_hours
-                    skill['total_hours'] = int(skill['total_hours'] * scale_factor)
-                elif skill['priority'] == 'high':
-                    scale_factor = high_allocation / high_hours
-                    skill['total_hours'] = int(skill['total_hours'] * scale_factor)
-                else:
-                    skill['total_hours'] = int(skill['total_hours'] * 0.5)  # Cut medium priority in half
-
-            return self.curriculum
-
-    def generate_weekly_breakdown(self, weeks_remaining):
+        if verbose:
+            if available_hours >= total_needed:
+                print(f"✅ Good news! You have {available_hours:.0f}h available and need {total_needed:.0f}h")
+                print(f"   Buffer time: {available_hours - total_needed:.0f}h for review/overflow")
+            else:
+                print(f"⚠️  Time is tight! You have {available_hours:.0f}h but curriculum needs {total_needed:.0f}h")
+                print(f"   Prioritizing critical skills...")
+
+        allocation = allocator.solve(available_hours)
+
+        totals = {skill_id: 0 for skill_id in self.curriculum}
+        for (skill_id, index, _, _, _), hours in zip(allocator.topics, allocation):
+            self.curriculum[skill_id]['topics'][index]['allocated_hours'] = hours
+            totals[skill_id] += hours
+
+        for skill_id, total in totals.items():
+            self.curriculum[skill_id]['total_hours'] = total
+
+        self._sync_topic_graph()
+        return self.curriculum
+
+    def coverage_from_overlap(self, overlap_analysis):
+        """MSc coverage percentage per curriculum skill id, from an overlap analysis"""
+        coverage = {}
+        for skill_id, coverage_info in overlap_analysis.get('covered_by_msc', {}).items():
+            if skill_id in self.curriculum:
+                try:
+                    coverage[skill_id] = float(coverage_info.get('coverage_percentage', 0))
+                except (TypeError, ValueError):
+                    continue
+        return coverage
+
+    def _get_allocator(self):
+        """Build the allocation solver, or reuse it while its inputs are unchanged"""
+        key = (
+            tuple((skill_id, skill['priority'], tuple(t['hours'] for t in skill['topics']))
+                  for skill_id, skill in self.curriculum.items()),
+            tuple(sorted(self.msc_coverage.items()))
+        )
+
+        if self._allocator is None or key != self._allocator_key:
+            self._allocator = HourAllocator(self.curriculum, self.msc_coverage)
+            self._allocator_key = key
+
+        return self._allocator
+
+    def generate_weekly_breakdown(self, weeks_remaining, daily_available_hours=None):
         """
         Break down curriculum into weekly study goals
+        Packs topics into each week's real capacity (the career share of the free
+        hours from calculate_available_time) in one pass over the horizon. Each skill
+        gets at most MAX_SKILL_HOURS_PER_WEEK, topics that don't fit are split and
+        carried into the next week, and progress from hours_completed is respected,
+        so every week continues where the previous one stopped. A topic only starts
+        once its prerequisites (see TopicGraph) are finished, and a topic whose
+        prerequisite chain can't be finished in the hours left before target_date
+        isn't scheduled at all; those are listed in unreachable_topics.
         """
-        weekly_plans = []
-        skills_list = list(self.curriculum.items())
+        capacities = self._weekly_capacities(weeks_remaining, daily_available_hours)
+        budgets = [int(capacity * CAREER_SHARE / HOUR_GRANULARITY) * HOUR_GRANULARITY for capacity in capacities]
+        skill_order = self._skill_order()
+        queues = {skill_id: self._remaining_topics(skill_id) for skill_id, _ in skill_order}
+        graph = self.topic_graph().copy()
+        self.unreachable_topics = self._drop_unreachable(queues, graph, sum(budgets))
 
-        for week_num in range(1, int(weeks_remaining) + 2):
+        weekly_plans = []
+        for week_num, budget in enumerate(budgets, start=1):
             week_plan = {
                 'week': week_num,
                 'focus_skills': [],
                 'total_hours': 0,
-                'goals': []
+                'goals': [],
+                'capacity_hours': budget
             }
 
-            # Rotate through skills, prioritizing critical ones
-            # Week 1-3: Focus on SQL, Python, Power BI
-            # Week 4-5: Statistics, Projects
-            # Week 6+: Projects, Interview Prep
-
-            if week_num <= 3:
-                # Foundation building
-                focus = ['sql', 'python', 'powerbi']
-                week_plan['phase'] = 'Foundation Building'
-            elif week_num <= 5:
-                # Intermediate skills + project work
-                focus = ['python', 'powerbi', 'statistics', 'projects']
-                week_plan['phase'] = 'Skill Development & Projects'
-            else:
-                # Projects and interview prep
-                focus = ['projects', 'interview_prep', 'sql']
-                week_plan['phase'] = 'Project Sprint & Interview Prep'
-
-            for skill_id in focus:
-                if skill_id in self.curriculum:
-                    skill = self.curriculum[skill_id]
-                    weekly_hours = min(skill['total_hours'] - skill['hours_completed'], 10)
-
-                    if weekly_hours > 0:
-                        week_plan['focus_skills'].append({
-                            'skill': skill['name'],
-                            'hours': weekly_hours,
-                            'topics': self._get_next_topics(skill_id, weekly_hours)
-                        })
-                        week_plan['total_hours'] += weekly_hours
-
+            phase_hours = {}
+            for skill_id, phase in skill_order:
+                if budget < HOUR_GRANULARITY:
+                    break
+                if not queues[skill_id]:
+                    continue
+
+                skill_budget = min(MAX_SKILL_HOURS_PER_WEEK, budget)
+                hours, topics, finished = self._pack_skill_week(queues[skill_id], skill_budget, graph)
+                if hours <= 0:
+                    continue
+
+                week_plan['focus_skills'].append({
+                    'skill': self.curriculum[skill_id]['name'],
+                    'skill_id': skill_id,
+                    'hours': hours,
+                    'topics': topics
+                })
+                week_plan['goals'].extend(f"Finish {name}" for name in finished)
+                week_plan['total_hours'] += hours
+                phase_hours[phase] = phase_hours.get(phase, 0) + hours
+                budget -= hours
+
+            # The phase is whichever phase got most of the week's hours
+            week_plan['phase'] = max(phase_hours, key=phase_hours.get) if phase_hours else 'Review & Buffer'
             weekly_plans.append(week_plan)
 
+            if not any(queues.values()):
+                break
+
+        self.weekly_plans = weekly_plans
         return weekly_plans
 
-    def _get_next_topics(self, skill_id, hours_available):
-        """Get next topics to study for a skill within available hours"""
+    def _drop_unreachable(self, queues, graph, total_hours):
+        """Remove topics that can't be finished within total_hours from the queues; returns their names"""
+        hours_left = {topic[0]: topic[1] for queue in queues.values() for topic in queue}
+        finish = graph.earliest_finish(hours_left)
+
+        unreachable = []
+        for queue in queues.values():
+            unreachable += [topic[0] for topic in queue if finish.get(topic[0], 0) > total_hours + 1e-9]
+            queue[:] = [topic for topic in queue if finish.get(topic[0], 0) <= total_hours + 1e-9]
+        return unreachable
+
+    def _weekly_capacities(self, weeks_remaining, daily_available_hours=None):
+        """Free hours per week, from per-day availability when it's known"""
+        if daily_available_hours is None:
+            full_week = 5 * WEEKDAY_STUDY_HOURS + 2 * WEEKEND_STUDY_HOURS
+            return [full_week] * (max(int(weeks_remaining), 0) + 1)
+
+        daily = [float(hours) for hours in daily_available_hours]
+        return [sum(daily[i:i + 7]) for i in range(0, len(daily), 7)]
+
+    def _skill_order(self):
+        """(skill_id, phase) pairs in study order; unknown skills go last"""
+        order = [(skill_id, phase) for skill_id, phase in SKILL_PHASES if skill_id in self.curriculum]
+        known = {skill_id for skill_id, _ in order}
+        order += [(skill_id, 'Skill Development & Projects')
+                  for skill_id in self.curriculum if skill_id not in known]
+        return order
+
+    def _remaining_topics(self, skill_id):
+        """
+        Topics still to study for a skill as [name, hours left, already started]
+        Uses the allocated hours when an allocation exists, and assumes
+        hours_completed were spent on the topics in order
+        """
         skill = self.curriculum[skill_id]
-        topics = []
-        hours_allocated = 0
+        completed = skill.get('hours_completed', 0)
+        remaining = []
 
         for topic in skill['topics']:
-            if hours_allocated >= hours_available:
+            hours = topic.get('allocated_hours', topic['hours'])
+            done = min(completed, hours)
+            completed -= done
+
+            if hours - done > 1e-9:
+                remaining.append([topic['name'], hours - done, done > 0])
+
+        return remaining
+
+    def topic_graph(self):
+        """
+        The planner's TopicGraph, built once per curriculum
+        Finished and fully MSc-covered topics are completed; _sync_topic_graph keeps
+        that up to date as sessions are logged, so callers only query it
+        """
+        if self._topic_graph is None:
+            self._topic_graph = TopicGraph(self.curriculum, completed=self._completed_topics())
+        return self._topic_graph
+
+    def _completed_topics(self):
+        """Names of topics with no hours left (finished, or fully covered by the MSc)"""
+        completed = set()
+        for skill_id, skill in self.curriculum.items():
+            remaining = {name for name, _, _ in self._remaining_topics(skill_id)}
+            completed.update(topic['name'] for topic in skill['topics'] if topic['name'] not in remaining)
+        return completed
+
+    def _sync_topic_graph(self):
+        """
+        Mark newly finished topics on the graph
+        If a topic is no longer finished (e.g. a re-allocation gave it more hours)
+        the graph is rebuilt on next use instead
+        """
+        if self._topic_graph is None:
+            return
+
+        completed = self._completed_topics()
+        already = self._topic_graph.completed_names()
+        if not already <= completed:
+            self._topic_graph = None
+            return
+
+        for name in sorted(completed - already, key=lambda n: self._topic_graph.rank[self._topic_graph.index[n]]):
+            self._topic_graph.mark_completed(name)
+
+    def _pack_skill_week(self, queue, budget, graph=None):
+        """
+        Take topics off the front of a skill's queue until the budget is used
+        A topic that doesn't fit is split; the rest stays at the front of the queue.
+        With a graph, stops at a topic whose prerequisites aren't finished yet
+        Returns (hours used, topic labels, names of topics finished)
+        """
+        used = 0
+        labels = []
+        finished = []
+
+        while queue and budget - used >= HOUR_GRANULARITY:
+            topic = queue[0]
+            if graph is not None and not topic[2] and not graph.is_ready(topic[0]):
+                break
+            take = min(topic[1], budget - used)
+            topic[1] -= take
+            used += take
+
+            label = topic[0] + (" (continued)" if topic[2] else "")
+            topic[2] = True
+
+            if topic[1] > 1e-9:
+                labels.append(label + " (partial)")
                 break
-            if topic['hours'] <= (hours_available - hours_allocated):
-                topics.append(topic['name'])
-                hours_allocated += topic['hours']
 
-        if not topics and skill['topics']:
-            topics.append(skill['topics'][0]['name'] + " (partial)")
+            labels.append(label)
+            finished.append(topic[0])
+            queue.pop(0)
+            if graph is not None:
+                graph.mark_completed(topic[0])
 
+        return used, labels, finished
+
+    def _get_next_topics(self, skill_id, hours_available):
+        """Get next topics to study for a skill within available hours"""
+        _, topics, _ = self._pack_skill_week(self._remaining_topics(skill_id), hours_available,
+                                             self.topic_graph().copy())
         return topics
 
     def display_curriculum(self):
@@ -343,33 +820,61 @@ class StudyPlanner:
                 for topic in skill['topics']:
                     print(f"        • {topic}")
 
-        print("\n" + "=" * 70)
+        if self.unreachable_topics:
+            print(f"\n⚠️  Can't be finished by {self.target_date.strftime('%Y-%m-%d')} "
+                  f"(prerequisites take too long), left out:")
+            for name in self.unreachable_topics:
+                print(f"   • {name}")
 
-    def save_plan(self, filename='study_plan.json'):
-        """Save the study plan to file"""
-        plan_data = {
-            'target_date': self.target_date.strftime('%Y-%m-%d'),
-            'curriculum': self.curriculum,
-            'weekly_plans': self.weekly_plans,
-            'created_at': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
+        print("\n" + "=" * 70)
 
-        with open(filename, 'w') as f:
-            json.dump(plan_data, f, indent=2)
+    def _open_store(self, filename):
+        """Open the plan store, reusing the connection when it's the same file"""
+        if self.store is None or self.store.db_file != filename:
+            if self.store is not None:
+                self.store.close()
+            self.store = PlanStore(filename)
+        return self.store
+
+    def save_plan(self, filename=PLAN_STORE_FILE):
+        """Save the study plan to the plan store"""
+        store = self._open_store(filename)
+        store.save_curriculum(self.curriculum)
+        store.set_meta('weekly_plans', self.weekly_plans)
+        store.set_meta('target_date', self.target_date.strftime('%Y-%m-%d'))
+        store.set_meta('created_at', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
 
         print(f"\n💾 Study plan saved to {filename}")
 
-    def load_plan(self, filename='study_plan.json'):
-        """Load existing study plan"""
-        if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                plan_data = json.load(f)
+    def load_plan(self, filename=PLAN_STORE_FILE, legacy_file=LEGACY_PLAN_FILE):
+        """
+        Load existing study plan
+        An empty store imports the old JSON plan first, if there is one
+        """
+        store = self._open_store(filename)
+
+        if store.is_empty():
+            if not legacy_file or not os.path.exists(legacy_file):
+                return False
+            store.import_legacy_json(legacy_file)
+            print(f"📦 Imported {legacy_file} into {filename}")
+
+        self.curriculum = store.load_curriculum()
+        self._topic_graph = None
+        self.weekly_plans = store.get_meta('weekly_plans', {})
+        print(f"✅ Loaded study plan from {filename}")
+        return True
+
+    def refresh_progress(self):
+        """Update hours_completed on every skill from the session log"""
+        if self.store is None:
+            return
+
+        progress = self.store.get_progress()
+        for skill_id, skill in self.curriculum.items():
+            skill['hours_completed'] = progress.get(skill_id, 0)
 
-            self.curriculum = plan_data['curriculum']
-            self.weekly_plans = plan_data.get('weekly_plans', {})
-            print(f"✅ Loaded study plan from {filename}")
-            return True
-        return False
+        self._sync_topic_graph()
 
 
 # Standalone usage
@@ -411,7 +916,8 @@ if __name__ == "__main__":
 
     # Generate weekly breakdown
     print("\n📅 Generating weekly study plan...")
-    weekly_plans = planner.generate_weekly_breakdown(time_available['weeks_remaining'])
+    weekly_plans = planner.generate_weekly_breakdown(time_available['weeks_remaining'],
+                                                     time_available['daily_available_hours'])
     planner.display_weekly_plan(weekly_plans)
 
     # Save plan
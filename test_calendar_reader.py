@@ -0,0 +1,573 @@
+from datetime import datetime, timedelta
+import os
+import pickle
+import time
+
+import pytest
+
+import calendar_reader
+from calendar_reader import CalendarReader, Event
+
+
+@pytest.fixture
+def local_zone(monkeypatch):
+    """Switch the process' local time zone for one test"""
+    def switch(name):
+        monkeypatch.setenv("TZ", name)
+        time.tzset()
+        calendar_reader._local_shift.cache_clear()
+
+    yield switch
+    monkeypatch.undo()
+    time.tzset()
+    calendar_reader._local_shift.cache_clear()
+
+
+def make_calendar(tmp_path, *events):
+    """Write VEVENT bodies to an ICS file and load it without the disk cache"""
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for event in events:
+        lines += ["BEGIN:VEVENT", *event.strip().splitlines(), "END:VEVENT"]
+    lines.append("END:VCALENDAR")
+
+    path = tmp_path / "calendar.ics"
+    path.write_text("\r\n".join(lines) + "\r\n", encoding="utf-8")
+
+    reader = CalendarReader(str(path), use_cache=False)
+    assert reader.load_calendar()
+    return reader
+
+
+def starts(events):
+    return [event.start for event in events]
+
+
+def test_weekly_rule_expands_only_inside_window(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:lecture
+SUMMARY:Machine Learning; Lecture
+DTSTART:20261005T100000
+DTEND:20261005T120000
+RRULE:FREQ=WEEKLY;BYDAY=MO,WE
+""")
+
+    events = reader.get_events_in_range(datetime(2026, 10, 12), datetime(2026, 10, 19))
+
+    assert starts(events) == [datetime(2026, 10, 12, 10), datetime(2026, 10, 14, 10)]
+    assert all(event.end - event.start == timedelta(hours=2) for event in events)
+    assert all(event.rrule is None for event in events)
+
+
+def test_count_and_until_end_the_series(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:counted
+SUMMARY:Counted
+DTSTART:20261001T090000
+RRULE:FREQ=DAILY;COUNT=3
+""", """
+UID:until
+SUMMARY:Until
+DTSTART:20261001T180000
+RRULE:FREQ=DAILY;UNTIL=20261002T235959
+""")
+
+    events = reader.get_events_in_range(datetime(2026, 9, 1), datetime(2026, 12, 1))
+
+    assert [(e.title, e.start.day) for e in events] == [
+        ('Counted', 1), ('Until', 1), ('Counted', 2), ('Until', 2), ('Counted', 3)
+    ]
+    assert reader.get_events_in_range(datetime(2026, 10, 3, 12), datetime(2026, 12, 1)) == []
+
+
+def test_count_series_can_be_queried_mid_series(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:counted
+SUMMARY:Counted
+DTSTART:20260105T090000
+RRULE:FREQ=WEEKLY;INTERVAL=2;COUNT=10
+""")
+
+    events = reader.get_events_in_range(datetime(2026, 4, 1), datetime(2026, 6, 1))
+
+    # Occurrences 8-10 are Apr 13, Apr 27 and May 11; the series ends there
+    assert starts(events) == [datetime(2026, 4, 13, 9), datetime(2026, 4, 27, 9), datetime(2026, 5, 11, 9)]
+
+
+def test_exdate_and_recurrence_id_replace_occurrences(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:seminar
+SUMMARY:Seminar
+DTSTART:20261005T140000
+DTEND:20261005T150000
+RRULE:FREQ=WEEKLY;COUNT=4
+EXDATE:20261012T140000
+""", """
+UID:seminar
+SUMMARY:Seminar (moved)
+RECURRENCE-ID:20261019T140000
+DTSTART:20261020T160000
+DTEND:20261020T170000
+""")
+
+    events = reader.get_events_in_range(datetime(2026, 10, 1), datetime(2026, 11, 1))
+
+    assert [(e.title, e.start) for e in events] == [
+        ('Seminar', datetime(2026, 10, 5, 14)),
+        ('Seminar (moved)', datetime(2026, 10, 20, 16)),
+        ('Seminar', datetime(2026, 10, 26, 14)),
+    ]
+
+
+def test_monthly_ordinal_byday(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:review
+SUMMARY:Monthly review
+DTSTART:20260101T100000
+RRULE:FREQ=MONTHLY;BYDAY=-1FR
+""")
+
+    events = reader.get_events_in_range(datetime(2026, 1, 1), datetime(2026, 4, 1))
+
+    assert starts(events) == [datetime(2026, 1, 30, 10), datetime(2026, 2, 27, 10), datetime(2026, 3, 27, 10)]
+
+
+def test_ended_series_are_skipped(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:old
+SUMMARY:Old course
+DTSTART:20250106T090000
+RRULE:FREQ=WEEKLY;COUNT=5
+""", """
+UID:current
+SUMMARY:Current course
+DTSTART:20260105T090000
+RRULE:FREQ=WEEKLY
+""")
+
+    expanded = []
+    original = reader._expand_recurrence
+
+    def spy(event, range_start, range_end):
+        expanded.append(event.uid)
+        return original(event, range_start, range_end)
+
+    reader._expand_recurrence = spy
+    events = reader.get_events_for_date(datetime(2026, 3, 2))
+
+    assert [e.title for e in events] == ['Current course']
+    assert expanded == ['current']
+
+
+def test_reload_keeps_series_index_in_sync(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:weekly
+SUMMARY:Weekly
+DTSTART:20261005T100000
+RRULE:FREQ=WEEKLY;COUNT=2
+""")
+    window = (datetime(2026, 10, 1), datetime(2026, 11, 1))
+    assert len(reader.get_events_in_range(*window)) == 2
+
+    path = tmp_path / "calendar.ics"
+    path.write_text(path.read_text(encoding="utf-8").replace("COUNT=2", "COUNT=4"), encoding="utf-8")
+    diff = reader.reload_calendar()
+
+    assert len(diff['changed']) == 1
+    assert len(reader.get_events_in_range(*window)) == 4
+
+
+def test_events_are_hashable():
+    first = Event('Lecture', datetime(2026, 10, 5, 10), uid='a')
+    same = Event('Lecture', datetime(2026, 10, 5, 10), uid='a')
+
+    assert first == same
+    assert len({first, same}) == 1
+    assert {first: 1}[same] == 1
+
+
+def test_all_day_events_are_left_out_of_day_and_week_queries(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:holiday
+SUMMARY:Reading week
+DTSTART;VALUE=DATE:20261012
+DTEND;VALUE=DATE:20261013
+""", """
+UID:lab
+SUMMARY:Deep Learning; Lab
+DTSTART:20261012T140000
+DTEND:20261012T160000
+""")
+
+    day = datetime(2026, 10, 12)
+    assert [e.title for e in reader.get_events_for_date(day)] == ['Deep Learning; Lab']
+    assert [e.title for e in reader.get_events_for_date(day, include_all_day=True)] == [
+        'Reading week', 'Deep Learning; Lab'
+    ]
+    assert [e.title for e in reader.get_events_for_week(day)] == ['Deep Learning; Lab']
+
+
+def write_ics(path, summary, zone_location=None):
+    lines = ["BEGIN:VCALENDAR"]
+    if zone_location:
+        lines += ["BEGIN:VTIMEZONE", "TZID:Campus Time", f"X-LIC-LOCATION:{zone_location}", "END:VTIMEZONE"]
+    lines += [
+        "BEGIN:VEVENT",
+        f"UID:{summary}",
+        f"SUMMARY:{summary}",
+        "DTSTART;TZID=Campus Time:20261005T100000",
+        "END:VEVENT",
+        "END:VCALENDAR",
+    ]
+    path.write_text("\r\n".join(lines) + "\r\n", encoding="utf-8")
+    return str(path)
+
+
+def test_vtimezones_stay_with_their_own_source(tmp_path, local_zone, monkeypatch):
+    local_zone("Asia/Kolkata")
+    monkeypatch.setattr(calendar_reader, "MAX_LOADER_THREADS", 1)
+
+    # Only the first file defines "Campus Time"; the second must not borrow it
+    london = write_ics(tmp_path / "london.ics", "London class", "Europe/London")
+    undefined = write_ics(tmp_path / "undefined.ics", "Undefined zone")
+
+    reader = CalendarReader([london, undefined], use_cache=False)
+    reader.load_calendar()
+
+    starts_by_title = {event.title: event.start for event in reader.all_events}
+    assert starts_by_title == {
+        'London class': datetime(2026, 10, 5, 14, 30),   # 10:00 BST is 14:30 IST
+        'Undefined zone': datetime(2026, 10, 5, 10),     # unknown zone: kept as written
+    }
+
+
+def test_duplicate_uids_are_merged_within_one_source(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:dup
+SUMMARY:Exported twice
+DTSTART:20261005T100000
+""", """
+UID:dup
+SUMMARY:Exported twice
+DTSTART:20261005T100000
+""")
+
+    assert len(reader.all_events) == 1
+
+
+NEW_YORK_SERIES = """
+UID:standup
+SUMMARY:Standup
+DTSTART;TZID=America/New_York:20261019T090000
+DTEND;TZID=America/New_York:20261019T093000
+RRULE:FREQ=WEEKLY;COUNT=5
+"""
+
+
+def test_zoned_series_follows_its_own_dst_change(tmp_path, local_zone):
+    # Berlin leaves summer time on Oct 25, New York only on Nov 1
+    local_zone("Europe/Berlin")
+    reader = make_calendar(tmp_path, NEW_YORK_SERIES)
+
+    events = reader.get_events_in_range(datetime(2026, 10, 1), datetime(2026, 12, 1))
+
+    assert starts(events) == [
+        datetime(2026, 10, 19, 15), datetime(2026, 10, 26, 14), datetime(2026, 11, 2, 15),
+        datetime(2026, 11, 9, 15), datetime(2026, 11, 16, 15),
+    ]
+    assert all(event.end - event.start == timedelta(minutes=30) for event in events)
+    assert reader.get_events_for_date(datetime(2026, 10, 26))[0].start == datetime(2026, 10, 26, 14)
+
+
+def test_zoned_exdate_matches_occurrence_between_dst_changes(tmp_path, local_zone):
+    local_zone("Europe/Berlin")
+    reader = make_calendar(tmp_path, NEW_YORK_SERIES + "EXDATE;TZID=America/New_York:20261026T090000\n")
+
+    assert reader.get_events_for_date(datetime(2026, 10, 26)) == []
+    assert len(reader.get_events_in_range(datetime(2026, 10, 1), datetime(2026, 12, 1))) == 4
+
+
+def test_zoned_recurrence_id_replaces_its_occurrence(tmp_path, local_zone):
+    local_zone("Europe/Berlin")
+    reader = make_calendar(tmp_path, NEW_YORK_SERIES, """
+UID:standup
+SUMMARY:Standup (late)
+RECURRENCE-ID;TZID=America/New_York:20261026T090000
+DTSTART;TZID=America/New_York:20261026T110000
+DTEND;TZID=America/New_York:20261026T113000
+""")
+
+    assert [(e.title, e.start) for e in reader.get_events_for_date(datetime(2026, 10, 26))] == [
+        ('Standup (late)', datetime(2026, 10, 26, 16))
+    ]
+
+
+def test_utc_until_ends_zoned_series(tmp_path, local_zone):
+    local_zone("Europe/Berlin")
+    reader = make_calendar(tmp_path, """
+UID:weekly
+SUMMARY:Weekly
+DTSTART;TZID=America/New_York:20261019T090000
+RRULE:FREQ=WEEKLY;UNTIL=20261102T140000Z
+""")
+
+    events = reader.get_events_in_range(datetime(2026, 10, 1), datetime(2026, 12, 1))
+
+    assert starts(events) == [datetime(2026, 10, 19, 15), datetime(2026, 10, 26, 14), datetime(2026, 11, 2, 15)]
+
+
+def test_unresolved_zone_is_reported_once(tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(calendar_reader, "_unresolved_zones", set())
+    reader = make_calendar(tmp_path, """
+UID:first
+SUMMARY:First
+DTSTART;TZID=Nowhere/Campus:20261005T100000
+""", """
+UID:second
+SUMMARY:Second
+DTSTART;TZID=Nowhere/Campus:20261006T100000
+""")
+
+    assert starts(reader.all_events) == [datetime(2026, 10, 5, 10), datetime(2026, 10, 6, 10)]
+    assert capsys.readouterr().out.count("Unknown time zone 'Nowhere/Campus'") == 1
+
+
+def at(day, hour, minute=0):
+    return datetime(2026, 10, day, hour, minute)
+
+
+def test_busy_intervals_merge_overlapping_and_adjacent_events(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:a
+SUMMARY:Lecture
+DTSTART:20261005T090000
+DTEND:20261005T100000
+""", """
+UID:b
+SUMMARY:Overlapping lab
+DTSTART:20261005T093000
+DTEND:20261005T110000
+""", """
+UID:c
+SUMMARY:Inside the lab
+DTSTART:20261005T094500
+DTEND:20261005T101500
+""", """
+UID:d
+SUMMARY:Straight after
+DTSTART:20261005T110000
+DTEND:20261005T120000
+""", """
+UID:e
+SUMMARY:Afternoon
+DTSTART:20261005T130000
+DTEND:20261005T140000
+""")
+
+    assert reader.get_busy_intervals(at(5, 0), at(6, 0)) == [(at(5, 9), at(5, 12)), (at(5, 13), at(5, 14))]
+    assert reader.get_busy_intervals(at(5, 10), at(5, 13, 30)) == [(at(5, 10), at(5, 12)), (at(5, 13), at(5, 13, 30))]
+
+
+def test_free_slots_clip_events_to_the_waking_window(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:early
+SUMMARY:Early shift
+DTSTART:20261005T060000
+DTEND:20261005T080000
+""", """
+UID:late
+SUMMARY:Late call
+DTSTART:20261005T223000
+DTEND:20261005T233000
+""")
+
+    assert reader.get_free_slots(at(5, 0), at(6, 0), '07:00', '23:00') == [(at(5, 8), at(5, 22, 30))]
+
+
+def test_event_past_midnight_blocks_both_days(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:night
+SUMMARY:Night lab
+DTSTART:20261005T220000
+DTEND:20261006T013000
+""")
+
+    assert reader.get_busy_intervals(at(6, 0), at(7, 0)) == [(at(6, 0), at(6, 1, 30))]
+    assert reader.get_free_slots(at(5, 0), at(7, 0), '07:00', '02:00') == [
+        (at(5, 0), at(5, 2)),           # the previous evening's window runs into the range
+        (at(5, 7), at(5, 22)),
+        (at(6, 1, 30), at(6, 2)),
+        (at(6, 7), at(7, 0)),
+    ]
+
+
+def test_free_slots_over_several_days(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:daily
+SUMMARY:Daily class
+DTSTART:20261005T100000
+DTEND:20261005T120000
+RRULE:FREQ=DAILY;COUNT=2
+""")
+
+    assert reader.get_free_slots(at(5, 0), at(8, 0), '07:00', '23:00') == [
+        (at(5, 7), at(5, 10)), (at(5, 12), at(5, 23)),
+        (at(6, 7), at(6, 10)), (at(6, 12), at(6, 23)),
+        (at(7, 7), at(7, 23)),
+    ]
+
+
+def test_all_day_events_are_not_busy(tmp_path):
+    reader = make_calendar(tmp_path, """
+UID:holiday
+SUMMARY:Reading week
+DTSTART;VALUE=DATE:20261005
+DTEND;VALUE=DATE:20261010
+""", """
+UID:lab
+SUMMARY:Lab
+DTSTART:20261006T140000
+DTEND:20261006T160000
+""")
+
+    assert reader.get_busy_intervals(at(5, 0), at(8, 0)) == [(at(6, 14), at(6, 16))]
+    assert reader.get_free_slots(at(5, 0), at(6, 0), '07:00', '23:00') == [(at(5, 7), at(5, 23))]
+
+
+def mid_file_vtimezone_calendar(path):
+    """Events using 'Campus Time' before and after the VTIMEZONE that defines it"""
+    lines = ["BEGIN:VCALENDAR", "VERSION:2.0"]
+    for i in range(60):
+        if i == 30:
+            lines += ["BEGIN:VTIMEZONE", "TZID:Campus Time", "X-LIC-LOCATION:Europe/London", "END:VTIMEZONE"]
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:event-{i}",
+            f"SUMMARY:Event {i}",
+            f"DTSTART;TZID=Campus Time:202610{5 + i % 3:02d}T{8 + i % 10:02d}0000",
+            f"DTEND;TZID=Campus Time:202610{5 + i % 3:02d}T{9 + i % 10:02d}0000",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    path.write_text("\r\n".join(lines) + "\r\n", encoding="utf-8")
+    return str(path)
+
+
+def snapshot(events):
+    return [(e.title, e.start, e.end, e.uid) for e in events]
+
+
+def test_parallel_parse_matches_serial_parse(tmp_path, local_zone, monkeypatch):
+    local_zone("Asia/Kolkata")
+    monkeypatch.setattr(calendar_reader, "PARALLEL_MIN_BYTES", 0)
+    path = mid_file_vtimezone_calendar(tmp_path / "big.ics")
+
+    used = []
+    original = CalendarReader._parse_parallel
+    monkeypatch.setattr(CalendarReader, "_parse_parallel", lambda self, f: used.append(f) or original(self, f))
+
+    serial = CalendarReader(path, use_cache=False)
+    serial.load_calendar()
+    parallel = CalendarReader(path, use_cache=False, parallel=True, workers=2)
+    parallel.load_calendar()
+
+    assert used == [path]
+    assert snapshot(parallel.all_events) == snapshot(serial.all_events)
+    # Before the VTIMEZONE the zone is unknown; after it, London times are converted
+    starts_by_title = {e.title: e.start for e in serial.all_events}
+    assert starts_by_title['Event 0'] == datetime(2026, 10, 5, 8)
+    assert starts_by_title['Event 30'] == datetime(2026, 10, 5, 12, 30)
+
+
+@pytest.fixture
+def parse_count(monkeypatch):
+    """Count full parses of a calendar file"""
+    parses = []
+    original = CalendarReader._iter_events
+
+    def counting(self, lines):
+        parses.append(1)
+        return original(self, lines)
+
+    monkeypatch.setattr(CalendarReader, "_iter_events", counting)
+    return parses
+
+
+def cached_calendar(tmp_path, summary="Lecture A"):
+    path = tmp_path / "cached.ics"
+    path.write_text("\r\n".join([
+        "BEGIN:VCALENDAR", "BEGIN:VEVENT", "UID:one", f"SUMMARY:{summary}",
+        "DTSTART:20261005T100000", "END:VEVENT", "END:VCALENDAR",
+    ]) + "\r\n", encoding="utf-8")
+    return path
+
+
+def load_titles(path):
+    reader = CalendarReader(str(path))
+    assert reader.load_calendar()
+    return [event.title for event in reader.all_events]
+
+
+def set_mtime(path, offset_seconds):
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + offset_seconds * 10 ** 9))
+
+
+def test_cache_is_reused_when_nothing_changed(tmp_path, parse_count):
+    path = cached_calendar(tmp_path)
+
+    assert load_titles(path) == ['Lecture A']
+    assert load_titles(path) == ['Lecture A']
+    assert len(parse_count) == 1
+
+
+def test_cache_is_rebuilt_after_a_size_change(tmp_path, parse_count):
+    path = cached_calendar(tmp_path)
+    load_titles(path)
+
+    cached_calendar(tmp_path, "Lecture A (moved)")
+
+    assert load_titles(path) == ['Lecture A (moved)']
+    assert len(parse_count) == 2
+
+
+def test_cache_is_rebuilt_after_a_same_size_edit(tmp_path, parse_count):
+    path = cached_calendar(tmp_path)
+    load_titles(path)
+
+    cached_calendar(tmp_path, "Lecture B")
+    set_mtime(path, 5)
+
+    assert load_titles(path) == ['Lecture B']
+    assert len(parse_count) == 2
+
+
+def test_touched_file_with_same_content_keeps_its_cache(tmp_path, parse_count):
+    path = cached_calendar(tmp_path)
+    load_titles(path)
+
+    set_mtime(path, 5)
+
+    assert load_titles(path) == ['Lecture A']
+    assert load_titles(path) == ['Lecture A']
+    assert len(parse_count) == 1
+
+
+@pytest.mark.parametrize("damage", ["corrupt", "old_version"])
+def test_unusable_cache_falls_back_to_a_full_parse(tmp_path, parse_count, damage):
+    path = cached_calendar(tmp_path)
+    load_titles(path)
+    cache_file = tmp_path / "cached.ics.cache"
+
+    if damage == "corrupt":
+        cache_file.write_bytes(b"not a pickle")
+    else:
+        with open(cache_file, 'rb') as f:
+            cache = pickle.load(f)
+        cache['version'] = calendar_reader.CACHE_VERSION - 1
+        with open(cache_file, 'wb') as f:
+            pickle.dump(cache, f)
+
+    assert load_titles(path) == ['Lecture A']
+    assert len(parse_count) == 2
+    assert load_titles(path) == ['Lecture A']
+    assert len(parse_count) == 2
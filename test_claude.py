@@ -1,10 +1,11 @@
 import os
-from anthropic import Anthropic
 from dotenv import load_dotenv
 
 
 load_dotenv()
 
+from llm_gateway import get_gateway
+
 def test_claude_connection():
     """Test connection to the Claude API."""
     api_key = os.getenv("ANTHROPIC_API_KEY")
@@ -19,14 +20,14 @@ def test_claude_connection():
         print("   export ANTHROPIC_API_KEY='your-key-here'")
         return False
 
-    # Initialize Claude client
-    client = Anthropic(api_key=api_key)
+    # Shared Claude client (same path the agent uses)
+    gateway = get_gateway(api_key=api_key)
 
 
     print("Testing connection to Claude API...")
     try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
+        message = gateway.create(
+            model=gateway.model,
             max_tokens=1024,
             messages=[
                 {
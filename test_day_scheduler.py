@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from day_scheduler import CareerProgress, DayScheduler
+from study_planner import StudyPlanner
+
+
+def build_day(scheduler, day, progress=None):
+    free = [(day + timedelta(hours=8), day + timedelta(hours=20))]
+    return scheduler.build(day, free, 8, progress=progress)
+
+
+def career_topics(schedule):
+    return [s['specific_topic'] for s in schedule['schedule'] if not s['subject'].startswith('MSc')]
+
+
+def test_days_planned_ahead_continue_the_topic_queue():
+    planner = StudyPlanner()
+    scheduler = DayScheduler(planner)
+    progress = CareerProgress(planner)
+    first_day = datetime(2026, 10, 20)
+
+    days = [career_topics(build_day(scheduler, first_day + timedelta(days=i), progress)) for i in range(3)]
+
+    # SQL Basics is 4h: two 2h blocks on day one, then the queue moves on
+    assert days[0] == ['SQL Basics (SELECT, WHERE, ORDER BY)', 'SQL Basics (SELECT, WHERE, ORDER BY) (continued)']
+    assert all('SQL Basics' not in topic for day in days[1:] for topic in day)
+    assert days[1] != days[2]
+
+
+def test_single_day_uses_the_planners_progress_without_changing_it():
+    planner = StudyPlanner()
+    scheduler = DayScheduler(planner)
+    day = datetime(2026, 10, 20)
+
+    first = career_topics(build_day(scheduler, day))
+    again = career_topics(build_day(scheduler, day + timedelta(days=1)))
+
+    assert first == again
+    assert planner.topic_graph().completed_names() == set()
+
+
+def test_blocks_carry_the_skill_they_count_towards():
+    planner = StudyPlanner()
+    schedule = build_day(DayScheduler(planner), datetime(2026, 10, 20))
+
+    for session in schedule['schedule']:
+        if session['subject'].startswith('MSc'):
+            assert session['skill_id'] is None
+        else:
+            assert planner.curriculum[session['skill_id']]['name'] == session['subject']
+
+
+def test_replan_keeps_finished_blocks_and_only_fills_time_after_now():
+    planner = StudyPlanner()
+    scheduler = DayScheduler(planner)
+    day = datetime(2026, 10, 20)
+    morning = build_day(scheduler, day)
+    first_topic = career_topics(morning)[0]
+    now = day + timedelta(hours=12, minutes=5)
+
+    # A new 14:00-16:00 event: the afternoon is free again only from 16:00
+    free = [(day + timedelta(hours=8), day + timedelta(hours=14)), (day + timedelta(hours=16), day + timedelta(hours=20))]
+    replanned = scheduler.replan(morning, now, free, 8)
+
+    finished = [s for s in morning['schedule'] if s['end_time'] <= '12:05']
+    assert replanned['schedule'][:len(finished)] == finished
+    new_blocks = replanned['schedule'][len(finished):]
+    assert new_blocks and all(s['start_time'] >= '12:05' for s in new_blocks)
+    assert not any('14:00' <= s['start_time'] < '16:00' for s in new_blocks)
+    assert replanned['total_study_hours'] <= 8
+
+    # The morning's career block counts as studied, so the topic carries on instead of starting over
+    assert career_topics({'schedule': new_blocks})[0] == f"{first_topic} (continued)"
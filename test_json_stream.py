@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+from json_stream import JSONStreamParser
+
+DOCUMENT = {
+    "summary": "Busy day",
+    "schedule": [
+        {"start_time": "08:00", "study_guidance": ["Use {braces} in \"quotes\"", "b"], "why_now": "x }"},
+        {"start_time": "10:30", "study_guidance": ["c"], "why_now": "[still a string"},
+    ],
+}
+
+
+def stream(parser, text, size=7):
+    """Feed text in small chunks; returns every element handed out, in order"""
+    items = []
+    for i in range(0, len(text), size):
+        items += parser.feed(text[i:i + size])
+    return items + parser.close()
+
+
+@pytest.mark.parametrize("size", [1, 3, 50, 10000])
+def test_elements_stream_out_as_they_complete(size):
+    parser = JSONStreamParser('schedule')
+
+    items = stream(parser, json.dumps(DOCUMENT), size)
+
+    assert items == DOCUMENT["schedule"]
+    assert parser.document == DOCUMENT
+
+
+def test_first_element_arrives_before_the_document_closes():
+    parser = JSONStreamParser('schedule')
+    text = json.dumps(DOCUMENT)
+    cut = text.index('{"start_time": "10:30"')
+
+    assert parser.feed(text[:cut]) == DOCUMENT["schedule"][:1]
+    assert parser.document is None
+
+
+def test_truncated_stream_keeps_finished_elements():
+    parser = JSONStreamParser('schedule')
+    text = json.dumps(DOCUMENT)
+
+    items = stream(parser, text[:text.index('"c"')])
+
+    assert items == DOCUMENT["schedule"][:1]
+    assert parser.document is None
+
+
+def test_braces_inside_strings_are_ignored():
+    document = {"summary": "use {x} and }", "schedule": [{"start_time": "08:00", "why_now": "{{{"}]}
+    parser = JSONStreamParser('schedule')
+
+    assert stream(parser, json.dumps(document)) == document["schedule"]
+    assert parser.document == document
+
+
+def test_prose_and_code_fence_before_the_json():
+    text = "Here is the plan {for Monday}: {\"note\": }\n```json\n" + json.dumps(DOCUMENT) + "\n```\nGood luck {"
+    parser = JSONStreamParser('schedule')
+
+    assert stream(parser, text) == DOCUMENT["schedule"]
+    assert parser.document == DOCUMENT
+
+
+@pytest.mark.parametrize("prose", [
+    "Your schedule {as requested:\n",
+    "Plan {\n\n",
+    'Fields {"schedule" and "summary" follow:\n',
+])
+def test_unbalanced_brace_in_prose(prose):
+    parser = JSONStreamParser('schedule')
+
+    items = stream(parser, prose + "```json\n" + json.dumps(DOCUMENT) + "\n```", size=5)
+
+    assert items == DOCUMENT["schedule"]
+    assert parser.document == DOCUMENT
+
+
+def test_rescan_does_not_repeat_elements():
+    # The first candidate streams an element, then turns out not to be valid JSON
+    text = '{"schedule": [{"start_time": "08:00"}], oops} ' + json.dumps(DOCUMENT)
+    parser = JSONStreamParser('schedule')
+
+    items = stream(parser, text)
+
+    assert items == [{"start_time": "08:00"}] + DOCUMENT["schedule"]
+    assert parser.document == DOCUMENT
+
+
+def test_identical_elements_are_all_returned():
+    block = {"start_time": "08:00", "study_guidance": ["Review"]}
+    document = {"schedule": [block, block, block]}
+    parser = JSONStreamParser('schedule')
+
+    assert stream(parser, json.dumps(document)) == [block, block, block]
+
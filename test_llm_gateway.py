@@ -0,0 +1,201 @@
+import asyncio
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+import anthropic
+import pytest
+
+import llm_gateway
+from llm_gateway import LLMGateway, DeadlineExceeded, TokenBucket
+
+REPLY = {
+    "id": "msg_test", "type": "message", "role": "assistant", "model": "test-model",
+    "content": [{"type": "text", "text": "ok"}], "stop_reason": "end_turn", "stop_sequence": None,
+    "usage": {"input_tokens": 3, "output_tokens": 1},
+}
+
+ERROR = {"type": "error", "error": {"type": "invalid_request_error", "message": "bad request"}}
+
+
+class MockAPI:
+    """Local Messages endpoint answering from a script of (status, headers, delay) replies"""
+
+    def __init__(self):
+        self.script = []
+        self.requests = []
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                mock.requests.append(json.loads(self.rfile.read(int(self.headers['Content-Length']))))
+                status, headers, delay = mock.script.pop(0) if mock.script else (200, {}, 0)
+                time.sleep(delay)
+
+                body = json.dumps(REPLY if status == 200 else ERROR).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header('Content-Type', 'application/json')
+                    self.send_header('Content-Length', str(len(body)))
+                    for name, value in headers.items():
+                        self.send_header(name, value)
+                    self.end_headers()
+                    self.wfile.write(body)
+                except OSError:
+                    pass  # the client gave up first
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True).start()
+
+
+@pytest.fixture
+def api():
+    mock = MockAPI()
+    yield mock
+    mock.server.shutdown()
+    mock.server.server_close()
+
+
+def gateway(api, **options):
+    return LLMGateway(api_key="test-key", base_url=api.url, model="test-model", **options)
+
+
+def ask(llm, **options):
+    return llm.create(model=llm.model, max_tokens=10, messages=[{"role": "user", "content": "hi"}], **options)
+
+
+def test_429_waits_for_retry_after(api, monkeypatch):
+    monkeypatch.setattr(llm_gateway, "BACKOFF_BASE_SECONDS", 0.01)
+    api.script = [(429, {'retry-after': '0.3'}, 0)]
+    llm = gateway(api)
+
+    started = time.monotonic()
+    message = ask(llm)
+
+    assert message.content[0].text == "ok"
+    assert time.monotonic() - started >= 0.3
+    assert len(api.requests) == 2
+    assert llm.stats()['retries'] == 1
+    assert llm.stats()['output_tokens'] == 1
+
+
+def test_other_4xx_is_not_retried(api):
+    api.script = [(400, {}, 0)]
+    llm = gateway(api)
+
+    with pytest.raises(anthropic.BadRequestError):
+        ask(llm)
+
+    assert len(api.requests) == 1
+    assert llm.retries == 0
+
+
+def test_slow_reply_raises_deadline_exceeded(api):
+    api.script = [(200, {}, 1.0)]
+    llm = gateway(api)
+
+    started = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        ask(llm, deadline=0.3)
+
+    assert time.monotonic() - started < 0.9
+
+
+def test_retry_after_past_the_deadline_gives_up(api):
+    api.script = [(429, {'retry-after': '5'}, 0)]
+    llm = gateway(api)
+
+    with pytest.raises(anthropic.RateLimitError):
+        ask(llm, deadline=1)
+
+    assert len(api.requests) == 1
+
+
+def test_busy_slot_raises_deadline_exceeded(api):
+    api.script = [(200, {}, 0.6)]
+    llm = gateway(api, max_concurrency=1)
+    slow = threading.Thread(target=ask, args=(llm,))
+    slow.start()
+    time.sleep(0.1)
+
+    with pytest.raises(DeadlineExceeded):
+        ask(llm, deadline=0.2)
+    slow.join()
+
+
+def test_slot_is_released_after_a_failure(api):
+    api.script = [(400, {}, 0), (400, {}, 0)]
+    llm = gateway(api, max_concurrency=1)
+
+    with pytest.raises(anthropic.BadRequestError):
+        ask(llm)
+    with pytest.raises(anthropic.BadRequestError):
+        list(llm.stream_text(model=llm.model, max_tokens=10, messages=[{"role": "user", "content": "hi"}]))
+
+    # With a leaked slot this would wait out its deadline
+    assert ask(llm, deadline=1).content[0].text == "ok"
+    assert llm._slots.acquire(blocking=False)
+
+
+def test_cancelled_async_wait_gives_its_slot_back(api):
+    llm = gateway(api, max_concurrency=1)
+    llm._slots.acquire()  # another request holds the only slot
+
+    async def cancel_while_waiting():
+        waiting = asyncio.ensure_future(llm._acquire_async(time.monotonic() + 5))
+        await asyncio.sleep(0.1)
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        llm._slots.release()  # the executor thread now takes it, for a task that is gone
+        await asyncio.sleep(0.1)
+
+    asyncio.run(cancel_while_waiting())
+
+    assert llm._slots.acquire(blocking=False)
+
+
+def test_deadline_failures_return_their_rate_limit_token(api):
+    llm = gateway(api, requests_per_minute=1, burst=1)
+    ask(llm)
+
+    for _ in range(3):
+        with pytest.raises(DeadlineExceeded):
+            ask(llm, deadline=1)
+
+    # Without the refunds the bucket would be three tokens further in debt
+    assert llm._bucket._tokens > -1
+    assert len(api.requests) == 1
+
+
+def test_refund_never_exceeds_the_burst():
+    bucket = TokenBucket(per_minute=60, burst=2)
+
+    bucket.refund()
+
+    assert bucket.reserve() == 0.0 and bucket.reserve() == 0.0
+    assert bucket.reserve() > 0
+
+
+def test_counters_add_up_across_threads(api):
+    llm = gateway(api, requests_per_minute=10000, burst=1000)
+    threads = [threading.Thread(target=ask, args=(llm,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert llm.stats()['requests'] == 8 == len(api.requests)
+
+
+def test_model_comes_from_the_environment_when_the_gateway_is_made(api, monkeypatch):
+    monkeypatch.setenv("ANTHROPIC_MODEL", "model-from-dotenv")
+
+    assert LLMGateway(api_key="test-key", base_url=api.url).model == "model-from-dotenv"
+    assert gateway(api).model == "test-model"
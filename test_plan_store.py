@@ -0,0 +1,49 @@
+import sqlite3
+
+from plan_store import PlanStore, SCHEMA_VERSION, SESSION_PENDING
+
+
+def test_pending_sessions_are_not_progress_until_confirmed(tmp_path):
+    store = PlanStore(str(tmp_path / "plan.db"))
+    store.log_session('2026-10-20', '08:00', '10:00', 'SQL', 2, skill_id='sql', status=SESSION_PENDING)
+    store.log_session('2026-10-20', '14:00', '16:00', 'SQL', 2, skill_id='sql', status=SESSION_PENDING)
+
+    assert store.get_progress() == {}
+
+    assert store.confirm_sessions('2026-10-20', '08:00') == 1
+    assert store.confirm_sessions('2026-10-20', '14:00', done=False) == 1
+    assert store.confirm_sessions('2026-10-20') == 0
+
+    assert store.get_progress() == {'sql': 2}
+    assert store.get_progress('sql') == 2
+    assert [s['status'] for s in store.get_sessions('2026-10-20')] == ['done', 'skipped']
+
+
+def test_logging_a_session_twice_keeps_one_row(tmp_path):
+    store = PlanStore(str(tmp_path / "plan.db"))
+
+    assert store.log_session('2026-10-20', '08:00', '10:00', 'SQL', 2, skill_id='sql')
+    assert not store.log_session('2026-10-20', '08:00', '10:00', 'SQL', 2, skill_id='sql')
+    assert store.get_progress() == {'sql': 2}
+
+
+def test_version_1_database_keeps_its_sessions_as_done(tmp_path):
+    path = str(tmp_path / "plan.db")
+    with sqlite3.connect(path) as conn:
+        conn.executescript("""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            INSERT INTO meta VALUES ('schema_version', '1');
+            CREATE TABLE sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL, start_time TEXT NOT NULL,
+                end_time TEXT NOT NULL, subject TEXT NOT NULL, skill_id TEXT, topic TEXT,
+                hours REAL NOT NULL, logged_at TEXT NOT NULL
+            );
+            INSERT INTO sessions (date, start_time, end_time, subject, skill_id, hours, logged_at)
+            VALUES ('2026-10-01', '08:00', '10:00', 'SQL', 'sql', 2, '2026-10-01 10:00:00');
+        """)
+    conn.close()
+
+    store = PlanStore(path)
+
+    assert store.get_progress() == {'sql': 2}
+    assert store.get_meta('schema_version') == SCHEMA_VERSION
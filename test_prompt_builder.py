@@ -0,0 +1,52 @@
+import pytest
+
+from prompt_builder import PromptBuilder, compact_json, estimate_tokens
+
+WORDS = ' '.join(['word'] * 40)
+
+
+def builder():
+    prompt = PromptBuilder()
+    prompt.add('', "Instructions")
+    prompt.add('CURRICULUM', WORDS, WORDS[:100], WORDS[:20], value=3)
+    prompt.add('OVERLAP', WORDS, WORDS[:50], None, value=[2, 4])
+    return prompt
+
+
+def test_fits_without_trimming():
+    prompt = builder()
+
+    text = prompt.build(1000)
+
+    assert prompt.trimmed == []
+    assert text.startswith("Instructions\nCURRICULUM: ")
+
+
+def test_steps_are_taken_lowest_value_first():
+    prompt = builder()
+
+    text = prompt.build(1)
+
+    # Overlap details (2), both curriculum steps (3), then the overlap itself (4)
+    assert prompt.trimmed == ['OVERLAP', 'CURRICULUM', 'CURRICULUM', 'OVERLAP']
+    assert text == f"Instructions\nCURRICULUM: {WORDS[:20]}"
+
+
+def test_overlap_outlives_the_curriculum_trim():
+    prompt = builder()
+    full = estimate_tokens(prompt.build(float('inf')))
+
+    text = prompt.build(full - 1)
+    assert prompt.trimmed == ['OVERLAP']
+
+    text = prompt.build(estimate_tokens(text) - 1)
+    assert 'OVERLAP: ' in text and prompt.trimmed[-1] == 'CURRICULUM'
+
+
+def test_one_value_per_fallback():
+    with pytest.raises(ValueError):
+        PromptBuilder().add('OVERLAP', 'a', 'b', None, value=[1])
+
+
+def test_compact_json_is_stable():
+    assert compact_json({'b': [1, 2], 'a': 'é'}) == '{"a":"é","b":[1,2]}'
@@ -0,0 +1,164 @@
+from study_planner import HourAllocator, StudyPlanner, TopicGraph, HOUR_GRANULARITY
+
+
+def curriculum():
+    return {
+        "sql": {
+            "name": "SQL", "priority": "critical",
+            "topics": [{"name": "Basics", "hours": 4}, {"name": "JOINs", "hours": 6}]
+        },
+        "stats": {
+            "name": "Statistics", "priority": "high",
+            "topics": [{"name": "Distributions", "hours": 5}]
+        },
+        "excel": {
+            "name": "Excel", "priority": "medium",
+            "topics": [{"name": "Pivot Tables", "hours": 4}]
+        },
+    }
+
+
+def by_topic(allocator, hours):
+    return {(skill_id, index): h for (skill_id, index, *_), h in zip(allocator.topics, hours)}
+
+
+def test_enough_time_gives_every_topic_its_full_hours():
+    allocator = HourAllocator(curriculum())
+
+    hours = by_topic(allocator, allocator.solve(100))
+
+    assert hours == {('sql', 0): 4, ('sql', 1): 6, ('stats', 0): 5, ('excel', 0): 4}
+
+
+def test_tight_budget_keeps_minimums_and_favours_higher_priority():
+    allocator = HourAllocator(curriculum())
+
+    # Minimums are 25%: 1 + 1.5 + 1.25 + 1 = 4.75h; the rest fills SQL, then Statistics
+    hours = by_topic(allocator, allocator.solve(16))
+
+    assert hours == {('sql', 0): 4, ('sql', 1): 6, ('stats', 0): 5, ('excel', 0): 1}
+
+
+def test_budget_below_minimums_goes_to_the_most_important_tier():
+    allocator = HourAllocator(curriculum())
+
+    hours = by_topic(allocator, allocator.solve(2))
+
+    assert sum(hours.values()) == 2
+    assert hours[('stats', 0)] == 0 and hours[('excel', 0)] == 0
+
+
+def test_allocations_are_half_hours_within_bounds():
+    allocator = HourAllocator(curriculum(), msc_coverage={'stats': 30})
+
+    for budget in [0, 0.4, 3.3, 7.75, 13, 18.2, 40]:
+        solution = allocator.solve(budget)
+        assert all(h / HOUR_GRANULARITY == int(h / HOUR_GRANULARITY) for h in solution)
+        assert all(0 <= h <= row[4] + 1e-9 for row, h in zip(allocator.topics, solution))
+        assert sum(solution) <= max(budget, 0) + 1e-9
+
+
+def test_msc_coverage_caps_topics():
+    allocator = HourAllocator(curriculum(), msc_coverage={'stats': 100, 'sql': 50})
+
+    hours = by_topic(allocator, allocator.solve(100))
+
+    assert hours[('stats', 0)] == 0
+    assert hours[('sql', 0)] == 2 and hours[('sql', 1)] == 3
+
+
+def test_solutions_are_memoized_per_half_hour():
+    allocator = HourAllocator(curriculum())
+
+    assert allocator.solve(10.1) is allocator.solve(10.4)
+    assert allocator.solve(10.1) is not allocator.solve(10.5)
+
+
+def test_topic_graph_orders_by_prerequisites():
+    graph = TopicGraph(curriculum(), prerequisites={"Distributions": ["JOINs"]})
+
+    assert graph.next_eligible(3) == [('sql', 'Basics'), ('excel', 'Pivot Tables')]
+    graph.mark_completed("Basics")
+    graph.mark_completed("JOINs")
+    assert graph.next_eligible(3) == [('stats', 'Distributions'), ('excel', 'Pivot Tables')]
+
+
+def test_topic_graph_copy_plays_forward_independently():
+    graph = TopicGraph(curriculum(), prerequisites={})
+    clone = graph.copy()
+
+    clone.mark_completed("Basics")
+
+    assert clone.next_eligible() == [('sql', 'JOINs')]
+    assert graph.next_eligible() == [('sql', 'Basics')]
+    assert graph.completed_names() == set()
+
+
+class FakeStore:
+    def __init__(self):
+        self.progress = {}
+
+    def get_progress(self):
+        return self.progress
+
+
+def test_planner_keeps_one_graph_in_step_with_logged_sessions():
+    planner = StudyPlanner()
+    planner.store = FakeStore()
+    graph = planner.topic_graph()
+    first_sql = planner.curriculum['sql']['topics'][0]
+
+    assert ('sql', first_sql['name']) in graph.next_eligible(6)
+
+    planner.store.progress = {'sql': first_sql['hours']}
+    planner.refresh_progress()
+
+    assert planner.topic_graph() is graph
+    assert first_sql['name'] in graph.completed_names()
+    assert ('sql', planner.curriculum['sql']['topics'][1]['name']) in graph.next_eligible(6)
+
+
+def test_planner_rebuilds_graph_when_a_topic_is_reopened():
+    planner = StudyPlanner()
+    planner.store = FakeStore()
+    planner.store.progress = {'sql': 4}
+    planner.refresh_progress()
+    graph = planner.topic_graph()
+
+    planner.store.progress = {}
+    planner.refresh_progress()
+
+    assert planner.topic_graph() is not graph
+    assert planner.topic_graph().completed_names() == set()
+
+
+def test_earliest_start_follows_the_longest_prerequisite_chain():
+    graph = TopicGraph(curriculum(), prerequisites={"Distributions": ["JOINs"], "Pivot Tables": ["Basics"]})
+
+    starts = dict(zip((name for _, name in graph.topics), graph.earliest_start))
+
+    assert starts == {'Basics': 0, 'JOINs': 4, 'Distributions': 10, 'Pivot Tables': 4}
+
+
+def test_earliest_finish_skips_completed_topics():
+    graph = TopicGraph(curriculum(), prerequisites={"Distributions": ["JOINs"]})
+    graph.mark_completed("Basics")
+
+    finish = graph.earliest_finish({'JOINs': 2, 'Distributions': 5, 'Pivot Tables': 4})
+
+    assert finish['Distributions'] == 7
+    assert finish['Basics'] == 0
+
+
+def test_weekly_breakdown_leaves_out_topics_that_cant_finish_in_time():
+    planner = StudyPlanner()
+    planner.store = FakeStore()
+    planner.curriculum = curriculum()
+    planner._topic_graph = TopicGraph(planner.curriculum, prerequisites={"Distributions": ["JOINs"]})
+
+    # 12 career hours in total: Distributions needs Basics + JOINs + itself = 15h
+    weeks = planner.generate_weekly_breakdown(1, daily_available_hours=[24 / 7] * 7)
+
+    assert planner.unreachable_topics == ['Distributions']
+    scheduled = [topic for week in weeks for skill in week['focus_skills'] for topic in skill['topics']]
+    assert not any('Distributions' in topic for topic in scheduled)